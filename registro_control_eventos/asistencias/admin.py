@@ -3,6 +3,11 @@ Configuración del Admin para la aplicación de Asistencias
 """
 
 from django.contrib import admin
+from django.db import transaction
+from eventos.models import Evento, EstadisticaEvento
+from inscripciones.models import Inscripcion
+from certificados.verificacion import limpiar_verificaciones_evento
+from .checkin import invalidar_roster
 from .models import Asistencia, ControlAsistencia
 
 
@@ -37,6 +42,21 @@ class AsistenciaAdmin(admin.ModelAdmin):
             'fields': ('notas',)
         }),
     )
+    
+    def delete_queryset(self, request, queryset):
+        """
+        Borrado masivo: el DELETE no pasa por Asistencia.delete, así que se
+        reconstruyen asistencias_count y las estadísticas de los eventos afectados
+        """
+        filas = set(queryset.values_list('inscripcion_id', 'inscripcion__evento_id'))
+        eventos_ids = {evento_id for _, evento_id in filas}
+        with transaction.atomic():
+            super().delete_queryset(request, queryset)
+            Inscripcion.recalcular_asistencias({inscripcion_id for inscripcion_id, _ in filas})
+            EstadisticaEvento.recalcular(Evento.objects.filter(pk__in=eventos_ids))
+        for evento_id in eventos_ids:
+            invalidar_roster(evento_id)
+            limpiar_verificaciones_evento(evento_id)
 
 
 @admin.register(ControlAsistencia)
@@ -51,3 +71,7 @@ class ControlAsistenciaAdmin(admin.ModelAdmin):
     search_fields = ['evento__nombre']
     readonly_fields = ['fecha_creacion', 'total_asistentes', 'total_inscritos', 'porcentaje_asistencia']
     date_hierarchy = 'fecha_sesion'
+    
+    def get_queryset(self, request):
+        """Totales anotados: el listado no consulta la base por cada fila"""
+        return super().get_queryset(request).con_estadisticas()
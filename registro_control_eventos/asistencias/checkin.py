@@ -0,0 +1,428 @@
+"""
+Check-in por código QR en la puerta del evento
+PRCE - Plataforma de Registro y Control de Eventos
+
+HU-17: Escaneo de Código QR
+
+Cada proceso mantiene en memoria, por evento, las inscripciones confirmadas
+indexadas por código QR y, por sesión, las que ya registraron asistencia.
+El listado se precarga al abrir la sesión (ControlAsistencia activo) y se
+refresca cada SEGUNDOS_CACHE_ROSTER o en cuanto cambia su versión en la caché
+compartida (una inscripción confirmada se canceló o cambió de código); así
+un escaneo válido no lee la base de datos y se registra con un INSERT que
+ignora el conflicto (inscripcion, sesion).
+
+Los lectores que trabajan sin conexión sincronizan sus escaneos en bloque
+con sincronizar_escaneos (una consulta IN y un único INSERT por lote) y
+descargan el listado firmado del evento con lineas_listado.
+"""
+
+import hashlib
+import hmac
+import json
+import threading
+import time
+import uuid
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+
+from certificados.verificacion import limpiar_verificaciones_evento
+from registro_control_eventos.cache_publico import invalidar, versiones
+
+# Vigencia del listado en memoria (inscripciones confirmadas tardías o canceladas)
+SEGUNDOS_CACHE_ROSTER = 300
+
+_rosters = {}
+_bloqueo_rosters = threading.Lock()
+
+
+class RosterEvento:
+    """Inscripciones confirmadas de un evento y asistencias registradas por sesión"""
+
+    def __init__(self, evento_id, numero_sesiones, participantes, registrados, version):
+        self.evento_id = evento_id
+        self.numero_sesiones = numero_sesiones
+        # {UUID: (inscripcion_id, nombre completo)}
+        self.participantes = participantes
+        # {sesion: {inscripcion_id, ...}}
+        self.registrados = registrados
+        # Versión compartida del listado con la que se cargó
+        self.version = version
+        self.vence = time.monotonic() + SEGUNDOS_CACHE_ROSTER
+        self.bloqueo = threading.Lock()
+
+    @classmethod
+    def cargar(cls, evento):
+        """Construye el listado con dos consultas recorridas en lotes"""
+        from inscripciones.models import Inscripcion
+        from .models import Asistencia
+
+        # Leída antes de las consultas: un cambio durante la carga fuerza otra
+        version = version_roster(evento.pk)
+        participantes = {
+            codigo: (inscripcion_id, f'{nombre} {apellido}')
+            for inscripcion_id, codigo, nombre, apellido in Inscripcion.objects.filter(
+                evento=evento,
+                estado='CONFIRMADA'
+            ).values_list('pk', 'codigo_qr', 'nombre', 'apellido').iterator(chunk_size=2000)
+        }
+
+        registrados = {}
+        asistencias = Asistencia.objects.filter(
+            inscripcion__evento=evento
+        ).order_by().values_list('inscripcion_id', 'sesion')
+        for inscripcion_id, sesion in asistencias.iterator(chunk_size=2000):
+            registrados.setdefault(sesion, set()).add(inscripcion_id)
+
+        return cls(evento.pk, evento.numero_sesiones, participantes, registrados, version)
+
+    @property
+    def vencido(self):
+        return time.monotonic() >= self.vence
+
+
+def abrir_sesion(evento):
+    """Precarga (o recarga) el listado del evento al abrir una sesión"""
+    roster = RosterEvento.cargar(evento)
+    with _bloqueo_rosters:
+        _rosters[evento.pk] = roster
+    return roster
+
+
+def obtener_roster(evento_id):
+    """
+    Listado del evento desde la caché del proceso; lo carga si no existe,
+    venció o se invalidó desde cualquier proceso (invalidar_roster)
+    Lanza Evento.DoesNotExist si el evento no existe
+    """
+    roster = _rosters.get(evento_id)
+    if roster is not None and not roster.vencido and roster.version == version_roster(evento_id):
+        return roster
+
+    from eventos.models import Evento
+    return abrir_sesion(Evento.objects.only('pk', 'numero_sesiones').get(pk=evento_id))
+
+
+def version_roster(evento_id):
+    """Versión compartida (settings.CACHES) del listado de un evento"""
+    return versiones(f'roster:{evento_id}')[0]
+
+
+def invalidar_roster(evento_id):
+    """
+    Descarta el listado del evento en todos los procesos
+    Se llama cuando una inscripción confirmada deja de estarlo o cambia de
+    código, y cuando se borra una asistencia
+    """
+    invalidar(f'roster:{evento_id}')
+    limpiar_cache_rosters(evento_id)
+
+
+def limpiar_cache_rosters(evento_id=None):
+    """Descarta los listados en memoria (todos o los de un evento)"""
+    with _bloqueo_rosters:
+        if evento_id is None:
+            _rosters.clear()
+        else:
+            _rosters.pop(evento_id, None)
+
+
+def normalizar_codigo(codigo):
+    """
+    Acepta el UUID o la URL codificada en el QR (…/asistencias/qr/<uuid>/)
+    Lanza ValueError si no contiene un código válido
+    """
+    if isinstance(codigo, uuid.UUID):
+        return codigo
+    valor = str(codigo or '').strip().rstrip('/').rsplit('/', 1)[-1]
+    try:
+        return uuid.UUID(valor)
+    except ValueError:
+        raise ValueError('Código QR no válido')
+
+
+def registrar_checkin(evento_id, sesion, codigo, ip_address=None, user_agent=''):
+    """
+    Registra la asistencia de un código QR a una sesión (HU-17)
+
+    Retorna un dict con 'estado': REGISTRADA, YA_REGISTRADA o NO_INSCRITO.
+    Un código presente en el listado cuesta una inserción (y el ajuste de
+    EstadisticaEvento en la misma transacción) sin lecturas; un código
+    desconocido se busca una vez por si la inscripción se confirmó después
+    de cargar el listado.
+    """
+    from eventos.models import EstadisticaEvento
+    from inscripciones.models import Inscripcion
+    from .models import Asistencia
+
+    codigo = normalizar_codigo(codigo)
+    roster = obtener_roster(evento_id)
+
+    if not 1 <= sesion <= roster.numero_sesiones:
+        raise ValueError(
+            f"La sesión {sesion} excede el número de sesiones del evento ({roster.numero_sesiones})"
+        )
+
+    participante = roster.participantes.get(codigo)
+    if participante is None:
+        participante = Inscripcion.objects.filter(
+            evento_id=evento_id,
+            estado='CONFIRMADA',
+            codigo_qr=codigo
+        ).values_list('pk', 'nombre', 'apellido').first()
+        if participante is None:
+            return {'estado': 'NO_INSCRITO', 'mensaje': 'Código QR no válido para este evento'}
+        participante = (participante[0], f'{participante[1]} {participante[2]}')
+        roster.participantes[codigo] = participante
+
+    inscripcion_id, nombre = participante
+    resultado = {'inscripcion': inscripcion_id, 'nombre': nombre, 'sesion': sesion}
+
+    with roster.bloqueo:
+        registrados = roster.registrados.setdefault(sesion, set())
+        if inscripcion_id in registrados:
+            return {'estado': 'YA_REGISTRADA', **resultado}
+        registrados.add(inscripcion_id)
+
+    try:
+        with transaction.atomic():
+            # INSERT que ignora el conflicto: otro lector pudo registrarla antes
+            insertadas = Asistencia.insertar_ignorando_duplicados([
+                Asistencia(
+                    inscripcion_id=inscripcion_id,
+                    sesion=sesion,
+                    metodo_registro='QR',
+                    ip_address=ip_address,
+                    user_agent=user_agent or '',
+                )
+            ])
+            if insertadas:
+                # La primera asistencia la decide el contador en la base, no
+                # el listado de este proceso (otros lectores registran también)
+                primera = Inscripcion.ajustar_asistencias(inscripcion_id, 1)
+                EstadisticaEvento.ajustar(
+                    evento_id,
+                    asistentes=1 if primera else 0,
+                    sesiones_asistidas=1,
+                )
+    except Exception:
+        # La caché no debe quedar marcando una asistencia que no se guardó
+        limpiar_cache_rosters(evento_id)
+        raise
+
+    if insertadas:
+        limpiar_verificaciones_evento(evento_id)
+    return {'estado': 'REGISTRADA' if insertadas else 'YA_REGISTRADA', **resultado}
+
+
+def anotar_asistencia(evento_id, inscripcion_id, sesion):
+    """Refleja en el listado en memoria una asistencia registrada por otra vía"""
+    roster = _rosters.get(evento_id)
+    if roster is None:
+        return
+    with roster.bloqueo:
+        roster.registrados.setdefault(sesion, set()).add(inscripcion_id)
+
+
+# Máximo de escaneos aceptados en una sincronización
+MAX_ESCANEOS_LOTE = 5000
+
+
+def _leer_escaneo(escaneo, numero_sesiones):
+    """
+    Valida un escaneo {'codigo', 'sesion', 'timestamp', 'dispositivo'}
+    Retorna (codigo, sesion, fecha, dispositivo) o lanza ValueError con el estado
+    """
+    from django.utils import timezone
+    from django.utils.dateparse import parse_datetime
+
+    if not isinstance(escaneo, dict):
+        raise ValueError('FORMATO_INVALIDO')
+    try:
+        codigo = normalizar_codigo(escaneo.get('codigo'))
+    except ValueError:
+        raise ValueError('CODIGO_INVALIDO')
+    try:
+        sesion = int(escaneo.get('sesion'))
+    except (TypeError, ValueError):
+        raise ValueError('SESION_INVALIDA')
+    if not 1 <= sesion <= numero_sesiones:
+        raise ValueError('SESION_INVALIDA')
+
+    fecha = timezone.now()
+    if escaneo.get('timestamp'):
+        try:
+            fecha = parse_datetime(str(escaneo['timestamp']))
+        except ValueError:
+            fecha = None
+        if fecha is None:
+            raise ValueError('FECHA_INVALIDA')
+        if timezone.is_naive(fecha):
+            fecha = timezone.make_aware(fecha)
+
+    return codigo, sesion, fecha, str(escaneo.get('dispositivo') or '')[:200]
+
+
+def sincronizar_escaneos(evento, escaneos):
+    """
+    Registra en bloque los escaneos acumulados sin conexión por un lector (HU-17)
+
+    Todos los códigos se resuelven con una consulta IN, las asistencias
+    previas con otra y las nuevas se insertan en un único INSERT que ignora
+    los conflictos (inscripcion, sesion). La fecha de registro es la del
+    escaneo en el dispositivo. Retorna un resultado por escaneo, en el orden
+    recibido, con 'estado': REGISTRADA, YA_REGISTRADA, DUPLICADO, NO_INSCRITO,
+    NO_CONFIRMADA, CODIGO_INVALIDO, SESION_INVALIDA, FECHA_INVALIDA o
+    FORMATO_INVALIDO.
+    """
+    from eventos.models import EstadisticaEvento
+    from inscripciones.models import Inscripcion
+    from .models import Asistencia
+
+    if len(escaneos) > MAX_ESCANEOS_LOTE:
+        raise ValueError(f'Se aceptan como máximo {MAX_ESCANEOS_LOTE} escaneos por sincronización')
+
+    resultados = []
+    validos = []
+    for indice, escaneo in enumerate(escaneos):
+        resultado = {'indice': indice}
+        resultados.append(resultado)
+        try:
+            validos.append((resultado, *_leer_escaneo(escaneo, evento.numero_sesiones)))
+        except ValueError as e:
+            resultado['estado'] = str(e)
+
+    inscripciones = {
+        codigo: (inscripcion_id, estado)
+        for inscripcion_id, codigo, estado in Inscripcion.objects.filter(
+            evento=evento,
+            codigo_qr__in={codigo for _, codigo, _, _, _ in validos}
+        ).values_list('pk', 'codigo_qr', 'estado')
+    } if validos else {}
+
+    existentes = set()
+    con_asistencia = set()
+    ids = {inscripcion_id for inscripcion_id, estado in inscripciones.values() if estado == 'CONFIRMADA'}
+    if ids:
+        for inscripcion_id, sesion in Asistencia.objects.filter(
+            inscripcion_id__in=ids
+        ).order_by().values_list('inscripcion_id', 'sesion'):
+            existentes.add((inscripcion_id, sesion))
+            con_asistencia.add(inscripcion_id)
+
+    # Escaneos repetidos en el lote: se conserva el más antiguo
+    nuevas = {}
+    for resultado, codigo, sesion, fecha, dispositivo in sorted(validos, key=lambda v: v[3]):
+        if codigo not in inscripciones:
+            resultado['estado'] = 'NO_INSCRITO'
+            continue
+        inscripcion_id, estado = inscripciones[codigo]
+        resultado.update({'inscripcion': inscripcion_id, 'sesion': sesion})
+        if estado != 'CONFIRMADA':
+            resultado['estado'] = 'NO_CONFIRMADA'
+        elif (inscripcion_id, sesion) in existentes:
+            resultado['estado'] = 'YA_REGISTRADA'
+        elif (inscripcion_id, sesion) in nuevas:
+            resultado['estado'] = 'DUPLICADO'
+        else:
+            resultado['estado'] = 'REGISTRADA'
+            nuevas[(inscripcion_id, sesion)] = Asistencia(
+                inscripcion_id=inscripcion_id,
+                sesion=sesion,
+                fecha_registro=fecha,
+                metodo_registro='QR',
+                user_agent=dispositivo,
+            )
+
+    if nuevas:
+        asistentes_nuevos = {inscripcion_id for inscripcion_id, _ in nuevas} - con_asistencia
+        with transaction.atomic():
+            insertadas = Asistencia.insertar_ignorando_duplicados(list(nuevas.values()))
+            Inscripcion.recalcular_asistencias({inscripcion_id for inscripcion_id, _ in nuevas})
+            EstadisticaEvento.ajustar(
+                evento.pk,
+                asistentes=len(asistentes_nuevos),
+                sesiones_asistidas=insertadas,
+            )
+        for inscripcion_id, sesion in nuevas:
+            anotar_asistencia(evento.pk, inscripcion_id, sesion)
+        if insertadas:
+            limpiar_verificaciones_evento(evento.pk)
+
+    return resultados
+
+
+# Filas por bloque enviado en la descarga del listado
+FILAS_POR_BLOQUE = 500
+
+
+def version_listado(evento_id):
+    """
+    Versión del listado del evento: '<última modificación en µs>.<inscripciones>'
+    Retorna (version, total) con una única consulta agregada
+    """
+    from django.db.models import Count, Max
+    from inscripciones.models import Inscripcion
+
+    datos = Inscripcion.objects.filter(evento_id=evento_id).aggregate(
+        ultima=Max('fecha_modificacion'),
+        total=Count('pk')
+    )
+    marca = round(datos['ultima'].timestamp() * 1_000_000) if datos['ultima'] else 0
+    return f"{marca}.{datos['total']}", datos['total']
+
+
+def fecha_de_version(version):
+    """Fecha de la última modificación codificada en una versión; ValueError si no es válida"""
+    marca = int(str(version).split('.', 1)[0])
+    return datetime.fromtimestamp(marca / 1_000_000, tz=dt_timezone.utc)
+
+
+def firmar(contenido):
+    """HMAC-SHA256 con CHECKIN_CLAVE_FIRMA, el mismo cálculo que hace el kiosco"""
+    return hmac.new(settings.CHECKIN_CLAVE_FIRMA.encode(), contenido, hashlib.sha256)
+
+
+def lineas_listado(evento_id, version, total, desde=None):
+    """
+    Genera el listado del evento para kioscos sin conexión, en JSON por líneas:
+
+        {"evento": 1, "version": "...", "desde": null, "total": 120}
+        ["<codigo_qr hex>", "Nombre Apellido", "CONFIRMADA"]
+        ...
+        {"firma": "<hmac-sha256 hex de todas las líneas anteriores>"}
+
+    Con `desde` (una versión anterior) solo incluye las inscripciones
+    modificadas desde entonces; si tras aplicarlo el kiosco no suma `total`
+    inscripciones (hubo borrados) debe descargar el listado completo.
+    Las filas salen de una sola consulta values_list recorrida con .iterator().
+    """
+    from inscripciones.models import Inscripcion
+
+    filas = Inscripcion.objects.filter(evento_id=evento_id)
+    if desde is not None:
+        filas = filas.filter(fecha_modificacion__gte=fecha_de_version(desde))
+    filas = filas.order_by().values_list('codigo_qr', 'nombre', 'apellido', 'estado')
+
+    firma = firmar(b'')
+    cabecera = json.dumps({'evento': evento_id, 'version': version, 'desde': desde, 'total': total})
+    bloque = [cabecera + '\n']
+
+    for codigo, nombre, apellido, estado in filas.iterator(chunk_size=2000):
+        bloque.append(json.dumps(
+            [codigo.hex, f'{nombre} {apellido}', estado],
+            ensure_ascii=False,
+            separators=(',', ':')
+        ) + '\n')
+        if len(bloque) >= FILAS_POR_BLOQUE:
+            contenido = ''.join(bloque).encode('utf-8')
+            firma.update(contenido)
+            yield contenido
+            bloque = []
+
+    contenido = ''.join(bloque).encode('utf-8')
+    firma.update(contenido)
+    yield contenido
+    yield (json.dumps({'firma': firma.hexdigest()}) + '\n').encode('utf-8')
@@ -7,10 +7,15 @@ HU-17: Escaneo de Código QR
 HU-18: Cálculo de Porcentaje de Participación
 """
 
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.utils import timezone
+from eventos.models import EstadisticaEvento
 from inscripciones.models import Inscripcion
 from usuarios.models import Usuario
+from certificados.verificacion import limpiar_verificaciones_evento
+from .checkin import abrir_sesion, anotar_asistencia, invalidar_roster
 
 
 class Asistencia(models.Model):
@@ -90,7 +95,72 @@ class Asistencia(models.Model):
                 f"La sesión {self.sesion} excede el número de sesiones del evento "
                 f"({self.inscripcion.evento.numero_sesiones})"
             )
-        super().save(*args, **kwargs)
+        
+        if not self._state.adding:
+            super().save(*args, **kwargs)
+            return
+        
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            primera = Inscripcion.ajustar_asistencias(self.inscripcion_id, 1)
+            EstadisticaEvento.ajustar(
+                self.inscripcion.evento_id,
+                asistentes=1 if primera else 0,
+                sesiones_asistidas=1,
+            )
+        self.inscripcion.asistencias_count += 1
+        anotar_asistencia(self.inscripcion.evento_id, self.inscripcion_id, self.sesion)
+        limpiar_verificaciones_evento(self.inscripcion.evento_id)
+    
+    def delete(self, *args, **kwargs):
+        """Override delete para descontar la asistencia de las estadísticas del evento"""
+        with transaction.atomic():
+            resultado = super().delete(*args, **kwargs)
+            ultima = not Asistencia.objects.filter(inscripcion_id=self.inscripcion_id).exists()
+            Inscripcion.ajustar_asistencias(self.inscripcion_id, -1)
+            EstadisticaEvento.ajustar(
+                self.inscripcion.evento_id,
+                asistentes=-1 if ultima else 0,
+                sesiones_asistidas=-1,
+            )
+        self.inscripcion.asistencias_count = max(0, self.inscripcion.asistencias_count - 1)
+        # Los listados de otros procesos la siguen contando como registrada
+        invalidar_roster(self.inscripcion.evento_id)
+        limpiar_verificaciones_evento(self.inscripcion.evento_id)
+        return resultado
+    
+    @classmethod
+    def insertar_ignorando_duplicados(cls, asistencias):
+        """
+        Inserta las asistencias ignorando las que ya existen para (inscripcion, sesion)
+        
+        Es el mismo INSERT ... ON CONFLICT DO NOTHING / INSERT OR IGNORE que
+        bulk_create(ignore_conflicts=True), pero retorna cuántas filas se
+        insertaron realmente (rowcount), para mantener exactas las estadísticas.
+        No valida sesiones ni ajusta EstadisticaEvento ni Inscripcion.asistencias_count:
+        eso queda a cargo de quien llama.
+        """
+        from django.db import connections, router
+        from django.db.models.constants import OnConflict
+        from django.db.models.sql import InsertQuery
+        
+        if not asistencias:
+            return 0
+        
+        using = router.db_for_write(cls)
+        connection = connections[using]
+        campos = [campo for campo in cls._meta.concrete_fields if not campo.primary_key]
+        tamano_lote = connection.ops.bulk_batch_size(campos, asistencias) or len(asistencias)
+        
+        insertadas = 0
+        with connection.cursor() as cursor:
+            for inicio in range(0, len(asistencias), tamano_lote):
+                query = InsertQuery(cls, on_conflict=OnConflict.IGNORE)
+                query.insert_values(campos, asistencias[inicio:inicio + tamano_lote])
+                for sql, params in query.get_compiler(using=using).as_sql():
+                    cursor.execute(sql, params)
+                    insertadas += max(cursor.rowcount, 0)
+        return insertadas
     
     @classmethod
     def registrar_manual(cls, inscripcion, sesion, usuario):
@@ -132,12 +202,216 @@ class Asistencia(models.Model):
         )
         return asistencia
     
+    @classmethod
+    def marcar_sesion(cls, evento, sesion, inscripcion_ids, usuario=None, alcance=None):
+        """
+        Aplica la lista de asistentes de una sesión como un diff (HU-16)
+
+        `inscripcion_ids` son los inscritos confirmados que asistieron: los que
+        faltan se insertan en un único INSERT y los que ya no están se borran
+        en un único DELETE. La sesión se valida una sola vez para todo el lote.
+        Con `alcance` (los ids mostrados, p. ej. una página del listado) el diff
+        se limita a esas inscripciones y no toca las demás.
+        Retorna {'marcadas', 'desmarcadas', 'ignoradas'}; 'ignoradas' son los
+        ids que no corresponden a inscritos confirmados del evento.
+        """
+        if not 1 <= sesion <= evento.numero_sesiones:
+            raise ValueError(
+                f"La sesión {sesion} excede el número de sesiones del evento "
+                f"({evento.numero_sesiones})"
+            )
+
+        solicitados = set(inscripcion_ids)
+
+        # Presentes en la sesión con su total de asistencias, para saber quién
+        # deja de tener alguna al desmarcarlo
+        presentes = cls.objects.filter(
+            inscripcion__evento=evento,
+            inscripcion__estado='CONFIRMADA',
+            sesion=sesion
+        )
+        if alcance is not None:
+            presentes = presentes.filter(inscripcion_id__in=set(alcance) | solicitados)
+        presentes = dict(presentes.order_by().values_list('inscripcion_id', 'inscripcion__asistencias_count'))
+
+        # Solicitados que son inscritos confirmados, con su total de asistencias
+        confirmados = dict(
+            Inscripcion.objects.filter(
+                evento=evento,
+                estado='CONFIRMADA',
+                pk__in=solicitados
+            ).order_by().values_list('pk', 'asistencias_count')
+        ) if solicitados else {}
+
+        marcar = confirmados.keys() - presentes.keys()
+        desmarcar = presentes.keys() - solicitados
+
+        asistentes = (
+            sum(1 for inscripcion_id in marcar if not confirmados[inscripcion_id])
+            - sum(1 for inscripcion_id in desmarcar if presentes[inscripcion_id] == 1)
+        )
+
+        marcadas = desmarcadas = 0
+        with transaction.atomic():
+            if marcar:
+                marcadas = cls.insertar_ignorando_duplicados([
+                    cls(
+                        inscripcion_id=inscripcion_id,
+                        sesion=sesion,
+                        metodo_registro='MANUAL',
+                        registrado_por=usuario
+                    )
+                    for inscripcion_id in sorted(marcar)
+                ])
+            if desmarcar:
+                desmarcadas, _ = cls.objects.filter(
+                    inscripcion_id__in=desmarcar,
+                    sesion=sesion
+                ).delete()
+            if marcadas or desmarcadas:
+                Inscripcion.recalcular_asistencias(marcar | desmarcar)
+                EstadisticaEvento.ajustar(
+                    evento.pk,
+                    asistentes=asistentes,
+                    sesiones_asistidas=marcadas - desmarcadas,
+                )
+
+        if desmarcadas:
+            invalidar_roster(evento.pk)
+        else:
+            for inscripcion_id in marcar:
+                anotar_asistencia(evento.pk, inscripcion_id, sesion)
+        if marcadas or desmarcadas:
+            limpiar_verificaciones_evento(evento.pk)
+
+        return {
+            'marcadas': marcadas,
+            'desmarcadas': desmarcadas,
+            'ignoradas': sorted(solicitados - confirmados.keys()),
+        }
+
+    # Filtros del listado de asistencia de un evento
+    FILTROS_LISTADO = {
+        'elegibles': 'Cumplen para certificado',
+        'no_elegibles': 'No cumplen aún',
+        'con_certificado': 'Con certificado',
+        'sin_certificado': 'Sin certificado',
+    }
+
+    @classmethod
+    def listado_evento(cls, evento, buscar='', filtro=''):
+        """
+        Inscritos confirmados del evento para el listado de asistencia (HU-16, HU-18)
+        La búsqueda y los filtros se resuelven en la base de datos (la
+        elegibilidad compara asistencias_count), para paginar eventos con
+        miles de participantes.
+        """
+        from django.db.models import Q
+
+        inscripciones = Inscripcion.objects.filter(
+            evento=evento,
+            estado='CONFIRMADA'
+        ).select_related('certificado').order_by('apellido', 'nombre', 'pk')
+
+        if buscar:
+            inscripciones = inscripciones.filter(
+                Q(nombre__icontains=buscar) |
+                Q(apellido__icontains=buscar) |
+                Q(documento__icontains=buscar) |
+                Q(correo__icontains=buscar)
+            )
+
+        if filtro == 'elegibles':
+            inscripciones = inscripciones.elegibles_certificado()
+        elif filtro == 'no_elegibles':
+            inscripciones = inscripciones.exclude(
+                pk__in=Inscripcion.objects.filter(evento=evento).elegibles_certificado().values('pk')
+            )
+        elif filtro == 'con_certificado':
+            inscripciones = inscripciones.filter(certificado__isnull=False)
+        elif filtro == 'sin_certificado':
+            inscripciones = inscripciones.filter(certificado__isnull=True)
+        return inscripciones
+
+    @classmethod
+    def matriz_asistencia(cls, evento, inscripciones):
+        """
+        Filas participante x sesión del listado de asistencia (HU-16, HU-18)
+
+        `inscripciones` viene de listado_evento (una página): las sesiones de
+        todas salen de una sola consulta y el certificado de select_related,
+        así que la elegibilidad se calcula sin consultas por participante.
+        """
+        inscripciones = list(inscripciones)
+        sesiones = {inscripcion.pk: [] for inscripcion in inscripciones}
+        if sesiones:
+            for inscripcion_id, sesion in cls.objects.filter(
+                inscripcion_id__in=sesiones
+            ).order_by('sesion').values_list('inscripcion_id', 'sesion'):
+                sesiones[inscripcion_id].append(sesion)
+
+        filas = []
+        for inscripcion in inscripciones:
+            registradas = sesiones[inscripcion.pk]
+            porcentaje = (
+                len(registradas) / evento.numero_sesiones * 100
+                if evento.numero_sesiones else 0
+            )
+            elegible = (
+                evento.genera_certificado and
+                inscripcion.estado == 'CONFIRMADA' and
+                porcentaje >= evento.porcentaje_asistencia_minimo
+            )
+            filas.append({
+                'inscripcion': inscripcion,
+                'sesiones_registradas': registradas,
+                'asistencia': [
+                    sesion in registradas for sesion in range(1, evento.numero_sesiones + 1)
+                ],
+                'sesiones_disponibles': [
+                    sesion for sesion in range(1, evento.numero_sesiones + 1) if sesion not in registradas
+                ],
+                'todas_registradas': len(registradas) >= evento.numero_sesiones,
+                'total_asistencias': len(registradas),
+                'porcentaje_asistencia': porcentaje,
+                'certificado': getattr(inscripcion, 'certificado', None),
+                'puede_generar_certificado': elegible,
+            })
+        return filas
+
+    @classmethod
+    def estadisticas_sesiones(cls, evento):
+        """
+        Asistencias y porcentaje de cada sesión del evento (HU-18)
+        Todas las sesiones salen de un único GROUP BY sesion; los inscritos
+        confirmados se leen del contador del evento.
+        """
+        conteos = dict(
+            cls.objects.filter(
+                inscripcion__evento=evento
+            ).order_by().values('sesion').annotate(
+                total=Count('pk')
+            ).values_list('sesion', 'total')
+        )
+        
+        total_inscritos = evento.inscritos_confirmados
+        estadisticas = []
+        for sesion in range(1, evento.numero_sesiones + 1):
+            asistencias_sesion = conteos.get(sesion, 0)
+            estadisticas.append({
+                'sesion': sesion,
+                'asistencias': asistencias_sesion,
+                'porcentaje': (asistencias_sesion / total_inscritos * 100) if total_inscritos > 0 else 0
+            })
+        return estadisticas
+    
     @classmethod
     def obtener_estadisticas_evento(cls, evento):
         """
         Obtiene estadísticas de asistencia para un evento
+        Dos consultas sin importar el número de sesiones
         """
-        total_inscritos = evento.inscripciones.filter(estado='CONFIRMADA').count()
+        total_inscritos = evento.inscritos_confirmados
         
         if total_inscritos == 0:
             return {
@@ -147,32 +421,43 @@ class Asistencia(models.Model):
                 'por_sesion': []
             }
         
-        inscripciones_con_asistencia = evento.inscripciones.filter(
-            estado='CONFIRMADA',
-            asistencias__isnull=False
-        ).distinct().count()
-        
-        # Estadísticas por sesión
-        estadisticas_sesiones = []
-        for sesion in range(1, evento.numero_sesiones + 1):
-            asistencias_sesion = cls.objects.filter(
-                inscripcion__evento=evento,
-                sesion=sesion
-            ).count()
-            estadisticas_sesiones.append({
-                'sesion': sesion,
-                'asistencias': asistencias_sesion,
-                'porcentaje': (asistencias_sesion / total_inscritos * 100) if total_inscritos > 0 else 0
-            })
+        inscripciones_con_asistencia = cls.objects.filter(
+            inscripcion__evento=evento,
+            inscripcion__estado='CONFIRMADA'
+        ).aggregate(
+            total=Count('inscripcion', distinct=True)
+        )['total']
         
         return {
             'total_inscritos': total_inscritos,
             'total_con_asistencia': inscripciones_con_asistencia,
             'porcentaje_asistencia': (inscripciones_con_asistencia / total_inscritos * 100),
-            'por_sesion': estadisticas_sesiones
+            'por_sesion': cls.estadisticas_sesiones(evento)
         }
 
 
+class ControlAsistenciaQuerySet(models.QuerySet):
+    """
+    QuerySet de controles de asistencia con sus totales anotados
+    """
+    
+    def con_estadisticas(self):
+        """
+        Anota los asistentes de cada sesión con una subconsulta correlacionada
+        y trae el evento (contador de confirmados) en la misma consulta
+        """
+        asistentes = Asistencia.objects.filter(
+            inscripcion__evento=OuterRef('evento'),
+            sesion=OuterRef('sesion')
+        ).order_by().values('sesion').annotate(
+            total=Count('pk')
+        ).values('total')
+        
+        return self.select_related('evento').annotate(
+            asistentes_sesion=Coalesce(Subquery(asistentes), 0)
+        )
+
+
 class ControlAsistencia(models.Model):
     """
     Modelo para sesiones de control de asistencia
@@ -203,6 +488,8 @@ class ControlAsistencia(models.Model):
     )
     fecha_creacion = models.DateTimeField(default=timezone.now)
     
+    objects = ControlAsistenciaQuerySet.as_manager()
+    
     class Meta:
         verbose_name = 'Control de Asistencia'
         verbose_name_plural = 'Controles de Asistencia'
@@ -212,22 +499,31 @@ class ControlAsistencia(models.Model):
     def __str__(self):
         return f"{self.evento.nombre} - Sesión {self.sesion}"
     
+    def save(self, *args, **kwargs):
+        """Al abrir la sesión se precarga el listado para el check-in por QR (HU-17)"""
+        super().save(*args, **kwargs)
+        if self.activo:
+            abrir_sesion(self.evento)
+    
     @property
     def total_asistentes(self):
         """Total de asistentes registrados en esta sesión"""
+        if hasattr(self, 'asistentes_sesion'):
+            return self.asistentes_sesion
         return Asistencia.objects.filter(
-            inscripcion__evento=self.evento,
+            inscripcion__evento_id=self.evento_id,
             sesion=self.sesion
         ).count()
     
     @property
     def total_inscritos(self):
-        """Total de inscritos al evento"""
-        return self.evento.inscripciones.filter(estado='CONFIRMADA').count()
+        """Total de inscritos confirmados al evento"""
+        return self.evento.inscritos_confirmados
     
     @property
     def porcentaje_asistencia(self):
         """Porcentaje de asistencia de la sesión"""
-        if self.total_inscritos == 0:
+        total_inscritos = self.total_inscritos
+        if total_inscritos == 0:
             return 0
-        return (self.total_asistentes / self.total_inscritos) * 100
+        return (self.total_asistentes / total_inscritos) * 100
@@ -1,3 +1,683 @@
-from django.test import TestCase
+"""
+Tests para la aplicación de Asistencias
+HU-16: Registro de Asistencia Manual
+HU-18: Cálculo de Porcentaje de Participación
+"""
 
-# Create your tests here.
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from datetime import timedelta
+from decimal import Decimal
+
+from eventos.models import Evento, TipoEvento
+from inscripciones.models import Inscripcion
+from asistencias.models import Asistencia, ControlAsistencia
+from usuarios.models import Usuario
+
+
+class AsistenciaBaseTest(TestCase):
+    """Datos comunes: un evento de 6 sesiones con 4 confirmados y 4 asistencias"""
+
+    def setUp(self):
+        self.client = Client()
+        self.tipo_evento = TipoEvento.objects.create(nombre='ACADEMICO')
+        self.admin = Usuario.objects.create_user(
+            username='admin_asistencias',
+            email='admin_asistencias@test.com',
+            password='testpass123',
+            rol='ADMINISTRADOR',
+            documento='6660001',
+            is_staff=True,
+            is_superuser=True
+        )
+        self.evento = Evento.objects.create(
+            nombre='Curso de Asistencias',
+            descripcion='Curso',
+            tipo_evento=self.tipo_evento,
+            fecha_inicio=timezone.now() + timedelta(days=3),
+            fecha_fin=timezone.now() + timedelta(days=4),
+            lugar='Sala 1',
+            cupo_maximo=100,
+            costo=Decimal('0.00'),
+            estado='PUBLICADO',
+            numero_sesiones=6,
+            creado_por=self.admin
+        )
+        self.inscripciones = [
+            Inscripcion.objects.create(
+                evento=self.evento,
+                nombre='Participante',
+                apellido=f'{numero:04d}',
+                documento=f'{9100000 + numero}',
+                correo=f'asis{numero}@test.com',
+                telefono='3001234567'
+            )
+            for numero in range(4)
+        ]
+        # Sesión 1: 3 asistentes, sesión 2: 1 asistente, el resto vacías
+        for inscripcion in self.inscripciones[:3]:
+            Asistencia.objects.create(inscripcion=inscripcion, sesion=1)
+        Asistencia.objects.create(inscripcion=self.inscripciones[0], sesion=2)
+        self.evento.refresh_from_db()
+
+
+class EstadisticasSesionesTest(AsistenciaBaseTest):
+    """
+    Tests para las estadísticas por sesión (HU-18)
+    El número de consultas no depende de las sesiones ni de los controles
+    """
+
+    def test_estadisticas_en_dos_consultas(self):
+        """Todas las sesiones salen de un único GROUP BY"""
+        with self.assertNumQueries(2):
+            estadisticas = Asistencia.obtener_estadisticas_evento(self.evento)
+
+        self.assertEqual(estadisticas['total_inscritos'], 4)
+        self.assertEqual(estadisticas['total_con_asistencia'], 3)
+        self.assertEqual(
+            [(s['sesion'], s['asistencias'], s['porcentaje']) for s in estadisticas['por_sesion'][:3]],
+            [(1, 3, 75.0), (2, 1, 25.0), (3, 0, 0)]
+        )
+        self.assertEqual(len(estadisticas['por_sesion']), 6)
+
+    def test_control_asistencia_anotado(self):
+        """con_estadisticas evita una consulta por propiedad"""
+        ControlAsistencia.objects.create(evento=self.evento, sesion=1, fecha_sesion=timezone.now())
+
+        with self.assertNumQueries(1):
+            control = ControlAsistencia.objects.con_estadisticas().get()
+            self.assertEqual(control.total_asistentes, 3)
+            self.assertEqual(control.total_inscritos, 4)
+            self.assertEqual(control.porcentaje_asistencia, 75.0)
+
+    def test_changelist_admin_en_consultas_constantes(self):
+        """El listado del admin cuesta lo mismo con 1 o con 6 controles"""
+        self.client.login(username='admin_asistencias', password='testpass123')
+        url = reverse('admin:asistencias_controlasistencia_changelist')
+        ControlAsistencia.objects.create(evento=self.evento, sesion=1, fecha_sesion=timezone.now())
+        # La primera página guarda el token CSRF en la sesión
+        self.client.get(url)
+
+        with CaptureQueriesContext(connection) as consultas:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        esperado = len(consultas)
+
+        for sesion in range(2, 7):
+            ControlAsistencia.objects.create(evento=self.evento, sesion=sesion, fecha_sesion=timezone.now())
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get(url)
+        self.assertEqual(len(consultas), esperado)
+        self.assertContains(response, '75,0')
+
+
+class CheckinQRTest(AsistenciaBaseTest):
+    """
+    Tests para el check-in por QR con listado en memoria (HU-17)
+    """
+
+    def setUp(self):
+        from asistencias.checkin import limpiar_cache_rosters
+        limpiar_cache_rosters()
+        super().setUp()
+        self.addCleanup(limpiar_cache_rosters)
+        # Abrir la sesión 3 precarga el listado del evento
+        ControlAsistencia.objects.create(evento=self.evento, sesion=3, fecha_sesion=timezone.now())
+        self.inscripciones[0].refresh_from_db()
+
+    def _estadistica(self):
+        from eventos.models import EstadisticaEvento
+        return EstadisticaEvento.objects.get(evento=self.evento)
+
+    def test_escaneo_sin_lecturas(self):
+        """Un código del listado se registra sin ninguna consulta SELECT"""
+        from asistencias.checkin import registrar_checkin
+
+        with CaptureQueriesContext(connection) as consultas:
+            resultado = registrar_checkin(self.evento.pk, 3, self.inscripciones[3].codigo_qr)
+
+        self.assertEqual(resultado['estado'], 'REGISTRADA')
+        self.assertEqual(resultado['nombre'], 'Participante 0003')
+        self.assertFalse([q for q in consultas if q['sql'].lstrip().upper().startswith('SELECT')])
+        self.assertTrue(Asistencia.objects.filter(inscripcion=self.inscripciones[3], sesion=3).exists())
+        estadistica = self._estadistica()
+        self.assertEqual((estadistica.asistentes, estadistica.sesiones_asistidas), (4, 5))
+
+        with self.assertNumQueries(0):
+            resultado = registrar_checkin(self.evento.pk, 3, self.inscripciones[3].codigo_qr)
+        self.assertEqual(resultado['estado'], 'YA_REGISTRADA')
+
+    def test_duplicado_de_otro_lector_no_altera_estadisticas(self):
+        """Si otro proceso ya insertó la fila, el INSERT se ignora"""
+        from asistencias.checkin import obtener_roster, registrar_checkin
+
+        Asistencia.objects.create(inscripcion=self.inscripciones[1], sesion=3)
+        # Simular el listado de otro proceso que no vio esa asistencia
+        obtener_roster(self.evento.pk).registrados[3].discard(self.inscripciones[1].pk)
+
+        resultado = registrar_checkin(self.evento.pk, 3, self.inscripciones[1].codigo_qr)
+
+        self.assertEqual(resultado['estado'], 'YA_REGISTRADA')
+        self.assertEqual(self._estadistica().sesiones_asistidas, 5)
+
+    def test_cancelar_invalida_el_listado(self):
+        """Una inscripción cancelada deja de registrar asistencia de inmediato"""
+        from asistencias.checkin import obtener_roster, registrar_checkin
+
+        inscripcion = self.inscripciones[3]
+        roster = obtener_roster(self.evento.pk)
+        self.assertIn(inscripcion.codigo_qr, roster.participantes)
+
+        inscripcion.cancelar()
+
+        resultado = registrar_checkin(self.evento.pk, 3, inscripcion.codigo_qr)
+        self.assertEqual(resultado['estado'], 'NO_INSCRITO')
+        self.assertIsNot(obtener_roster(self.evento.pk), roster)
+
+    def test_listado_invalidado_desde_otro_proceso(self):
+        """El listado se recarga cuando cambia su versión en la caché compartida"""
+        from asistencias.checkin import obtener_roster
+        from registro_control_eventos.cache_publico import invalidar
+
+        roster = obtener_roster(self.evento.pk)
+        self.assertIs(obtener_roster(self.evento.pk), roster)
+        invalidar(f'roster:{self.evento.pk}')
+        self.assertIsNot(obtener_roster(self.evento.pk), roster)
+
+    def test_desmarcar_cambia_la_version_del_listado(self):
+        """Borrar una asistencia invalida el listado de los demás procesos"""
+        from asistencias.checkin import registrar_checkin, version_roster
+
+        inscripcion = self.inscripciones[3]
+        registrar_checkin(self.evento.pk, 3, inscripcion.codigo_qr)
+
+        version = version_roster(self.evento.pk)
+        Asistencia.marcar_sesion(self.evento, 3, [])
+        self.assertNotEqual(version_roster(self.evento.pk), version)
+
+        version = version_roster(self.evento.pk)
+        Asistencia.objects.get(inscripcion=self.inscripciones[0], sesion=1).delete()
+        self.assertNotEqual(version_roster(self.evento.pk), version)
+
+        # Un nuevo escaneo de la sesión desmarcada vuelve a registrarse
+        resultado = registrar_checkin(self.evento.pk, 3, inscripcion.codigo_qr)
+        self.assertEqual(resultado['estado'], 'REGISTRADA')
+
+    def test_primera_asistencia_segun_la_base(self):
+        """Escaneos en lectores distintos cuentan una sola vez al asistente"""
+        from asistencias.checkin import obtener_roster, registrar_checkin
+        from eventos.models import EstadisticaEvento
+
+        inscripcion = self.inscripciones[3]
+        obtener_roster(self.evento.pk)
+        # Otro proceso registra la sesión 1 sin que este listado lo sepa
+        Asistencia.insertar_ignorando_duplicados([Asistencia(inscripcion=inscripcion, sesion=1)])
+        Inscripcion.ajustar_asistencias(inscripcion.pk, 1)
+        EstadisticaEvento.ajustar(self.evento.pk, asistentes=1, sesiones_asistidas=1)
+        asistentes = self._estadistica().asistentes
+
+        resultado = registrar_checkin(self.evento.pk, 3, inscripcion.codigo_qr)
+
+        self.assertEqual(resultado['estado'], 'REGISTRADA')
+        self.assertEqual(self._estadistica().asistentes, asistentes)
+
+    def test_endpoint_json(self):
+        """El endpoint acepta la URL del QR y responde en JSON"""
+        self.client.login(username='admin_asistencias', password='testpass123')
+        url = reverse('asistencias:checkin_qr', args=[self.evento.pk, 3])
+        inscripcion = self.inscripciones[2]
+
+        response = self.client.post(url, {'codigo': f'https://prce.test{inscripcion.generar_url_qr()}'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['estado'], 'REGISTRADA')
+
+        response = self.client.post(
+            url, {'codigo': str(inscripcion.codigo_qr)}, content_type='application/json'
+        )
+        self.assertEqual(response.json()['estado'], 'YA_REGISTRADA')
+
+        import uuid
+        response = self.client.post(url, {'codigo': str(uuid.uuid4())})
+        self.assertEqual(response.status_code, 404)
+
+        response = self.client.post(url, {'codigo': 'no-es-un-qr'})
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.post(
+            reverse('asistencias:checkin_qr', args=[self.evento.pk, 7]),
+            {'codigo': str(inscripcion.codigo_qr)}
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+class SincronizacionEscaneosTest(AsistenciaBaseTest):
+    """
+    Tests para la sincronización en bloque de escaneos sin conexión (HU-17)
+    """
+
+    def _escaneo(self, inscripcion, sesion, minutos=0, codigo=None):
+        return {
+            'codigo': codigo or str(inscripcion.codigo_qr),
+            'sesion': sesion,
+            'timestamp': (timezone.now() - timedelta(minutes=minutos)).isoformat(),
+            'dispositivo': 'puerta-1',
+        }
+
+    def test_resultados_por_escaneo(self):
+        """Cada escaneo recibe su estado en el orden enviado"""
+        from asistencias.checkin import sincronizar_escaneos
+        import uuid
+
+        Inscripcion.objects.filter(pk=self.inscripciones[2].pk).update(estado='CANCELADA')
+        escaneos = [
+            self._escaneo(self.inscripciones[3], 3, minutos=5),
+            self._escaneo(self.inscripciones[3], 3, minutos=1),
+            self._escaneo(self.inscripciones[0], 1),
+            self._escaneo(self.inscripciones[2], 3),
+            self._escaneo(self.inscripciones[1], 3, codigo=str(uuid.uuid4())),
+            self._escaneo(self.inscripciones[1], 3, codigo='basura'),
+            self._escaneo(self.inscripciones[1], 9),
+            self._escaneo(self.inscripciones[1], 4),
+        ]
+
+        resultados = sincronizar_escaneos(self.evento, escaneos)
+
+        self.assertEqual([r['estado'] for r in resultados], [
+            'REGISTRADA', 'DUPLICADO', 'YA_REGISTRADA', 'NO_CONFIRMADA',
+            'NO_INSCRITO', 'CODIGO_INVALIDO', 'SESION_INVALIDA', 'REGISTRADA',
+        ])
+        asistencia = Asistencia.objects.get(inscripcion=self.inscripciones[3], sesion=3)
+        self.assertEqual(asistencia.user_agent, 'puerta-1')
+        self.assertLess(asistencia.fecha_registro, timezone.now() - timedelta(minutes=4))
+
+        from eventos.models import EstadisticaEvento
+        estadistica = EstadisticaEvento.objects.get(evento=self.evento)
+        self.assertEqual((estadistica.asistentes, estadistica.sesiones_asistidas), (4, 6))
+
+    def test_consultas_constantes(self):
+        """El costo no depende del número de escaneos del lote"""
+        self.client.login(username='admin_asistencias', password='testpass123')
+        url = reverse('asistencias:sincronizar_escaneos', args=[self.evento.pk])
+
+        def sincronizar(sesiones):
+            escaneos = [
+                self._escaneo(inscripcion, sesion)
+                for sesion in sesiones for inscripcion in self.inscripciones
+            ]
+            with CaptureQueriesContext(connection) as consultas:
+                response = self.client.post(url, {'escaneos': escaneos}, content_type='application/json')
+            self.assertEqual(response.status_code, 200)
+            return len(consultas), response.json()
+
+        consultas_iniciales, datos = sincronizar([3])
+        self.assertEqual(datos['registradas'], 4)
+
+        consultas, datos = sincronizar([4, 5, 6])
+        self.assertEqual(consultas, consultas_iniciales)
+        self.assertEqual(datos['registradas'], 12)
+        self.assertEqual(Asistencia.objects.filter(inscripcion__evento=self.evento).count(), 20)
+
+
+class ListadoSinConexionTest(AsistenciaBaseTest):
+    """
+    Tests para el listado firmado de check-in sin conexión (HU-17)
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.client.login(username='admin_asistencias', password='testpass123')
+        self.url = reverse('asistencias:descargar_listado', args=[self.evento.pk])
+
+    def _leer(self, response):
+        import json
+        from asistencias.checkin import firmar
+
+        contenido = b''.join(response.streaming_content)
+        cuerpo, ultima = contenido.rstrip(b'\n').rsplit(b'\n', 1)
+        self.assertEqual(json.loads(ultima)['firma'], firmar(cuerpo + b'\n').hexdigest())
+        lineas = [json.loads(linea) for linea in cuerpo.split(b'\n')]
+        return lineas[0], lineas[1:]
+
+    def test_listado_completo_firmado(self):
+        """El listado trae código, nombre y estado de cada inscripción"""
+        Inscripcion.objects.filter(pk=self.inscripciones[3].pk).update(estado='CANCELADA')
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        cabecera, filas = self._leer(response)
+        self.assertEqual(cabecera['version'], response['ETag'].strip('"'))
+        self.assertEqual(cabecera['total'], 4)
+        self.assertIn(
+            [self.inscripciones[3].codigo_qr.hex, 'Participante 0003', 'CANCELADA'], filas
+        )
+        self.assertEqual(len(filas), 4)
+
+    def test_clave_de_firma_no_es_secret_key(self):
+        """La clave que guardan los kioscos no es SECRET_KEY"""
+        from django.conf import settings
+
+        self.assertTrue(settings.CHECKIN_CLAVE_FIRMA)
+        self.assertNotEqual(settings.CHECKIN_CLAVE_FIRMA, settings.SECRET_KEY)
+        self.assertNotIn(settings.SECRET_KEY, settings.CHECKIN_CLAVE_FIRMA)
+
+    def test_etag_y_deltas(self):
+        """Con If-None-Match vigente responde 304; con ?desde solo los cambios"""
+        response = self.client.get(self.url)
+        b''.join(response.streaming_content)
+        etag = response['ETag']
+
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        inscripcion = self.inscripciones[1]
+        inscripcion.refresh_from_db()
+        inscripcion.cancelar()
+
+        response = self.client.get(self.url, {'desde': etag.strip('"')}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        cabecera, filas = self._leer(response)
+        # La fila en el borde de la versión se reenvía; las demás no cambian
+        self.assertIn([inscripcion.codigo_qr.hex, 'Participante 0001', 'CANCELADA'], filas)
+        codigos = {fila[0] for fila in filas}
+        self.assertNotIn(self.inscripciones[0].codigo_qr.hex, codigos)
+        self.assertNotIn(self.inscripciones[2].codigo_qr.hex, codigos)
+        self.assertEqual(cabecera['total'], 4)
+
+        self.assertEqual(self.client.get(self.url, {'desde': 'x'}).status_code, 400)
+
+    def test_consultas_constantes(self):
+        """El listado sale de una consulta sin importar el número de inscripciones"""
+        def descargar():
+            with CaptureQueriesContext(connection) as consultas:
+                b''.join(self.client.get(self.url).streaming_content)
+            return len(consultas)
+
+        esperado = descargar()
+        for numero in range(4, 10):
+            Inscripcion.objects.create(
+                evento=self.evento, nombre='Nuevo', apellido=f'{numero}',
+                documento=f'{9200000 + numero}', correo=f'nuevo{numero}@test.com', telefono='1'
+            )
+        self.assertEqual(descargar(), esperado)
+
+
+class MarcarSesionTest(AsistenciaBaseTest):
+    """
+    Tests para la toma de asistencia de una sesión en bloque (HU-16)
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.client.login(username='admin_asistencias', password='testpass123')
+        self.url = reverse('asistencias:marcar_sesion', args=[self.evento.pk])
+
+    def _estadistica(self):
+        self.evento.estadistica.refresh_from_db()
+        return self.evento.estadistica.asistentes, self.evento.estadistica.sesiones_asistidas
+
+    def test_aplica_el_diff(self):
+        """Marca los nuevos, desmarca los ausentes y mantiene exactas las estadísticas"""
+        ids = [inscripcion.pk for inscripcion in self.inscripciones]
+        otro = Evento.objects.create(
+            nombre='Otro', descripcion='Otro', tipo_evento=self.tipo_evento,
+            fecha_inicio=self.evento.fecha_inicio, fecha_fin=self.evento.fecha_fin,
+            lugar='Sala 2', cupo_maximo=10, costo=Decimal('0.00'), creado_por=self.admin
+        )
+        ajena = Inscripcion.objects.create(
+            evento=otro, nombre='Ajena', apellido='X', documento='9199999',
+            correo='ajena@test.com', telefono='1'
+        )
+
+        # Sesión 1 tenía 0, 1 y 2: queda 1, 2 y 3
+        with self.assertNumQueries(8):
+            resultado = Asistencia.marcar_sesion(self.evento, 1, ids[1:] + [ajena.pk], usuario=self.admin)
+
+        self.assertEqual(resultado, {'marcadas': 1, 'desmarcadas': 1, 'ignoradas': [ajena.pk]})
+        self.assertEqual(
+            sorted(Asistencia.objects.filter(sesion=1).values_list('inscripcion_id', flat=True)),
+            ids[1:]
+        )
+        # El participante 0 conserva la sesión 2 y el 3 es nuevo: 4 asistentes
+        self.assertEqual(self._estadistica(), (4, 4))
+
+        Asistencia.marcar_sesion(self.evento, 2, [], usuario=self.admin)
+        Asistencia.marcar_sesion(self.evento, 1, [], usuario=self.admin)
+        self.assertEqual(self._estadistica(), (0, 0))
+
+    def test_lee_solo_la_sesion_y_los_solicitados(self):
+        """Las lecturas se limitan a la sesión tomada y a los ids enviados"""
+        tabla_asistencias = Asistencia._meta.db_table
+        tabla_inscripciones = Inscripcion._meta.db_table
+
+        with CaptureQueriesContext(connection) as consultas:
+            resultado = Asistencia.marcar_sesion(self.evento, 2, [self.inscripciones[3].pk], usuario=self.admin)
+
+        self.assertEqual((resultado['marcadas'], resultado['desmarcadas']), (1, 1))
+        lecturas = [c['sql'] for c in consultas.captured_queries if c['sql'].startswith('SELECT')]
+        self.assertTrue(any(f'FROM "{tabla_asistencias}"' in sql for sql in lecturas))
+        for sql in lecturas:
+            if f'FROM "{tabla_asistencias}"' in sql:
+                self.assertIn(f'"{tabla_asistencias}"."sesion" = 2', sql)
+            elif f'FROM "{tabla_inscripciones}"' in sql:
+                self.assertIn(f'"{tabla_inscripciones}"."id" IN ({self.inscripciones[3].pk})', sql)
+        # El participante 0 conserva la sesión 1 y el 3 es nuevo: 4 asistentes
+        self.assertEqual(self._estadistica(), (4, 4))
+
+    def test_sesion_invalida(self):
+        """La sesión se valida una vez para todo el lote"""
+        with self.assertRaises(ValueError):
+            Asistencia.marcar_sesion(self.evento, 7, [self.inscripciones[3].pk])
+        self.assertFalse(Asistencia.objects.filter(sesion=7).exists())
+
+        response = self.client.post(self.url, {'sesion': 'x'})
+        self.assertRedirects(response, reverse('asistencias:evento', args=[self.evento.pk]))
+
+    def test_vista_en_consultas_constantes(self):
+        """El formulario y la API JSON cuestan lo mismo con 1 o con 60 participantes"""
+        def enviar(ids):
+            with CaptureQueriesContext(connection) as consultas:
+                response = self.client.post(
+                    self.url, {'sesion': 3, 'inscripciones': ids}, content_type='application/json'
+                )
+            self.assertEqual(response.status_code, 200)
+            return len(consultas), response.json()
+
+        Asistencia.objects.create(inscripcion=self.inscripciones[0], sesion=3)
+        esperado, resultado = enviar([self.inscripciones[3].pk])
+        self.assertEqual((resultado['marcadas'], resultado['desmarcadas']), (1, 1))
+
+        nuevas = [
+            Inscripcion.objects.create(
+                evento=self.evento, nombre='Nuevo', apellido=f'{numero}',
+                documento=f'{9300000 + numero}', correo=f'nuevo{numero}@test.com', telefono='1'
+            )
+            for numero in range(60)
+        ]
+        consultas, resultado = enviar([inscripcion.pk for inscripcion in nuevas])
+        self.assertEqual(consultas, esperado)
+        self.assertEqual((resultado['marcadas'], resultado['desmarcadas']), (60, 1))
+
+        response = self.client.post(self.url, {'sesion': 3, 'inscripciones': [nuevas[0].pk]})
+        self.assertRedirects(
+            response, reverse('asistencias:evento', args=[self.evento.pk]) + '?sesion=3',
+            fetch_redirect_response=False
+        )
+        self.assertEqual(Asistencia.objects.filter(sesion=3).count(), 1)
+
+
+class ListadoAsistenciaTest(AsistenciaBaseTest):
+    """
+    Tests para el listado de asistencia por evento (HU-16, HU-18)
+    Matriz, certificado y elegibilidad en un número fijo de consultas
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.client.login(username='admin_asistencias', password='testpass123')
+        self.url = reverse('asistencias:evento', args=[self.evento.pk])
+        # 80% de 6 sesiones: el participante 0 cumple con 5
+        for sesion in (3, 4, 5):
+            Asistencia.objects.create(inscripcion=self.inscripciones[0], sesion=sesion)
+
+    def _participantes(self, **parametros):
+        response = self.client.get(self.url, parametros)
+        self.assertEqual(response.status_code, 200)
+        return {p['inscripcion'].pk: p for p in response.context['participantes']}
+
+    def test_matriz_y_elegibilidad(self):
+        """Cada fila trae sus sesiones, su porcentaje y si puede generar certificado"""
+        from certificados.models import Certificado
+
+        Certificado.objects.create(inscripcion=self.inscripciones[1])
+        participantes = self._participantes()
+
+        primero = participantes[self.inscripciones[0].pk]
+        self.assertEqual(primero['asistencia'], [True, True, True, True, True, False])
+        self.assertEqual(primero['sesiones_disponibles'], [6])
+        self.assertTrue(primero['puede_generar_certificado'])
+        for inscripcion in self.inscripciones[1:]:
+            fila = participantes[inscripcion.pk]
+            self.assertEqual(fila['puede_generar_certificado'], inscripcion.puede_generar_certificado)
+            self.assertEqual(fila['porcentaje_asistencia'], inscripcion.porcentaje_asistencia)
+        self.assertIsNotNone(participantes[self.inscripciones[1].pk]['certificado'])
+        self.assertIsNone(participantes[self.inscripciones[2].pk]['certificado'])
+
+    def test_filtros_y_busqueda(self):
+        """La búsqueda y los filtros se resuelven en la base de datos"""
+        from certificados.models import Certificado
+
+        Certificado.objects.create(inscripcion=self.inscripciones[2])
+        self.assertEqual(list(self._participantes(filtro='elegibles')), [self.inscripciones[0].pk])
+        self.assertEqual(len(self._participantes(filtro='no_elegibles')), 3)
+        self.assertEqual(list(self._participantes(filtro='con_certificado')), [self.inscripciones[2].pk])
+        self.assertEqual(list(self._participantes(q='0003')), [self.inscripciones[3].pk])
+
+    def test_paginacion_en_consultas_constantes(self):
+        """Una página cuesta lo mismo con 4 que con 120 participantes con certificado"""
+        from asistencias.views import PARTICIPANTES_POR_PAGINA
+        from certificados.models import Certificado
+
+        # La primera página guarda el token CSRF en la sesión
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as consultas:
+            self.client.get(self.url)
+        esperado = len(consultas)
+
+        Evento.objects.filter(pk=self.evento.pk).update(cupo_maximo=200)
+        for numero in range(116):
+            inscripcion = Inscripcion.objects.create(
+                evento=self.evento, nombre='Nuevo', apellido=f'{numero:04d}',
+                documento=f'{9400000 + numero}', correo=f'lista{numero}@test.com', telefono='1'
+            )
+            Asistencia.objects.create(inscripcion=inscripcion, sesion=1 + numero % 6)
+            Certificado.objects.create(inscripcion=inscripcion)
+
+        siguiente = self.client.get(self.url).context['pagina'].url_siguiente
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get(self.url + siguiente)
+        self.assertEqual(len(consultas), esperado)
+        self.assertEqual(len(response.context['participantes']), PARTICIPANTES_POR_PAGINA)
+        self.assertTrue(response.context['pagina'].hay_anterior)
+        self.assertTrue(response.context['pagina'].hay_siguiente)
+
+    def test_guardar_una_pagina_no_toca_las_demas(self):
+        """El diff de la sesión se limita a los participantes mostrados"""
+        alcance = [inscripcion.pk for inscripcion in self.inscripciones[2:]]
+        resultado = Asistencia.marcar_sesion(self.evento, 1, [self.inscripciones[3].pk], alcance=alcance)
+
+        self.assertEqual((resultado['marcadas'], resultado['desmarcadas']), (1, 1))
+        self.assertEqual(
+            sorted(Asistencia.objects.filter(sesion=1).values_list('inscripcion_id', flat=True)),
+            [inscripcion.pk for inscripcion in (self.inscripciones[0], self.inscripciones[1], self.inscripciones[3])]
+        )
+
+
+class ContadorAsistenciasTest(AsistenciaBaseTest):
+    """
+    Tests para Inscripcion.asistencias_count (HU-18)
+    Lo mantienen todas las rutas que insertan o borran asistencias
+    """
+
+    def _contadores(self):
+        return dict(
+            Inscripcion.objects.filter(evento=self.evento).values_list('pk', 'asistencias_count')
+        )
+
+    def _reales(self):
+        from django.db.models import Count
+        return dict(
+            Inscripcion.objects.filter(evento=self.evento).annotate(
+                total=Count('asistencias')
+            ).values_list('pk', 'total')
+        )
+
+    def test_rutas_de_registro_mantienen_el_contador(self):
+        """save/delete, check-in QR, sincronización y marcado en bloque"""
+        from asistencias.checkin import registrar_checkin, sincronizar_escaneos
+
+        self.assertEqual(self._contadores(), self._reales())
+
+        Asistencia.objects.get(inscripcion=self.inscripciones[0], sesion=2).delete()
+        registrar_checkin(self.evento.pk, 3, str(self.inscripciones[1].codigo_qr), None, '')
+        sincronizar_escaneos(self.evento, [
+            {'codigo': str(self.inscripciones[3].codigo_qr), 'sesion': sesion,
+             'timestamp': timezone.now().isoformat()}
+            for sesion in (4, 5, 5)
+        ])
+        Asistencia.marcar_sesion(self.evento, 1, [self.inscripciones[3].pk])
+
+        self.assertEqual(self._contadores(), self._reales())
+        self.assertEqual(self._contadores()[self.inscripciones[3].pk], 3)
+
+    def test_guardar_inscripcion_no_pisa_el_contador(self):
+        """Una inscripción cargada antes de registrar asistencias no sobrescribe el contador"""
+        vieja = Inscripcion.objects.get(pk=self.inscripciones[3].pk)
+        Asistencia.objects.create(inscripcion=self.inscripciones[3], sesion=1)
+
+        vieja.notas = 'Actualizada'
+        vieja.save()
+
+        vieja.refresh_from_db()
+        self.assertEqual((vieja.notas, vieja.asistencias_count), ('Actualizada', 1))
+
+    def test_borrado_masivo_del_admin_mantiene_los_contadores(self):
+        """delete_selected no pasa por delete(): el admin recalcula los contadores"""
+        from eventos.models import EstadisticaEvento
+
+        self.client.login(username='admin_asistencias', password='testpass123')
+
+        def borrar(modelo, ids):
+            response = self.client.post(
+                reverse(f'admin:{modelo._meta.app_label}_{modelo._meta.model_name}_changelist'),
+                {'action': 'delete_selected', '_selected_action': ids, 'post': 'yes'}
+            )
+            self.assertEqual(response.status_code, 302)
+
+        borrar(Asistencia, list(Asistencia.objects.filter(sesion=1).values_list('pk', flat=True)))
+        self.assertEqual(self._contadores(), self._reales())
+        estadistica = EstadisticaEvento.objects.get(evento=self.evento)
+        self.assertEqual((estadistica.asistentes, estadistica.sesiones_asistidas), (1, 1))
+
+        borrar(Inscripcion, [self.inscripciones[0].pk, self.inscripciones[1].pk])
+        self.evento.refresh_from_db()
+        self.assertEqual(self.evento.inscritos_confirmados, 2)
+        estadistica.refresh_from_db()
+        self.assertEqual((estadistica.asistentes, estadistica.sesiones_asistidas), (0, 0))
+
+    def test_elegibilidad_en_sql(self):
+        """elegibles_certificado aplica en una consulta la regla de puede_generar_certificado"""
+        for sesion in (3, 4, 5):
+            Asistencia.objects.create(inscripcion=self.inscripciones[0], sesion=sesion)
+
+        with self.assertNumQueries(1):
+            elegibles = list(Inscripcion.objects.filter(evento=self.evento).elegibles_certificado())
+        self.assertEqual(elegibles, [self.inscripciones[0]])
+
+        inscripciones = Inscripcion.objects.filter(evento=self.evento).select_related('evento')
+        with self.assertNumQueries(1):
+            esperados = [i for i in inscripciones if i.puede_generar_certificado]
+        self.assertEqual(esperados, elegibles)
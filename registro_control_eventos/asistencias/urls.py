@@ -12,6 +12,10 @@ urlpatterns = [
     path('control/', views.control_asistencias, name='control'),
     path('registrar/<int:inscripcion_id>/', views.registrar_asistencia, name='registrar'),
     path('qr/<uuid:codigo_qr>/', views.registrar_qr, name='registrar_qr'),
+    path('checkin/<int:evento_id>/<int:sesion>/', views.checkin_qr, name='checkin_qr'),
+    path('checkin/<int:evento_id>/sincronizar/', views.sincronizar_escaneos, name='sincronizar_escaneos'),
+    path('checkin/<int:evento_id>/listado/', views.descargar_listado, name='descargar_listado'),
     path('evento/<int:evento_id>/', views.asistencias_evento, name='evento'),
+    path('evento/<int:evento_id>/sesion/', views.marcar_sesion, name='marcar_sesion'),
 ]
 
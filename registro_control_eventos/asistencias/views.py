@@ -6,6 +6,11 @@ Placeholder - Implementar según necesidades
 from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.views.decorators.http import require_POST
+
+
+# Participantes por página en el listado de asistencia de un evento
+PARTICIPANTES_POR_PAGINA = 50
 
 
 @login_required
@@ -74,49 +79,244 @@ def registrar_asistencia(request, inscripcion_id):
     return redirect('asistencias:evento', evento_id=inscripcion.evento.pk)
 
 
+@login_required
+@require_POST
+def marcar_sesion(request, evento_id):
+    """
+    Toma de asistencia de una sesión para todo el listado (HU-16)
+    Recibe 'sesion' y la lista de 'inscripciones' presentes (formulario o JSON);
+    se marcan las nuevas y se desmarcan las que ya no vienen. El formulario
+    envía además los ids de la página ('listado') para no tocar las demás
+    """
+    import json
+    from django.http import JsonResponse
+    from django.shortcuts import get_object_or_404
+    from django.urls import reverse
+    from eventos.models import Evento
+    from asistencias.models import Asistencia
+    
+    es_json = request.content_type == 'application/json'
+    if not request.user.puede_gestionar_eventos():
+        if es_json:
+            return JsonResponse({'error': 'No tiene permisos'}, status=403)
+        messages.error(request, 'No tiene permisos')
+        return redirect('dashboard:index')
+    
+    evento = get_object_or_404(Evento.objects.only('pk', 'numero_sesiones'), pk=evento_id)
+    
+    try:
+        if es_json:
+            datos = json.loads(request.body or b'{}')
+            sesion, inscripciones = datos.get('sesion'), datos.get('inscripciones', [])
+            alcance = datos.get('alcance')
+        else:
+            sesion, inscripciones = request.POST.get('sesion'), request.POST.getlist('inscripciones')
+            alcance = request.POST.getlist('listado') or None
+        sesion = int(sesion)
+        inscripciones = [int(inscripcion_id) for inscripcion_id in inscripciones]
+        if alcance is not None:
+            alcance = [int(inscripcion_id) for inscripcion_id in alcance]
+    except (ValueError, TypeError, AttributeError):
+        error = 'Datos de asistencia no válidos'
+    else:
+        try:
+            resultado = Asistencia.marcar_sesion(
+                evento, sesion, inscripciones, usuario=request.user, alcance=alcance
+            )
+            error = None
+        except ValueError as e:
+            error = str(e)
+    
+    if error:
+        if es_json:
+            return JsonResponse({'error': error}, status=400)
+        messages.error(request, error)
+        return redirect('asistencias:evento', evento_id=evento.pk)
+    
+    if es_json:
+        return JsonResponse(resultado)
+    
+    messages.success(
+        request,
+        f"Sesión {sesion}: {resultado['marcadas']} asistencias marcadas, "
+        f"{resultado['desmarcadas']} desmarcadas."
+    )
+    volver = request.POST.get('volver', '')
+    if not volver.startswith('?'):
+        volver = f'?sesion={sesion}'
+    return redirect(f"{reverse('asistencias:evento', args=[evento.pk])}{volver}")
+
+
 def registrar_qr(request, codigo_qr):
     return render(request, 'asistencias/qr.html')
 
 
+@login_required
+@require_POST
+def checkin_qr(request, evento_id, sesion):
+    """
+    Check-in por código QR para los lectores de la puerta (HU-17)
+    Recibe 'codigo' (UUID o URL del QR) por POST o JSON y responde en JSON;
+    el listado del evento se mantiene en memoria (ver asistencias.checkin)
+    """
+    import json
+    from django.http import JsonResponse
+    from eventos.models import Evento
+    from .checkin import registrar_checkin
+    
+    if not request.user.puede_gestionar_eventos():
+        return JsonResponse({'error': 'No tiene permisos'}, status=403)
+    
+    codigo = request.POST.get('codigo')
+    if codigo is None and request.content_type == 'application/json':
+        try:
+            codigo = json.loads(request.body or b'{}').get('codigo')
+        except (ValueError, AttributeError):
+            return JsonResponse({'error': 'JSON inválido'}, status=400)
+    
+    try:
+        resultado = registrar_checkin(
+            evento_id,
+            sesion,
+            codigo,
+            ip_address=request.META.get('REMOTE_ADDR'),
+            user_agent=request.META.get('HTTP_USER_AGENT', '')
+        )
+    except Evento.DoesNotExist:
+        return JsonResponse({'error': 'Evento no encontrado'}, status=404)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    
+    return JsonResponse(resultado, status=404 if resultado['estado'] == 'NO_INSCRITO' else 200)
+
+
+@login_required
+@require_POST
+def sincronizar_escaneos(request, evento_id):
+    """
+    Sincronización en bloque de los escaneos hechos sin conexión (HU-17)
+    Recibe JSON {"escaneos": [{"codigo", "sesion", "timestamp", "dispositivo"}, ...]}
+    y responde un resultado por escaneo en el mismo orden
+    """
+    import json
+    from django.http import JsonResponse
+    from django.shortcuts import get_object_or_404
+    from eventos.models import Evento
+    from .checkin import sincronizar_escaneos as sincronizar
+    
+    if not request.user.puede_gestionar_eventos():
+        return JsonResponse({'error': 'No tiene permisos'}, status=403)
+    
+    evento = get_object_or_404(Evento.objects.only('pk', 'numero_sesiones'), pk=evento_id)
+    
+    try:
+        datos = json.loads(request.body or b'{}')
+    except ValueError:
+        return JsonResponse({'error': 'JSON inválido'}, status=400)
+    escaneos = datos.get('escaneos') if isinstance(datos, dict) else datos
+    if not isinstance(escaneos, list):
+        return JsonResponse({'error': 'Se esperaba una lista de escaneos'}, status=400)
+    
+    try:
+        resultados = sincronizar(evento, escaneos)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    
+    return JsonResponse({
+        'total': len(resultados),
+        'registradas': sum(1 for resultado in resultados if resultado['estado'] == 'REGISTRADA'),
+        'resultados': resultados,
+    })
+
+
+@login_required
+def descargar_listado(request, evento_id):
+    """
+    Listado firmado del evento para validar QR sin conexión (HU-17)
+    ETag = versión del listado: con If-None-Match vigente responde 304 y con
+    ?desde=<versión> solo envía las inscripciones modificadas desde entonces
+    """
+    from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+    from django.shortcuts import get_object_or_404
+    from eventos.models import Evento
+    from .checkin import fecha_de_version, lineas_listado, version_listado
+    
+    if not request.user.puede_gestionar_eventos():
+        return JsonResponse({'error': 'No tiene permisos'}, status=403)
+    
+    get_object_or_404(Evento.objects.only('pk'), pk=evento_id)
+    version, total = version_listado(evento_id)
+    etag = f'"{version}"'
+    
+    if request.headers.get('If-None-Match') == etag:
+        response = HttpResponse(status=304)
+        response['ETag'] = etag
+        return response
+    
+    desde = request.GET.get('desde') or None
+    if desde is not None:
+        try:
+            fecha_de_version(desde)
+        except (ValueError, OverflowError, OSError):
+            return JsonResponse({'error': 'Versión inválida'}, status=400)
+    
+    response = StreamingHttpResponse(
+        lineas_listado(evento_id, version, total, desde=desde),
+        content_type='application/x-ndjson; charset=utf-8'
+    )
+    response['ETag'] = etag
+    response['X-Listado-Version'] = version
+    response['Cache-Control'] = 'private, no-cache'
+    response['Content-Disposition'] = f'attachment; filename="listado_evento_{evento_id}.ndjson"'
+    return response
+
+
 @login_required
 def asistencias_evento(request, evento_id):
-    """Gestión de asistencias para un evento específico"""
+    """
+    Gestión de asistencias para un evento específico
+    El listado se filtra y pagina por cursor en la base de datos; cada página
+    cuesta un número fijo de consultas (ver Asistencia.matriz_asistencia)
+    """
     from eventos.models import Evento
-    from inscripciones.models import Inscripcion
+    from asistencias.models import Asistencia
     from django.shortcuts import get_object_or_404
+    from registro_control_eventos.paginacion import paginar_por_cursor
     
     if not request.user.puede_gestionar_eventos():
         messages.error(request, 'No tiene permisos')
         return redirect('dashboard:index')
     
     evento = get_object_or_404(Evento, pk=evento_id)
-    inscripciones = Inscripcion.objects.filter(
-        evento=evento,
-        estado='CONFIRMADA'
-    ).select_related('usuario').prefetch_related('asistencias').order_by('apellido', 'nombre')
-    
-    # Add session tracking for each inscripcion
-    participantes = []
-    for inscripcion in inscripciones:
-        sesiones_registradas = list(inscripcion.asistencias.values_list('sesion', flat=True))
-        sesiones_disponibles = [s for s in range(1, evento.numero_sesiones + 1) if s not in sesiones_registradas]
-        
-        # Check for certificate
-        from certificados.models import Certificado
-        certificado = Certificado.objects.filter(inscripcion=inscripcion).first()
-        
-        participantes.append({
-            'inscripcion': inscripcion,
-            'sesiones_registradas': sesiones_registradas,
-            'sesiones_disponibles': sesiones_disponibles,
-            'todas_registradas': len(sesiones_disponibles) == 0,
-            'certificado': certificado,
-            'puede_generar_certificado': inscripcion.puede_generar_certificado
-        })
+    buscar = request.GET.get('q', '').strip()
+    filtro = request.GET.get('filtro', '')
+    if filtro not in Asistencia.FILTROS_LISTADO:
+        filtro = ''
+    
+    pagina = paginar_por_cursor(
+        request,
+        Asistencia.listado_evento(evento, buscar, filtro),
+        ['apellido', 'nombre'],
+        tamano=PARTICIPANTES_POR_PAGINA
+    )
+    participantes = Asistencia.matriz_asistencia(evento, pagina.items)
+    
+    # Sesión que se está tomando en el formulario de asistencia en bloque
+    try:
+        sesion_actual = min(max(int(request.GET.get('sesion', 1)), 1), evento.numero_sesiones)
+    except ValueError:
+        sesion_actual = 1
     
     context = {
         'evento': evento,
-        'participantes': participantes
+        'participantes': participantes,
+        'estadisticas': Asistencia.obtener_estadisticas_evento(evento),
+        'sesion_actual': sesion_actual,
+        'sesiones': range(1, evento.numero_sesiones + 1),
+        'pagina': pagina,
+        'buscar': buscar,
+        'filtro': filtro,
+        'filtros': Asistencia.FILTROS_LISTADO,
     }
     
     return render(request, 'asistencias/evento.html', context)
@@ -3,7 +3,7 @@ Configuración del Admin para la aplicación de Certificados
 """
 
 from django.contrib import admin
-from .models import Certificado, PlantillaCertificado
+from .models import Certificado, PlantillaCertificado, TareaGeneracionCertificados
 
 
 @admin.register(Certificado)
@@ -100,3 +100,18 @@ class PlantillaCertificadoAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
     )
+
+
+@admin.register(TareaGeneracionCertificados)
+class TareaGeneracionCertificadosAdmin(admin.ModelAdmin):
+    """Admin para TareaGeneracionCertificados"""
+    list_display = [
+        'evento', 'estado', 'procesados', 'total', 'generados',
+        'fecha_creacion', 'fecha_fin'
+    ]
+    list_filter = ['estado', 'fecha_creacion']
+    search_fields = ['evento__nombre']
+    readonly_fields = [
+        'total', 'procesados', 'generados', 'ultimo_id_procesado',
+        'fecha_creacion', 'fecha_inicio', 'fecha_fin', 'fecha_latido', 'mensaje_error'
+    ]
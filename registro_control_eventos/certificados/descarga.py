@@ -0,0 +1,446 @@
+"""
+Descarga de certificados en PDF, en ZIP o en un PDF combinado por evento
+PRCE - Plataforma de Registro y Control de Eventos
+
+HU-05 & HU-19: Generación Automática de Certificados
+
+Los archivos se leen del storage por bloques y las respuestas aceptan Range
+e If-Range, así una descarga interrumpida se retoma donde quedó. El ZIP se
+arma al vuelo con entradas sin compresión (los PDF ya vienen comprimidos):
+su tamaño se conoce antes de leer los archivos y el contenido es siempre
+el mismo para los mismos certificados, de modo que cualquier rango se puede
+volver a generar. El PDF combinado une los PDF guardados una sola vez y se
+sirve desde el storage.
+"""
+
+import hashlib
+import re
+import struct
+import zlib
+
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+
+# Tamaño de los bloques leídos del storage y enviados al cliente
+TAMANO_BLOQUE = 64 * 1024
+
+_RANGO = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+# Estructuras ZIP (APPNOTE 4.3.7, 4.3.12 y 4.3.16)
+_ENCABEZADO_LOCAL = struct.Struct('<IHHHHHIIIHH')
+_ENCABEZADO_CENTRAL = struct.Struct('<IHHHHHHIIIHHHHHII')
+_FIN_DIRECTORIO = struct.Struct('<IHHHHIIH')
+_NOMBRES_UTF8 = 0x0800
+_LIMITE_ZIP = 0xFFFFFFFF
+
+# Objetos, referencias indirectas y final de un PDF (ISO 32000-1, 7.3.10 y 7.5)
+_OBJETO = re.compile(rb'(\d+) 0 obj\s*')
+_REFERENCIA = re.compile(rb'(\d+) (\d+) R\b')
+_FIN_PDF = re.compile(rb'startxref\s+(\d+)\s+%%EOF\s*$')
+
+# PDF combinados por evento, reutilizados mientras no cambien los certificados
+CARPETA_COMBINADOS = 'certificados/combinados'
+
+
+def leer_bloques(archivo, inicio=0, fin=None):
+    """Lee `archivo` desde `inicio` hasta `fin` (inclusive) en bloques de TAMANO_BLOQUE"""
+    archivo.seek(inicio)
+    restante = None if fin is None else fin - inicio + 1
+    while restante is None or restante > 0:
+        bloque = archivo.read(TAMANO_BLOQUE if restante is None else min(TAMANO_BLOQUE, restante))
+        if not bloque:
+            break
+        if restante is not None:
+            restante -= len(bloque)
+        yield bloque
+
+
+def rango_solicitado(request, tamano, etag):
+    """
+    Rango (inicio, fin) pedido en el encabezado Range, o None para enviar todo
+
+    Solo se atiende un rango; varios rangos, un If-Range que no coincide con
+    el ETag o un formato desconocido se responden con el archivo completo.
+    Lanza ValueError si el rango no se puede satisfacer.
+    """
+    encabezado = request.headers.get('Range', '').strip()
+    if not encabezado:
+        return None
+    if request.headers.get('If-Range', etag) != etag:
+        return None
+
+    coincidencia = _RANGO.match(encabezado)
+    if not coincidencia or coincidencia.groups() == ('', ''):
+        return None
+    inicio, fin = coincidencia.groups()
+
+    if inicio == '':
+        # bytes=-N: los últimos N bytes
+        if int(fin) == 0:
+            raise ValueError('Rango vacío')
+        inicio, fin = max(tamano - int(fin), 0), tamano - 1
+    else:
+        inicio = int(inicio)
+        fin = min(int(fin), tamano - 1) if fin else tamano - 1
+
+    if inicio >= tamano or inicio > fin:
+        raise ValueError('Rango fuera del archivo')
+    return inicio, fin
+
+
+def respuesta_por_rangos(request, leer, tamano, nombre_archivo, content_type, etag, adjunto=True):
+    """
+    Respuesta en streaming que atiende Range (206) y, si no, envía todo (200)
+    `leer(inicio, fin)` retorna un iterable con los bytes de ese tramo
+    """
+    try:
+        rango = rango_solicitado(request, tamano, etag)
+    except ValueError:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{tamano}'
+        return response
+
+    inicio, fin = rango or (0, tamano - 1)
+    response = StreamingHttpResponse(
+        leer(inicio, fin) if tamano else iter(()),
+        content_type=content_type,
+        status=206 if rango else 200
+    )
+    response['Content-Length'] = str(fin - inicio + 1 if tamano else 0)
+    if rango:
+        response['Content-Range'] = f'bytes {inicio}-{fin}/{tamano}'
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    disposicion = 'attachment' if adjunto else 'inline'
+    response['Content-Disposition'] = f'{disposicion}; filename="{nombre_archivo}"'
+    return response
+
+
+def _fecha_dos(fecha):
+    """Fecha y hora en formato MS-DOS (resolución de 2 segundos) para el ZIP"""
+    fecha = timezone.localtime(fecha) if timezone.is_aware(fecha) else fecha
+    anio = min(max(fecha.year, 1980), 2107)
+    return (
+        (fecha.hour << 11) | (fecha.minute << 5) | (fecha.second // 2),
+        ((anio - 1980) << 9) | (fecha.month << 5) | fecha.day,
+    )
+
+
+class ArchivoZip:
+    """
+    ZIP sin compresión armado al vuelo a partir de archivos del storage
+
+    `entradas` es una lista de (nombre_en_zip, ruta_en_storage, tamaño, fecha).
+    El diseño del archivo (desplazamientos y tamaño total) se calcula con los
+    tamaños, sin leer los archivos; el CRC de cada uno se calcula al enviarlo.
+    """
+
+    def __init__(self, storage, entradas):
+        self.storage = storage
+        self.entradas = []
+        desplazamiento = 0
+        for nombre, ruta, tamano, fecha in entradas:
+            nombre = nombre.encode('utf-8')
+            self.entradas.append((nombre, ruta, tamano, _fecha_dos(fecha), desplazamiento))
+            desplazamiento += _ENCABEZADO_LOCAL.size + len(nombre) + tamano
+
+        self.inicio_directorio = desplazamiento
+        self.tamano_directorio = sum(
+            _ENCABEZADO_CENTRAL.size + len(nombre) for nombre, *_ in self.entradas
+        )
+        self.tamano = self.inicio_directorio + self.tamano_directorio + _FIN_DIRECTORIO.size
+
+        if self.tamano > _LIMITE_ZIP or len(self.entradas) > 0xFFFF:
+            raise ValueError('El ZIP supera 4 GB o 65.535 archivos; descargue por partes')
+
+    @property
+    def etag(self):
+        """Identifica el contenido: cambia si cambia algún nombre, tamaño o fecha"""
+        huella = hashlib.sha1()
+        for nombre, ruta, tamano, fecha, _ in self.entradas:
+            huella.update(b'%s\0%s\0%d\0%d\0%d\n' % (nombre, ruta.encode('utf-8'), tamano, *fecha))
+        return f'"{huella.hexdigest()}"'
+
+    def _crc(self, ruta):
+        crc = 0
+        with self.storage.open(ruta, 'rb') as archivo:
+            for bloque in leer_bloques(archivo):
+                crc = zlib.crc32(bloque, crc)
+        return crc
+
+    def leer(self, inicio=0, fin=None):
+        """Genera los bytes del ZIP entre `inicio` y `fin` (inclusive)"""
+        fin = self.tamano - 1 if fin is None else fin
+        crcs = {}
+
+        def tramo(bloque, posicion):
+            # Parte del bloque que cae dentro del rango pedido
+            if posicion > fin or posicion + len(bloque) <= inicio:
+                return b''
+            return bloque[max(inicio - posicion, 0):fin - posicion + 1]
+
+        for nombre, ruta, tamano, (hora, dia), desplazamiento in self.entradas:
+            datos = desplazamiento + _ENCABEZADO_LOCAL.size + len(nombre)
+            if desplazamiento > fin:
+                return
+            if datos + tamano <= inicio:
+                continue
+
+            # Se lee el archivo dos veces (CRC y envío) para no guardarlo en memoria
+            crcs[ruta] = self._crc(ruta)
+            encabezado = _ENCABEZADO_LOCAL.pack(
+                0x04034B50, 20, _NOMBRES_UTF8, 0, hora, dia,
+                crcs[ruta], tamano, tamano, len(nombre), 0
+            ) + nombre
+            if desplazamiento + len(encabezado) > inicio:
+                yield tramo(encabezado, desplazamiento)
+            if tamano and datos <= fin:
+                with self.storage.open(ruta, 'rb') as archivo:
+                    yield from leer_bloques(
+                        archivo,
+                        max(inicio - datos, 0),
+                        min(fin - datos, tamano - 1)
+                    )
+
+        if self.inicio_directorio > fin:
+            return
+        posicion = self.inicio_directorio
+        for nombre, ruta, tamano, (hora, dia), desplazamiento in self.entradas:
+            largo = _ENCABEZADO_CENTRAL.size + len(nombre)
+            if posicion + largo > inicio:
+                if ruta not in crcs:
+                    crcs[ruta] = self._crc(ruta)
+                yield tramo(_ENCABEZADO_CENTRAL.pack(
+                    0x02014B50, 20, 20, _NOMBRES_UTF8, 0, hora, dia,
+                    crcs[ruta], tamano, tamano, len(nombre), 0, 0, 0, 0, 0, desplazamiento
+                ) + nombre, posicion)
+            posicion += largo
+            if posicion > fin:
+                return
+
+        yield tramo(_FIN_DIRECTORIO.pack(
+            0x06054B50, 0, 0, len(self.entradas), len(self.entradas),
+            self.tamano_directorio, self.inicio_directorio, 0
+        ), posicion)
+
+
+def _certificados_generados(evento):
+    from .models import Certificado
+
+    return Certificado.objects.filter(
+        inscripcion__evento=evento
+    ).exclude(
+        archivo_pdf__isnull=True
+    ).exclude(
+        archivo_pdf=''
+    ).order_by('inscripcion__apellido', 'inscripcion__nombre', 'pk')
+
+
+def respuesta_certificado(request, certificado, adjunto=False):
+    """Envía el PDF guardado de un certificado por bloques, con soporte de Range"""
+    archivo_pdf = certificado.archivo_pdf
+    tamano = archivo_pdf.size
+    etag = '"{}"'.format(hashlib.sha1(f'{archivo_pdf.name}:{tamano}'.encode()).hexdigest())
+
+    def leer(inicio, fin):
+        with archivo_pdf.storage.open(archivo_pdf.name, 'rb') as archivo:
+            yield from leer_bloques(archivo, inicio, fin)
+
+    return respuesta_por_rangos(
+        request, leer, tamano,
+        f'certificado_{certificado.codigo_verificacion}.pdf',
+        'application/pdf', etag, adjunto=adjunto
+    )
+
+
+def zip_certificados(evento):
+    """
+    ArchivoZip con los certificados generados del evento (HU-05, HU-19)
+    Una consulta para la lista; los tamaños se piden al storage
+    """
+    from django.utils.text import slugify
+    from .models import Certificado
+
+    storage = Certificado._meta.get_field('archivo_pdf').storage
+    entradas = []
+    for ruta, codigo, fecha, nombre, apellido in _certificados_generados(evento).values_list(
+        'archivo_pdf', 'codigo_verificacion', 'fecha_generacion',
+        'inscripcion__nombre', 'inscripcion__apellido'
+    ).iterator(chunk_size=2000):
+        nombre_zip = f'{slugify(apellido)}_{slugify(nombre)}_{codigo}.pdf'
+        entradas.append((nombre_zip, ruta, storage.size(ruta), fecha))
+    return ArchivoZip(storage, entradas)
+
+
+def pdf_combinado(evento):
+    """
+    PDF con todos los certificados generados del evento, uno por página
+
+    Se arma uniendo los PDF guardados, así cada página es idéntica al
+    certificado individual. El resultado se guarda en el storage con el ETag
+    en el nombre y se reutiliza en las descargas y rangos siguientes hasta
+    que cambie algún certificado. Retorna (ruta, tamaño, etag).
+    Lanza ValueError si algún PDF guardado no se puede unir.
+    """
+    import tempfile
+    from django.core.files import File
+    from .models import Certificado
+
+    storage = Certificado._meta.get_field('archivo_pdf').storage
+    rutas = list(_certificados_generados(evento).values_list('archivo_pdf', flat=True).iterator(chunk_size=2000))
+    huella = hashlib.sha1()
+    for ruta in rutas:
+        huella.update(b'%s\0%d\n' % (ruta.encode('utf-8'), storage.size(ruta)))
+    etag = f'"{huella.hexdigest()}"'
+
+    prefijo = f'evento_{evento.pk}_'
+    ruta_combinado = f'{CARPETA_COMBINADOS}/{prefijo}{huella.hexdigest()}.pdf'
+    if storage.exists(ruta_combinado):
+        return ruta_combinado, storage.size(ruta_combinado), etag
+
+    def contenidos():
+        for ruta in rutas:
+            with storage.open(ruta, 'rb') as archivo:
+                yield archivo.read()
+
+    with tempfile.TemporaryFile() as temporal:
+        unir_pdfs(contenidos(), temporal)
+        temporal.seek(0)
+        _descartar_combinados(storage, prefijo)
+        ruta_combinado = storage.save(ruta_combinado, File(temporal))
+    return ruta_combinado, storage.size(ruta_combinado), etag
+
+
+def _descartar_combinados(storage, prefijo):
+    """Borra los PDF combinados anteriores del evento"""
+    try:
+        _, archivos = storage.listdir(CARPETA_COMBINADOS)
+    except FileNotFoundError:
+        return
+    for nombre in archivos:
+        if nombre.startswith(prefijo):
+            storage.delete(f'{CARPETA_COMBINADOS}/{nombre}')
+
+
+def _objetos_pdf(contenido):
+    """
+    Objetos de un PDF con una única tabla xref clásica, como los de ReportLab
+
+    Retorna (objetos, raiz, info): `objetos` es {número: (diccionario, stream)};
+    el stream (si lo hay) se copia sin tocar. Lanza
+    ValueError con PDF incrementales, con tablas xref comprimidas o dañados.
+    """
+    final = _FIN_PDF.search(contenido)
+    if not final or not contenido.startswith(b'xref', int(final.group(1))):
+        raise ValueError('Formato de PDF no soportado para combinar')
+    inicio_xref = int(final.group(1))
+    inicio_trailer = contenido.index(b'trailer', inicio_xref)
+    trailer = contenido[inicio_trailer:final.start()]
+
+    desplazamientos = {}
+    campos = contenido[inicio_xref + 4:inicio_trailer].split()
+    posicion = 0
+    while posicion < len(campos):
+        primero, cantidad = int(campos[posicion]), int(campos[posicion + 1])
+        posicion += 2
+        for numero in range(primero, primero + cantidad):
+            desplazamiento, _, tipo = campos[posicion:posicion + 3]
+            posicion += 3
+            if tipo == b'n':
+                desplazamientos[numero] = int(desplazamiento)
+
+    # Cada objeto termina donde empieza el siguiente (o la tabla xref)
+    orden = sorted(desplazamientos.items(), key=lambda item: item[1])
+    objetos = {}
+    for indice, (numero, desplazamiento) in enumerate(orden):
+        fin = orden[indice + 1][1] if indice + 1 < len(orden) else inicio_xref
+        encabezado = _OBJETO.match(contenido, desplazamiento)
+        cuerpo = contenido[encabezado.end():fin].rstrip() if encabezado else b''
+        if not encabezado or int(encabezado.group(1)) != numero or not cuerpo.endswith(b'endobj'):
+            raise ValueError('PDF dañado: tabla xref inconsistente')
+        cuerpo = cuerpo[:-len(b'endobj')]
+        corte = cuerpo.find(b'stream')
+        if corte == -1:
+            objetos[numero] = (cuerpo, b'')
+        else:
+            objetos[numero] = (cuerpo[:corte], cuerpo[corte:])
+
+    raiz = re.search(rb'/Root (\d+) 0 R', trailer)
+    info = re.search(rb'/Info (\d+) 0 R', trailer)
+    if not raiz:
+        raise ValueError('PDF sin catálogo')
+    return objetos, int(raiz.group(1)), int(info.group(1)) if info else None
+
+
+def _paginas_pdf(objetos, raiz):
+    """Retorna (páginas en orden, nodos /Pages) recorriendo el árbol desde el catálogo"""
+    paginas, nodos = [], []
+    pendientes = [int(re.search(rb'/Pages (\d+) 0 R', objetos[raiz][0]).group(1))]
+    while pendientes:
+        numero = pendientes.pop(0)
+        diccionario = objetos[numero][0]
+        if re.search(rb'/Type\s*/Pages\b', diccionario):
+            nodos.append(numero)
+            hijos = re.search(rb'/Kids\s*\[([^\]]*)\]', diccionario).group(1)
+            pendientes[:0] = [int(n) for n, _ in _REFERENCIA.findall(hijos)]
+        else:
+            paginas.append(numero)
+    return paginas, nodos
+
+
+def unir_pdfs(contenidos, destino):
+    """
+    Escribe en `destino` un PDF con las páginas de cada PDF de `contenidos`
+
+    Los objetos de cada documento se renumeran y se copian tal cual (los
+    streams no se descomprimen); solo se reemplazan el catálogo, el árbol de
+    páginas y la información del documento. El resultado no lleva fecha ni
+    ID, así que los mismos archivos producen los mismos bytes.
+    """
+    base = destino.tell()
+    destino.write(b'%PDF-1.4\n%\x93\x8c\x8b\x9e\n')
+    desplazamientos = {}
+    paginas = []
+    # 1 y 2 quedan para el catálogo y el árbol de páginas nuevos
+    siguiente = 3
+
+    def escribir(numero, diccionario, stream=b''):
+        desplazamientos[numero] = destino.tell() - base
+        destino.write(b'%d 0 obj\n%s\n' % (numero, diccionario.strip()))
+        if stream:
+            destino.write(stream.rstrip() + b'\n')
+        destino.write(b'endobj\n')
+
+    for contenido in contenidos:
+        objetos, raiz, info = _objetos_pdf(contenido)
+        paginas_documento, nodos = _paginas_pdf(objetos, raiz)
+
+        numeros = {numero: 2 for numero in nodos}
+        for numero in sorted(objetos):
+            if numero not in numeros and numero not in (raiz, info):
+                numeros[numero] = siguiente
+                siguiente += 1
+
+        def renumerar(referencia):
+            numero = int(referencia.group(1))
+            if numero not in numeros:
+                raise ValueError('PDF con referencias al catálogo no soportado para combinar')
+            return b'%d 0 R' % numeros[numero]
+
+        for numero in sorted(objetos):
+            if numero in nodos or numero in (raiz, info):
+                continue
+            diccionario, stream = objetos[numero]
+            escribir(numeros[numero], _REFERENCIA.sub(renumerar, diccionario), stream)
+        paginas.extend(numeros[numero] for numero in paginas_documento)
+
+    escribir(1, b'<< /Pages 2 0 R /Type /Catalog >>')
+    escribir(2, b'<< /Count %d /Kids [ %s ] /Type /Pages >>' % (
+        len(paginas), b' '.join(b'%d 0 R' % numero for numero in paginas)
+    ))
+
+    inicio_xref = destino.tell() - base
+    destino.write(b'xref\n0 %d\n0000000000 65535 f \n' % siguiente)
+    for numero in range(1, siguiente):
+        destino.write(b'%010d 00000 n \n' % desplazamientos[numero])
+    destino.write(b'trailer\n<< /Root 1 0 R /Size %d >>\nstartxref\n%d\n%%%%EOF\n' % (siguiente, inicio_xref))
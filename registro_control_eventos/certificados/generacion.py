@@ -0,0 +1,323 @@
+"""
+Generación de certificados en PDF
+PRCE - Plataforma de Registro y Control de Eventos
+
+HU-05 & HU-19: Generación Automática de Certificados
+
+El dibujo del PDF recibe solo datos planos (dict) para poder ejecutarse
+en procesos separados; la generación masiva se procesa por lotes desde
+el comando `procesar_certificados` usando TareaGeneracionCertificados.
+Los elementos fijos de cada evento y plantilla (capa_fondo) se calculan una
+vez por proceso; cada certificado solo estampa los datos del participante.
+"""
+
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from functools import lru_cache
+
+from django.core.files.base import ContentFile
+from django.db import transaction
+
+from .verificacion import limpiar_cache_verificacion
+
+logger = logging.getLogger(__name__)
+
+
+def datos_certificado(certificado, porcentaje_asistencia=None, plantilla=None):
+    """
+    Extrae los datos necesarios para dibujar el certificado
+    `plantilla` es el resultado de plantilla_activa() (None: diseño por defecto)
+    """
+    inscripcion = certificado.inscripcion
+    evento = inscripcion.evento
+    if porcentaje_asistencia is None:
+        porcentaje_asistencia = inscripcion.porcentaje_asistencia
+
+    return {
+        'nombre_participante': inscripcion.get_nombre_completo(),
+        'nombre_evento': evento.nombre,
+        'fecha_inicio': evento.fecha_inicio.strftime('%d de %B de %Y'),
+        'fecha_fin': evento.fecha_fin.strftime('%d de %B de %Y'),
+        'porcentaje_asistencia': porcentaje_asistencia,
+        'codigo_verificacion': certificado.codigo_verificacion,
+        'fecha_emision': certificado.fecha_generacion.strftime('%d de %B de %Y'),
+        'plantilla': plantilla,
+    }
+
+
+def plantilla_activa():
+    """
+    Datos planos de la PlantillaCertificado activa, o None si no hay ninguna
+    Incluyen el id y la fecha de modificación, que forman parte de la clave
+    de capa_fondo: editar o cambiar la plantilla genera una capa nueva.
+    """
+    from .models import PlantillaCertificado
+
+    plantilla = PlantillaCertificado.objects.filter(activa=True).first()
+    return plantilla.datos_capa() if plantilla else None
+
+
+# Capas de fondo en caché por proceso (una por evento/plantilla)
+CAPAS_EN_CACHE = 64
+
+# Colores del diseño por defecto (sin plantilla activa)
+COLOR_TEXTO = '#000000'
+
+
+@lru_cache(maxsize=CAPAS_EN_CACHE)
+def capa_fondo(nombre_evento, fecha_inicio, fecha_fin, plantilla=None):
+    """
+    Elementos invariantes del certificado de un evento, ya posicionados
+    
+    Retorna (logo, textos): `logo` es (ruta, x, y, ancho, alto) o None y
+    `textos` una tupla de (fuente, tamaño, color, x, y, texto). Los anchos
+    para centrar se calculan una sola vez por evento y plantilla, no por
+    participante. La clave incluye los datos del evento y la versión de la
+    plantilla, así una edición de cualquiera de ellos usa una capa nueva.
+    """
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.lib.units import cm
+    from reportlab.pdfbase.pdfmetrics import stringWidth
+
+    width, height = landscape(A4)
+    primario = secundario = COLOR_TEXTO
+    logo = None
+    if plantilla:
+        _, _, primario, secundario, ruta_logo = plantilla
+        if ruta_logo:
+            alto = 2.5 * cm
+            logo = (ruta_logo, (width - 2 * alto) / 2, height - 3.5 * cm, 2 * alto, alto)
+
+    textos = [
+        ("Helvetica-Bold", 36, primario, height - 5 * cm, "CERTIFICADO DE PARTICIPACIÓN"),
+        ("Helvetica", 18, secundario, height - 7 * cm, "Se otorga a:"),
+        ("Helvetica", 16, secundario, height - 11 * cm, "Por su participación en el evento"),
+        ("Helvetica-Bold", 20, primario, height - 12.5 * cm, nombre_evento),
+        ("Helvetica", 14, secundario, height - 14 * cm, f"Realizado del {fecha_inicio} al {fecha_fin}"),
+    ]
+    return logo, tuple(
+        (fuente, tamano, color, (width - stringWidth(texto, fuente, tamano)) / 2, y, texto)
+        for fuente, tamano, color, y, texto in textos
+    )
+
+
+def _capa_de(datos):
+    return capa_fondo(
+        datos['nombre_evento'], datos['fecha_inicio'], datos['fecha_fin'], datos.get('plantilla')
+    )
+
+
+def _dibujar_capa(p, capa):
+    from reportlab.lib.colors import HexColor
+
+    logo, textos = capa
+    if logo:
+        ruta, x, y, ancho, alto = logo
+        p.drawImage(ruta, x, y, ancho, alto, preserveAspectRatio=True, mask='auto')
+    for fuente, tamano, color, x, y, texto in textos:
+        p.setFillColor(HexColor(color))
+        p.setFont(fuente, tamano)
+        p.drawString(x, y, texto)
+    p.setFillColor(HexColor(COLOR_TEXTO))
+
+
+def _estampar_participante(p, datos):
+    """Dibuja solo lo que cambia por participante: nombre, porcentaje y código"""
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.lib.units import cm
+
+    width, height = landscape(A4)
+
+    # Nombre del participante
+    p.setFont("Helvetica-Bold", 28)
+    p.drawCentredString(width / 2, height - 9 * cm, datos['nombre_participante'])
+
+    # Porcentaje de asistencia
+    p.setFont("Helvetica", 12)
+    p.drawCentredString(
+        width / 2, height - 15.5 * cm,
+        f"Con un porcentaje de asistencia del {datos['porcentaje_asistencia']:.1f}%"
+    )
+
+    # Código de verificación
+    p.setFont("Helvetica", 10)
+    p.drawCentredString(
+        width / 2, 2 * cm,
+        f"Código de verificación: {datos['codigo_verificacion']}"
+    )
+
+    # Fecha de emisión
+    p.drawCentredString(
+        width / 2, 1.5 * cm,
+        f"Fecha de emisión: {datos['fecha_emision']}"
+    )
+
+
+def renderizar_pdf(datos):
+    """
+    Dibuja el certificado y retorna el PDF en bytes (HU-05, HU-19)
+    Función de módulo sin acceso a la base de datos: apta para ProcessPoolExecutor
+    """
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.pdfgen import canvas
+    from io import BytesIO
+
+    buffer = BytesIO()
+
+    # Crear el canvas en orientación horizontal
+    p = canvas.Canvas(buffer, pagesize=landscape(A4))
+    _dibujar_capa(p, _capa_de(datos))
+    _estampar_participante(p, datos)
+
+    p.showPage()
+    p.save()
+
+    contenido = buffer.getvalue()
+    buffer.close()
+    return contenido
+
+
+def renderizar_lote_pdf(lista_datos, destino=None):
+    """
+    Dibuja varios certificados en un único PDF, una página por participante
+    
+    La capa de fondo de cada evento se define una vez como form XObject y
+    cada página solo la referencia y estampa los datos del participante,
+    así el documento crece unos cientos de bytes por página.
+    Con `destino` (archivo abierto en modo binario) escribe ahí y retorna None.
+    """
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.pdfgen import canvas
+    from io import BytesIO
+
+    buffer = destino if destino is not None else BytesIO()
+    p = canvas.Canvas(buffer, pagesize=landscape(A4))
+
+    formularios = {}
+    for datos in lista_datos:
+        capa = _capa_de(datos)
+        if capa not in formularios:
+            formularios[capa] = f'fondo{len(formularios)}'
+            p.beginForm(formularios[capa])
+            _dibujar_capa(p, capa)
+            p.endForm()
+        p.doForm(formularios[capa])
+        _estampar_participante(p, datos)
+        p.showPage()
+    p.save()
+
+    if destino is None:
+        return buffer.getvalue()
+    return None
+
+
+def inscripciones_elegibles(evento):
+    """
+    Inscripciones confirmadas del evento que cumplen la asistencia mínima (HU-05)
+    La elegibilidad compara el contador asistencias_count en una sola consulta
+    """
+    return evento.inscripciones.elegibles_certificado().order_by('pk')
+
+
+def generar_lote(evento, inscripciones, executor=None):
+    """
+    Genera los PDFs de un lote de inscripciones
+    Con `executor` (ProcessPoolExecutor de la tarea) los dibuja en paralelo
+    Retorna el número de certificados generados en este lote
+    """
+    from .models import Certificado
+
+    existentes = {
+        certificado.inscripcion_id: certificado
+        for certificado in Certificado.objects.filter(inscripcion__in=inscripciones)
+    }
+    nuevos = [
+        Certificado(inscripcion=inscripcion)
+        for inscripcion in inscripciones
+        if inscripcion.pk not in existentes
+    ]
+    Certificado.objects.bulk_create(nuevos)
+    if any(certificado.pk is None for certificado in nuevos):
+        # Backends sin RETURNING: recargar para obtener las claves primarias
+        nuevos = list(Certificado.objects.filter(inscripcion__in=[c.inscripcion for c in nuevos]))
+    existentes.update({certificado.inscripcion_id: certificado for certificado in nuevos})
+    if nuevos:
+        # bulk_create no pasa por Certificado.save: un "no existe" ya en caché
+        limpiar_cache_verificacion(*[certificado.codigo_verificacion for certificado in nuevos])
+
+    # Idempotente: solo se dibujan los certificados que aún no tienen archivo
+    plantilla = plantilla_activa()
+    pendientes = []
+    for inscripcion in inscripciones:
+        certificado = existentes[inscripcion.pk]
+        if certificado.archivo_pdf:
+            continue
+        certificado.inscripcion = inscripcion
+        inscripcion.evento = evento
+        porcentaje = inscripcion.asistencias_count / evento.numero_sesiones * 100
+        pendientes.append((certificado, datos_certificado(certificado, porcentaje, plantilla)))
+
+    if not pendientes:
+        return 0
+
+    datos = [dato for _, dato in pendientes]
+    if executor is not None:
+        pdfs = list(executor.map(renderizar_pdf, datos, chunksize=10))
+    else:
+        pdfs = [renderizar_pdf(dato) for dato in datos]
+
+    for (certificado, _), pdf in zip(pendientes, pdfs):
+        nombre_archivo = f"certificado_{certificado.codigo_verificacion}.pdf"
+        certificado.archivo_pdf.save(nombre_archivo, ContentFile(pdf), save=False)
+
+    Certificado.objects.bulk_update([c for c, _ in pendientes], ['archivo_pdf'])
+    limpiar_cache_verificacion(*[c.codigo_verificacion for c, _ in pendientes])
+    return len(pendientes)
+
+
+def procesar_tarea(tarea, tamano_lote=100, procesos=None):
+    """
+    Procesa una tarea de generación masiva por lotes (HU-05, HU-19)
+    Después de cada lote se guarda el cursor (último id de inscripción) para
+    que un worker caído pueda retomar sin duplicar trabajo. Con `procesos`
+    mayor que 1, los lotes comparten un único pool de procesos.
+    """
+    evento = tarea.evento
+    elegibles = inscripciones_elegibles(evento)
+
+    if tarea.total == 0 and tarea.ultimo_id_procesado == 0:
+        tarea.total = elegibles.count()
+        tarea.save(update_fields=['total'])
+
+    try:
+        with ExitStack() as pila:
+            executor = None
+            if procesos and procesos > 1:
+                executor = pila.enter_context(ProcessPoolExecutor(max_workers=procesos))
+            _procesar_lotes(tarea, evento, elegibles, tamano_lote, executor)
+    except Exception as e:
+        logger.error(f'Error en tarea de certificados {tarea.pk}: {e}', exc_info=True)
+        tarea.marcar_error(str(e))
+        return tarea
+
+    tarea.marcar_completada()
+    return tarea
+
+
+def _procesar_lotes(tarea, evento, elegibles, tamano_lote, executor):
+    """Genera los lotes pendientes de la tarea guardando el cursor tras cada uno"""
+    while True:
+        lote = list(
+            elegibles.filter(pk__gt=tarea.ultimo_id_procesado)[:tamano_lote]
+        )
+        if not lote:
+            return
+
+        generados = generar_lote(evento, lote, executor)
+
+        with transaction.atomic():
+            tarea.ultimo_id_procesado = lote[-1].pk
+            tarea.procesados += len(lote)
+            tarea.generados += generados
+            tarea.guardar_avance('ultimo_id_procesado', 'procesados', 'generados')
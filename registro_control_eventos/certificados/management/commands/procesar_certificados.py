@@ -0,0 +1,39 @@
+"""
+Worker de generación masiva de certificados (HU-05, HU-19)
+Reclama tareas TareaGeneracionCertificados y las procesa por lotes,
+dibujando los PDF en varios procesos.
+"""
+
+import os
+
+from certificados.models import TareaGeneracionCertificados
+from certificados.generacion import procesar_tarea
+from registro_control_eventos.tareas import ComandoWorker
+
+
+class Command(ComandoWorker):
+    help = 'Procesa las tareas pendientes de generación masiva de certificados'
+    modelo = TareaGeneracionCertificados
+    nombre = 'certificados'
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            '--procesos',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Procesos para dibujar los PDF (1 = en el mismo proceso)'
+        )
+
+    def procesar(self, tarea, options):
+        procesar_tarea(tarea, tamano_lote=options['lote'], procesos=options['procesos'])
+
+    def informar(self, tarea):
+        if tarea.completada:
+            self.stdout.write(self.style.SUCCESS(
+                f'✓ Tarea {tarea.pk}: {tarea.generados} certificado(s) generado(s)'
+            ))
+        else:
+            self.stdout.write(self.style.ERROR(
+                f'✗ Tarea {tarea.pk}: {tarea.mensaje_error}'
+            ))
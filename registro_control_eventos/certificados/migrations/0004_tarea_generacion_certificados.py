@@ -0,0 +1,42 @@
+# Generated by Django 5.2.8 on 2026-10-17 21:40
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('certificados', '0003_initial'),
+        ('eventos', '0003_evento_contadores_ocupacion'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TareaGeneracionCertificados',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('estado', models.CharField(choices=[('PENDIENTE', 'Pendiente'), ('EN_PROCESO', 'En Proceso'), ('COMPLETADA', 'Completada'), ('ERROR', 'Error')], default='PENDIENTE', max_length=20)),
+                ('total', models.PositiveIntegerField(default=0, help_text='Inscripciones elegibles al iniciar la tarea')),
+                ('procesados', models.PositiveIntegerField(default=0)),
+                ('generados', models.PositiveIntegerField(default=0, help_text='PDFs generados (los existentes no se regeneran)')),
+                ('ultimo_id_procesado', models.PositiveBigIntegerField(default=0, help_text='Cursor: id de la última inscripción procesada')),
+                ('mensaje_error', models.TextField(blank=True)),
+                ('fecha_creacion', models.DateTimeField(default=django.utils.timezone.now)),
+                ('fecha_inicio', models.DateTimeField(blank=True, null=True)),
+                ('fecha_fin', models.DateTimeField(blank=True, null=True)),
+                ('fecha_latido', models.DateTimeField(blank=True, help_text='Última señal de vida del worker', null=True)),
+                ('creado_por', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+                ('evento', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tareas_certificados', to='eventos.evento')),
+            ],
+            options={
+                'verbose_name': 'Tarea de Generación de Certificados',
+                'verbose_name_plural': 'Tareas de Generación de Certificados',
+                'ordering': ['-fecha_creacion'],
+                'indexes': [models.Index(fields=['estado', 'fecha_creacion'], name='certificado_estado_1aad42_idx')],
+            },
+        ),
+    ]
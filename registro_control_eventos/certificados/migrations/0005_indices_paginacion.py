@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-17 21:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('certificados', '0004_tarea_generacion_certificados'),
+        ('inscripciones', '0004_indices_paginacion'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='certificado',
+            index=models.Index(fields=['-fecha_generacion', '-id'], name='certificado_fecha_g_5b3c27_idx'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.8 on 2026-10-17 23:40
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('certificados', '0005_indices_paginacion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='plantillacertificado',
+            name='fecha_modificacion',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, help_text='Versión de la plantilla para la caché de capas de fondo'),
+            preserve_default=False,
+        ),
+    ]
@@ -9,6 +9,7 @@ HU-20: Envío de Certificados por Correo
 from django.db import models
 from django.utils import timezone
 from inscripciones.models import Inscripcion
+from registro_control_eventos.tareas import TareaSegundoPlano
 from usuarios.models import Usuario
 import string
 import random
@@ -81,86 +82,37 @@ class Certificado(models.Model):
         indexes = [
             models.Index(fields=['codigo_verificacion']),
             models.Index(fields=['estado']),
+            # Paginación por cursor de la lista de certificados
+            models.Index(fields=['-fecha_generacion', '-id']),
         ]
     
     def __str__(self):
         return f"Certificado {self.codigo_verificacion} - {self.inscripcion.get_nombre_completo()}"
     
+    def save(self, *args, **kwargs):
+        from .verificacion import limpiar_cache_verificacion
+        super().save(*args, **kwargs)
+        limpiar_cache_verificacion(self.codigo_verificacion)
+    
+    def delete(self, *args, **kwargs):
+        from .verificacion import limpiar_cache_verificacion
+        codigo = self.codigo_verificacion
+        resultado = super().delete(*args, **kwargs)
+        limpiar_cache_verificacion(codigo)
+        return resultado
+    
     def generar_pdf(self):
         """
         Genera el PDF del certificado (HU-05, HU-19)
         """
-        from reportlab.lib.pagesizes import A4, landscape
-        from reportlab.pdfgen import canvas
-        from reportlab.lib.units import cm
-        from io import BytesIO
         from django.core.files.base import ContentFile
-        import os
-        
-        # Crear buffer
-        buffer = BytesIO()
-        
-        # Crear el canvas en orientación horizontal
-        p = canvas.Canvas(buffer, pagesize=landscape(A4))
-        width, height = landscape(A4)
-        
-        # Título del certificado
-        p.setFont("Helvetica-Bold", 36)
-        p.drawCentredString(width / 2, height - 5 * cm, "CERTIFICADO DE PARTICIPACIÓN")
-        
-        # Subtítulo
-        p.setFont("Helvetica", 18)
-        p.drawCentredString(width / 2, height - 7 * cm, "Se otorga a:")
-        
-        # Nombre del participante
-        p.setFont("Helvetica-Bold", 28)
-        p.drawCentredString(width / 2, height - 9 * cm, self.inscripcion.get_nombre_completo())
-        
-        # Descripción
-        p.setFont("Helvetica", 16)
-        texto = f"Por su participación en el evento"
-        p.drawCentredString(width / 2, height - 11 * cm, texto)
-        
-        # Nombre del evento
-        p.setFont("Helvetica-Bold", 20)
-        p.drawCentredString(width / 2, height - 12.5 * cm, self.inscripcion.evento.nombre)
-        
-        # Fechas
-        p.setFont("Helvetica", 14)
-        fecha_inicio = self.inscripcion.evento.fecha_inicio.strftime('%d de %B de %Y')
-        fecha_fin = self.inscripcion.evento.fecha_fin.strftime('%d de %B de %Y')
-        p.drawCentredString(width / 2, height - 14 * cm, f"Realizado del {fecha_inicio} al {fecha_fin}")
-        
-        # Porcentaje de asistencia
-        p.setFont("Helvetica", 12)
-        p.drawCentredString(
-            width / 2, height - 15.5 * cm,
-            f"Con un porcentaje de asistencia del {self.inscripcion.porcentaje_asistencia:.1f}%"
-        )
-        
-        # Código de verificación
-        p.setFont("Helvetica", 10)
-        p.drawCentredString(
-            width / 2, 2 * cm,
-            f"Código de verificación: {self.codigo_verificacion}"
-        )
+        from .generacion import datos_certificado, plantilla_activa, renderizar_pdf
         
-        # Fecha de emisión
-        p.drawCentredString(
-            width / 2, 1.5 * cm,
-            f"Fecha de emisión: {self.fecha_generacion.strftime('%d de %B de %Y')}"
-        )
-        
-        # Finalizar el PDF
-        p.showPage()
-        p.save()
+        pdf = renderizar_pdf(datos_certificado(self, plantilla=plantilla_activa()))
         
         # Guardar el archivo
-        buffer.seek(0)
         nombre_archivo = f"certificado_{self.codigo_verificacion}.pdf"
-        self.archivo_pdf.save(nombre_archivo, ContentFile(buffer.read()), save=True)
-        
-        buffer.close()
+        self.archivo_pdf.save(nombre_archivo, ContentFile(pdf), save=True)
         
         return self.archivo_pdf
     
@@ -230,27 +182,89 @@ Equipo de Eventos
     def generar_certificados_evento(cls, evento):
         """
         Genera certificados para todos los participantes elegibles de un evento (HU-05, HU-19)
+        Ejecución síncrona: para eventos grandes usar TareaGeneracionCertificados.encolar
         """
-        # Obtener inscripciones que cumplen requisitos
-        inscripciones_elegibles = evento.inscripciones.filter(
-            estado='CONFIRMADA'
-        )
+        from .generacion import inscripciones_elegibles, generar_lote
         
-        certificados_generados = []
+        elegibles = list(inscripciones_elegibles(evento))
+        generar_lote(evento, elegibles)
         
-        for inscripcion in inscripciones_elegibles:
-            if inscripcion.puede_generar_certificado:
-                # Verificar si ya tiene certificado
-                certificado, created = cls.objects.get_or_create(
-                    inscripcion=inscripcion
-                )
-                
-                if created or not certificado.archivo_pdf:
-                    certificado.generar_pdf()
-                
-                certificados_generados.append(certificado)
-        
-        return certificados_generados
+        return list(cls.objects.filter(inscripcion__in=elegibles))
+
+
+class TareaGeneracionCertificados(TareaSegundoPlano):
+    """
+    Tarea en segundo plano para la generación masiva de certificados (HU-05, HU-19)
+    Procesada por el comando `procesar_certificados`; el cursor
+    ultimo_id_procesado permite retomar la tarea si el worker se detiene.
+    """
+    ESTADO_CHOICES = [
+        ('PENDIENTE', 'Pendiente'),
+        ('EN_PROCESO', 'En Proceso'),
+        ('COMPLETADA', 'Completada'),
+        ('ERROR', 'Error'),
+    ]
+    
+    evento = models.ForeignKey(
+        'eventos.Evento',
+        on_delete=models.CASCADE,
+        related_name='tareas_certificados'
+    )
+    estado = models.CharField(
+        max_length=20,
+        choices=ESTADO_CHOICES,
+        default='PENDIENTE'
+    )
+    total = models.PositiveIntegerField(
+        default=0,
+        help_text="Inscripciones elegibles al iniciar la tarea"
+    )
+    procesados = models.PositiveIntegerField(default=0)
+    generados = models.PositiveIntegerField(
+        default=0,
+        help_text="PDFs generados (los existentes no se regeneran)"
+    )
+    ultimo_id_procesado = models.PositiveBigIntegerField(
+        default=0,
+        help_text="Cursor: id de la última inscripción procesada"
+    )
+    mensaje_error = models.TextField(blank=True)
+    creado_por = models.ForeignKey(
+        Usuario,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True
+    )
+    fecha_creacion = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        verbose_name = 'Tarea de Generación de Certificados'
+        verbose_name_plural = 'Tareas de Generación de Certificados'
+        ordering = ['-fecha_creacion']
+        indexes = [
+            models.Index(fields=['estado', 'fecha_creacion']),
+        ]
+    
+    def __str__(self):
+        return f"Certificados {self.evento.nombre} - {self.get_estado_display()}"
+    
+    @classmethod
+    def encolar(cls, evento, usuario=None):
+        """
+        Encola la generación para un evento
+        Si ya hay una tarea activa para el evento, la retorna en lugar de duplicarla
+        """
+        activa = cls.objects.filter(
+            evento=evento,
+            estado__in=['PENDIENTE', 'EN_PROCESO']
+        ).first()
+        if activa:
+            return activa, False
+        return cls.objects.create(evento=evento, creado_por=usuario), True
+    
+    def anotar_error(self, mensaje):
+        self.mensaje_error = mensaje
+        return 'mensaje_error'
 
 
 class PlantillaCertificado(models.Model):
@@ -276,6 +290,10 @@ class PlantillaCertificado(models.Model):
         help_text="¿Esta plantilla está activa?"
     )
     fecha_creacion = models.DateTimeField(default=timezone.now)
+    fecha_modificacion = models.DateTimeField(
+        auto_now=True,
+        help_text="Versión de la plantilla para la caché de capas de fondo"
+    )
     creada_por = models.ForeignKey(
         Usuario,
         on_delete=models.SET_NULL,
@@ -307,3 +325,23 @@ class PlantillaCertificado(models.Model):
         if self.activa:
             PlantillaCertificado.objects.filter(activa=True).update(activa=False)
         super().save(*args, **kwargs)
+    
+    def datos_capa(self):
+        """
+        Datos planos para capa_fondo: (id, versión, color primario, color
+        secundario, ruta del logo). Se pueden enviar a otros procesos.
+        """
+        ruta_logo = None
+        if self.logo:
+            try:
+                ruta_logo = self.logo.path
+            except NotImplementedError:
+                # Storage remoto sin ruta local: el certificado va sin logo
+                pass
+        return (
+            self.pk,
+            self.fecha_modificacion.isoformat(),
+            self.color_primario,
+            self.color_secundario,
+            ruta_logo,
+        )
@@ -1,3 +1,500 @@
-from django.test import TestCase
+"""
+Tests para la aplicación de Certificados
+HU-05 & HU-19: Generación Automática de Certificados
+"""
 
-# Create your tests here.
+import shutil
+import tempfile
+
+from django.core.management import call_command
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from eventos.models import Evento, TipoEvento
+from inscripciones.models import Inscripcion
+from asistencias.models import Asistencia
+from usuarios.models import Usuario
+from certificados.models import Certificado, PlantillaCertificado, TareaGeneracionCertificados
+from certificados.generacion import procesar_tarea
+
+MEDIA_TEMPORAL = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_TEMPORAL)
+class TareaGeneracionCertificadosTest(TestCase):
+    """
+    Tests para la generación masiva en segundo plano (HU-05, HU-19)
+    """
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_TEMPORAL, ignore_errors=True)
+
+    def setUp(self):
+        self.client = Client()
+        self.admin = Usuario.objects.create_user(
+            username='admin_certificados',
+            email='admin_certificados@test.com',
+            password='testpass123',
+            rol='ADMINISTRADOR',
+            documento='5560001'
+        )
+        self.evento = Evento.objects.create(
+            nombre='Curso con Certificado',
+            descripcion='Curso',
+            tipo_evento=TipoEvento.objects.create(nombre='ACADEMICO'),
+            fecha_inicio=timezone.now() - timedelta(days=4),
+            fecha_fin=timezone.now() - timedelta(days=3),
+            lugar='Sala 1',
+            cupo_maximo=100,
+            costo=Decimal('0.00'),
+            estado='PUBLICADO',
+            genera_certificado=True,
+            numero_sesiones=4,
+            porcentaje_asistencia_minimo=75,
+            creado_por=self.admin
+        )
+        self.contador = 0
+
+    def _crear_participantes(self, cantidad, sesiones):
+        for _ in range(cantidad):
+            self.contador += 1
+            inscripcion = Inscripcion.objects.create(
+                evento=self.evento,
+                nombre='Participante',
+                apellido=f'{self.contador:04d}',
+                documento=f'{8000000 + self.contador}',
+                correo=f'c{self.contador}@test.com',
+                telefono='3001234567'
+            )
+            for sesion in range(1, sesiones + 1):
+                Asistencia.objects.create(inscripcion=inscripcion, sesion=sesion)
+
+    def test_procesa_solo_elegibles_por_lotes(self):
+        """Solo quienes cumplen la asistencia mínima reciben certificado"""
+        self._crear_participantes(5, 3)
+        self._crear_participantes(2, 1)
+        tarea, _ = TareaGeneracionCertificados.encolar(self.evento, self.admin)
+
+        procesar_tarea(tarea, tamano_lote=2)
+
+        tarea.refresh_from_db()
+        self.assertEqual(tarea.estado, 'COMPLETADA')
+        self.assertEqual((tarea.total, tarea.procesados, tarea.generados), (5, 5, 5))
+        self.assertEqual(Certificado.objects.count(), 5)
+        self.assertFalse(Certificado.objects.filter(archivo_pdf='').exists())
+
+    def test_un_pool_de_procesos_por_tarea(self):
+        """Con varios procesos, todos los lotes usan el mismo pool"""
+        from concurrent.futures import ThreadPoolExecutor
+
+        self._crear_participantes(5, 3)
+        tarea, _ = TareaGeneracionCertificados.encolar(self.evento)
+
+        # Hilos en lugar de procesos: el pool se comparte igual y no se copia la conexión del test
+        with mock.patch('certificados.generacion.ProcessPoolExecutor', wraps=ThreadPoolExecutor) as pool:
+            procesar_tarea(tarea, tamano_lote=2, procesos=2)
+
+        pool.assert_called_once_with(max_workers=2)
+        tarea.refresh_from_db()
+        self.assertEqual((tarea.estado, tarea.generados), ('COMPLETADA', 5))
+
+    def test_retoma_desde_el_cursor_sin_duplicar(self):
+        """Una tarea interrumpida continúa desde el último lote guardado"""
+        self._crear_participantes(4, 4)
+        tarea, _ = TareaGeneracionCertificados.encolar(self.evento)
+
+        from certificados import generacion
+        generar_lote_real = generacion.generar_lote
+        llamadas = []
+
+        def generar_y_caer(*args):
+            llamadas.append(args)
+            if len(llamadas) > 1:
+                raise RuntimeError('caída')
+            return generar_lote_real(*args)
+
+        with mock.patch('certificados.generacion.generar_lote', side_effect=generar_y_caer):
+            procesar_tarea(tarea, tamano_lote=2)
+        tarea.refresh_from_db()
+        self.assertEqual(tarea.estado, 'ERROR')
+        self.assertEqual(tarea.procesados, 2)
+
+        # El worker retoma la tarea; los certificados ya dibujados no se regeneran
+        archivos = dict(Certificado.objects.values_list('pk', 'archivo_pdf'))
+        tarea.estado = 'PENDIENTE'
+        tarea.save(update_fields=['estado'])
+        call_command('procesar_certificados', '--una-vez', '--procesos=1', '--lote=2', stdout=mock.MagicMock())
+
+        tarea.refresh_from_db()
+        self.assertEqual(tarea.estado, 'COMPLETADA')
+        self.assertEqual((tarea.procesados, tarea.generados), (4, 4))
+        self.assertEqual(Certificado.objects.count(), 4)
+        for pk, archivo in archivos.items():
+            self.assertEqual(Certificado.objects.get(pk=pk).archivo_pdf.name, archivo)
+
+    def test_reclama_tareas_sin_latido(self):
+        """Una tarea EN_PROCESO sin latido reciente se puede reclamar de nuevo"""
+        tarea, _ = TareaGeneracionCertificados.encolar(self.evento)
+        tarea.estado = 'EN_PROCESO'
+        tarea.fecha_latido = timezone.now()
+        tarea.save()
+
+        self.assertIsNone(TareaGeneracionCertificados.reclamar_siguiente(timeout_minutos=10))
+
+        tarea.fecha_latido = timezone.now() - timedelta(minutes=30)
+        tarea.save()
+        self.assertEqual(TareaGeneracionCertificados.reclamar_siguiente(timeout_minutos=10), tarea)
+
+    def test_vista_encola_y_reporta_estado(self):
+        """generar_masivo encola una sola tarea y el estado se consulta en JSON"""
+        self._crear_participantes(1, 4)
+        self.client.login(username='admin_certificados', password='testpass123')
+        url = reverse('certificados:generar_masivo', args=[self.evento.pk])
+
+        self.client.get(url)
+        self.client.get(url)
+
+        self.assertEqual(TareaGeneracionCertificados.objects.count(), 1)
+        self.assertEqual(Certificado.objects.count(), 0)
+
+        tarea = TareaGeneracionCertificados.objects.get()
+        response = self.client.get(reverse('certificados:estado_tarea', args=[tarea.pk]))
+        self.assertEqual(response.json()['estado'], 'PENDIENTE')
+
+        procesar_tarea(tarea)
+        response = self.client.get(reverse('certificados:estado_tarea', args=[tarea.pk]))
+        self.assertEqual(response.json()['porcentaje'], 100)
+
+
+class RenderizadoCertificadosTest(TestCase):
+    """
+    Tests para la capa de fondo compartida de los certificados (HU-05, HU-19)
+    """
+
+    def _datos(self, numero, evento='Curso con Certificado'):
+        return {
+            'nombre_participante': f'Participante {numero:04d}',
+            'nombre_evento': evento,
+            'fecha_inicio': '01 de marzo de 2026',
+            'fecha_fin': '02 de marzo de 2026',
+            'porcentaje_asistencia': 87.5,
+            'codigo_verificacion': f'COD{numero:07d}',
+            'fecha_emision': '03 de marzo de 2026',
+        }
+
+    def test_capa_de_fondo_se_calcula_una_vez_por_evento(self):
+        """Los elementos fijos se posicionan una vez y se reutilizan"""
+        from certificados.generacion import capa_fondo, renderizar_pdf
+
+        capa_fondo.cache_clear()
+        for numero in range(5):
+            self.assertTrue(renderizar_pdf(self._datos(numero)).startswith(b'%PDF'))
+        self.assertEqual(capa_fondo.cache_info().misses, 1)
+        self.assertEqual(capa_fondo.cache_info().hits, 4)
+
+    def test_capa_de_fondo_sigue_a_la_plantilla_activa(self):
+        """Activar o editar la plantilla cambia la clave de la capa y sus colores"""
+        from certificados.generacion import capa_fondo, plantilla_activa, renderizar_pdf
+
+        capa_fondo.cache_clear()
+        self.assertIsNone(plantilla_activa())
+        renderizar_pdf(self._datos(1))
+
+        plantilla = PlantillaCertificado.objects.create(nombre='Institucional', activa=True, color_primario='#aa0000')
+        datos = dict(self._datos(1), plantilla=plantilla_activa())
+        renderizar_pdf(datos)
+        logo, textos = capa_fondo(datos['nombre_evento'], datos['fecha_inicio'], datos['fecha_fin'], datos['plantilla'])
+        self.assertIsNone(logo)
+        self.assertEqual(textos[0][2], '#aa0000')
+
+        plantilla.color_primario = '#00aa00'
+        plantilla.save()
+        datos = dict(self._datos(1), plantilla=plantilla_activa())
+        renderizar_pdf(datos)
+        self.assertEqual(capa_fondo.cache_info().misses, 3)
+        self.assertEqual(
+            capa_fondo(datos['nombre_evento'], datos['fecha_inicio'], datos['fecha_fin'], datos['plantilla'])[1][0][2],
+            '#00aa00'
+        )
+
+    def test_lote_comparte_el_fondo_entre_paginas(self):
+        """Un XObject por evento en el PDF combinado, más pequeño que los individuales"""
+        from certificados.generacion import renderizar_lote_pdf, renderizar_pdf
+
+        datos = [self._datos(numero) for numero in range(20)] + [self._datos(99, evento='Otro Curso')]
+        combinado = renderizar_lote_pdf(datos)
+
+        self.assertEqual(combinado.count(b'/Subtype /Form'), 2)
+        self.assertEqual(combinado.count(b'/Type /Page\n'), 21)
+        self.assertLess(len(combinado), sum(len(renderizar_pdf(dato)) for dato in datos) / 2)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_TEMPORAL)
+class DescargaCertificadosTest(TestCase):
+    """
+    Tests para la descarga de certificados por evento en ZIP o PDF único (HU-05, HU-19)
+    """
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_TEMPORAL, ignore_errors=True)
+
+    def setUp(self):
+        self.client = Client()
+        self.admin = Usuario.objects.create_user(
+            username='admin_descargas',
+            email='admin_descargas@test.com',
+            password='testpass123',
+            rol='ADMINISTRADOR',
+            documento='5560002',
+            is_staff=True
+        )
+        self.evento = Evento.objects.create(
+            nombre='Curso con Descarga',
+            descripcion='Curso',
+            tipo_evento=TipoEvento.objects.create(nombre='ACADEMICO'),
+            fecha_inicio=timezone.now() - timedelta(days=4),
+            fecha_fin=timezone.now() - timedelta(days=3),
+            lugar='Sala 1',
+            cupo_maximo=100,
+            costo=Decimal('0.00'),
+            estado='PUBLICADO',
+            genera_certificado=True,
+            numero_sesiones=2,
+            porcentaje_asistencia_minimo=50,
+            creado_por=self.admin
+        )
+        for numero in range(3):
+            inscripcion = Inscripcion.objects.create(
+                evento=self.evento,
+                nombre='Participante',
+                apellido=f'Núñez {numero}',
+                documento=f'{8100000 + numero}',
+                correo=f'd{numero}@test.com',
+                telefono='3001234567'
+            )
+            Asistencia.objects.create(inscripcion=inscripcion, sesion=1)
+        tarea, _ = TareaGeneracionCertificados.encolar(self.evento)
+        procesar_tarea(tarea)
+        self.client.login(username='admin_descargas', password='testpass123')
+
+    def _url(self, formato):
+        return reverse('certificados:descargar_evento', args=[self.evento.pk, formato])
+
+    def test_zip_contiene_los_certificados(self):
+        """El ZIP generado al vuelo es válido y trae un PDF por certificado"""
+        import io
+        import zipfile
+
+        response = self.client.get(self._url('zip'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        contenido = b''.join(response.streaming_content)
+        self.assertEqual(len(contenido), int(response['Content-Length']))
+
+        with zipfile.ZipFile(io.BytesIO(contenido)) as archivo:
+            self.assertIsNone(archivo.testzip())
+            nombres = archivo.namelist()
+            self.assertEqual(len(nombres), 3)
+            self.assertTrue(all(nombre.startswith('nunez-') for nombre in nombres))
+            for certificado in Certificado.objects.all():
+                nombre = next(n for n in nombres if certificado.codigo_verificacion in n)
+                with certificado.archivo_pdf.open('rb') as pdf:
+                    self.assertEqual(archivo.read(nombre), pdf.read())
+
+    def test_rangos_retoman_la_descarga(self):
+        """Un Range devuelve exactamente ese tramo del archivo completo"""
+        for formato in ('zip', 'pdf'):
+            response = self.client.get(self._url(formato))
+            completo = b''.join(response.streaming_content)
+            etag = response['ETag']
+            tamano = len(completo)
+
+            for inicio, fin in ((0, 9), (100, tamano - 50), (tamano - 30, tamano - 1)):
+                response = self.client.get(
+                    self._url(formato), HTTP_RANGE=f'bytes={inicio}-{fin}', HTTP_IF_RANGE=etag
+                )
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(response['Content-Range'], f'bytes {inicio}-{fin}/{tamano}')
+                self.assertEqual(b''.join(response.streaming_content), completo[inicio:fin + 1])
+
+            response = self.client.get(self._url(formato), HTTP_RANGE=f'bytes={tamano}-')
+            self.assertEqual(response.status_code, 416)
+            response = self.client.get(self._url(formato), HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"otro"')
+            self.assertEqual(response.status_code, 200)
+
+    def test_pdf_unico_y_descarga_individual(self):
+        """El PDF combinado tiene una página por certificado; el individual se envía como PDF"""
+        response = self.client.get(self._url('pdf'))
+        contenido = b''.join(response.streaming_content)
+        self.assertTrue(contenido.startswith(b'%PDF'))
+        self.assertEqual(contenido.count(b'/Type /Page\n'), 3)
+
+        certificado = Certificado.objects.first()
+        response = self.client.get(reverse('certificados:descargar', args=[certificado.pk]))
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        with certificado.archivo_pdf.open('rb') as pdf:
+            self.assertEqual(b''.join(response.streaming_content), pdf.read())
+
+        self.assertEqual(self.client.get(self._url('rar')).status_code, 404)
+
+
+    def test_pdf_combinado_une_los_guardados(self):
+        """El PDF combinado repite los PDF guardados y se reutiliza mientras no cambien"""
+        import re
+        from unittest import mock
+
+        response = self.client.get(self._url('pdf'))
+        contenido = b''.join(response.streaming_content)
+        etag = response['ETag']
+        for certificado in Certificado.objects.all():
+            with certificado.archivo_pdf.open('rb') as pdf:
+                stream = re.search(rb'stream\r?\n.*?endstream', pdf.read(), re.S).group(0)
+            self.assertIn(stream, contenido)
+
+        # Cambiar la asistencia no altera los certificados ya emitidos
+        inscripcion = Inscripcion.objects.first()
+        Asistencia.objects.create(inscripcion=inscripcion, sesion=2)
+        with mock.patch('certificados.descarga.unir_pdfs') as unir:
+            response = self.client.get(self._url('pdf'))
+            self.assertEqual(b''.join(response.streaming_content), contenido)
+        unir.assert_not_called()
+        self.assertEqual(response['ETag'], etag)
+
+        certificado = Certificado.objects.first()
+        certificado.archivo_pdf.delete(save=True)
+        response = self.client.get(self._url('pdf'))
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(b''.join(response.streaming_content).count(b'/Type /Page\n'), 2)
+
+
+class VerificacionCertificadoTest(TestCase):
+    """
+    Tests para la verificación pública con caché y límite por cliente (HU-05, HU-19)
+    """
+
+    def setUp(self):
+        from certificados import verificacion
+
+        verificacion.limpiar_cache_verificacion()
+        verificacion._cubetas.clear()
+        self.client = Client()
+        admin = Usuario.objects.create_user(
+            username='admin_verificacion',
+            email='admin_verificacion@test.com',
+            password='testpass123',
+            rol='ADMINISTRADOR',
+            documento='5560003'
+        )
+        evento = Evento.objects.create(
+            nombre='Curso Verificable',
+            descripcion='Curso',
+            tipo_evento=TipoEvento.objects.create(nombre='ACADEMICO'),
+            fecha_inicio=timezone.now() - timedelta(days=4),
+            fecha_fin=timezone.now() - timedelta(days=3),
+            lugar='Sala 1',
+            cupo_maximo=100,
+            costo=Decimal('0.00'),
+            estado='PUBLICADO',
+            genera_certificado=True,
+            numero_sesiones=2,
+            porcentaje_asistencia_minimo=50,
+            creado_por=admin
+        )
+        inscripcion = Inscripcion.objects.create(
+            evento=evento,
+            nombre='Ana',
+            apellido='Verificada',
+            documento='8200000',
+            correo='ana@test.com',
+            telefono='3001234567'
+        )
+        self.certificado = Certificado.objects.create(inscripcion=inscripcion)
+        self.url = reverse('certificados:verificar', args=[self.certificado.codigo_verificacion])
+
+    def test_resultado_en_cache_hasta_que_cambia_el_certificado(self):
+        """Las verificaciones repetidas no consultan la base de datos"""
+        response = self.client.get(self.url)
+        self.assertContains(response, 'Certificado válido')
+        self.assertContains(response, 'Ana Verificada')
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+
+        self.certificado.estado = 'ERROR'
+        self.certificado.save()
+        self.assertContains(self.client.get(self.url), 'Certificado no válido')
+
+    def test_asistencias_descartan_el_porcentaje_en_cache(self):
+        """Registrar o desmarcar asistencias actualiza el porcentaje verificado"""
+        def porcentaje():
+            return self.client.get(self.url, {'formato': 'json'}).json()['porcentaje_asistencia']
+
+        evento = self.certificado.inscripcion.evento
+        self.assertEqual(porcentaje(), 0)
+
+        Asistencia.objects.create(inscripcion=self.certificado.inscripcion, sesion=1)
+        self.assertEqual(porcentaje(), 50)
+
+        Asistencia.marcar_sesion(evento, 2, [self.certificado.inscripcion.pk])
+        self.assertEqual(porcentaje(), 100)
+
+        Asistencia.marcar_sesion(evento, 1, [])
+        self.assertEqual(porcentaje(), 50)
+
+    def test_lote_descarta_el_no_encontrado_en_cache(self):
+        """Un certificado creado con bulk_create se verifica de inmediato"""
+        from certificados.generacion import generar_lote
+
+        url = reverse('certificados:verificar', args=['LOTE000001'])
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+        inscripcion = Inscripcion.objects.create(
+            evento=self.certificado.inscripcion.evento,
+            nombre='Luis',
+            apellido='Lote',
+            documento='8200001',
+            correo='luis@test.com',
+            telefono='3001234567'
+        )
+        campo = Certificado._meta.get_field('codigo_verificacion')
+        with override_settings(MEDIA_ROOT=MEDIA_TEMPORAL), \
+                mock.patch.object(campo, '_get_default', lambda: 'LOTE000001'):
+            generar_lote(inscripcion.evento, [inscripcion])
+
+        self.assertContains(self.client.get(url), 'Luis Lote')
+
+    def test_json_con_etag(self):
+        """La variante JSON responde 304 si el resultado no cambió"""
+        response = self.client.get(self.url, {'formato': 'json'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['participante'], 'Ana Verificada')
+        self.assertIn('public', response['Cache-Control'])
+
+        response = self.client.get(
+            self.url, HTTP_ACCEPT='application/json', HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, 304)
+
+        response = self.client.get(reverse('certificados:verificar', args=['NOEXISTE00']), {'formato': 'json'})
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(response.json()['valido'])
+
+    def test_limite_por_cliente_no_consulta_la_base(self):
+        """Al agotar la cubeta se responde 429 sin tocar la base de datos"""
+        with mock.patch('certificados.verificacion.CAPACIDAD_CUBETA', 3):
+            for numero in range(3):
+                url = reverse('certificados:verificar', args=[f'ENUM{numero:06d}'])
+                self.assertEqual(self.client.get(url).status_code, 404)
+
+            with self.assertNumQueries(0):
+                response = self.client.get(reverse('certificados:verificar', args=['ENUM000099']))
+            self.assertEqual(response.status_code, 429)
+            self.assertIn('Retry-After', response)
@@ -11,8 +11,10 @@ urlpatterns = [
     path('', views.lista_certificados, name='lista'),
     path('generar-masivo/', views.generar_masivo, name='generar_masivo'),
     path('generar-masivo/<int:evento_id>/', views.generar_masivo, name='generar_masivo'),
+    path('tareas/<int:tarea_id>/estado/', views.estado_tarea, name='estado_tarea'),
     path('generar/<int:inscripcion_id>/', views.generar_certificado, name='generar'),
     path('descargar/<int:certificado_id>/', views.descargar_certificado, name='descargar'),
+    path('evento/<int:evento_id>/descargar/<str:formato>/', views.descargar_certificados_evento, name='descargar_evento'),
     path('enviar/<int:certificado_id>/', views.enviar_certificado, name='enviar'),
     path('verificar/<str:codigo>/', views.verificar_certificado, name='verificar'),
 ]
@@ -0,0 +1,142 @@
+"""
+Verificación pública de certificados
+PRCE - Plataforma de Registro y Control de Eventos
+
+HU-05 & HU-19: Generación Automática de Certificados
+
+El enlace de verificación se publica en cada certificado y lo consultan
+terceros y bots. Los resultados se guardan en la caché compartida
+(settings.CACHES), una consulta por código mientras no cambien el
+certificado ni las asistencias de su evento, y cada cliente tiene una cubeta de tokens local al proceso, de
+modo que los intentos de enumerar códigos se rechazan antes de llegar a la
+base de datos.
+"""
+
+import hashlib
+import json
+import re
+import threading
+import time
+
+from django.core.cache import cache
+
+from registro_control_eventos.cache_publico import invalidar, versiones
+
+# Resultados de verificación por código. Los códigos inexistentes se
+# recuerdan menos tiempo por si otra ruta crea el certificado sin avisar.
+SEGUNDOS_CACHE_VERIFICACION = 300
+SEGUNDOS_CACHE_NO_ENCONTRADO = 30
+
+# Cubeta de tokens por cliente: CAPACIDAD_CUBETA consultas seguidas y
+# TOKENS_POR_SEGUNDO de recarga (30 por minuto)
+CAPACIDAD_CUBETA = 20
+TOKENS_POR_SEGUNDO = 0.5
+MAX_CLIENTES_EN_CUBETA = 10000
+_cubetas = {}
+
+_bloqueo_cubetas = threading.Lock()
+
+_CODIGO = re.compile(r'^[A-Za-z0-9]{1,10}$')
+
+
+def _clave(codigo):
+    return 'verificacion:{}:{}'.format(codigo, *versiones('verificaciones'))
+
+
+def _grupo_evento(evento_id):
+    return f'verificaciones:{evento_id}'
+
+
+def limpiar_cache_verificacion(*codigos):
+    """Descarta el resultado en caché de los códigos (o de todos)"""
+    if not codigos:
+        invalidar('verificaciones')
+    else:
+        cache.delete_many([_clave(codigo) for codigo in codigos])
+
+
+def limpiar_verificaciones_evento(evento_id):
+    """
+    Descarta los resultados de los certificados de un evento
+    Se llama al cambiar sus asistencias: el resultado incluye el porcentaje
+    """
+    invalidar(_grupo_evento(evento_id))
+
+
+def _resultado(certificado):
+    inscripcion = certificado.inscripcion
+    evento = inscripcion.evento
+    resultado = {
+        'codigo': certificado.codigo_verificacion,
+        'valido': certificado.estado != 'ERROR',
+        'participante': inscripcion.get_nombre_completo(),
+        'evento': evento.nombre,
+        'fecha_inicio': evento.fecha_inicio.date().isoformat(),
+        'fecha_fin': evento.fecha_fin.date().isoformat(),
+        'numero_sesiones': evento.numero_sesiones,
+        'porcentaje_asistencia': round(inscripcion.porcentaje_asistencia, 1),
+        'fecha_emision': certificado.fecha_generacion.date().isoformat(),
+    }
+    huella = hashlib.sha1(json.dumps(resultado, sort_keys=True).encode('utf-8'))
+    resultado['etag'] = f'"{huella.hexdigest()}"'
+    return resultado
+
+
+def verificar(codigo):
+    """
+    Resultado de verificar un código: dict con los datos públicos del
+    certificado (y su 'etag'), o None si el código no existe
+    Los códigos con formato inválido no consultan la base de datos
+    """
+    if not _CODIGO.match(codigo):
+        return None
+
+    clave = _clave(codigo)
+    en_cache = cache.get(clave)
+    if en_cache is not None and (
+        en_cache['evento'] is None or
+        en_cache['version'] == versiones(_grupo_evento(en_cache['evento']))[0]
+    ):
+        return en_cache['resultado']
+
+    from .models import Certificado
+
+    certificado = Certificado.objects.select_related(
+        'inscripcion__evento'
+    ).filter(codigo_verificacion=codigo).first()
+    resultado = _resultado(certificado) if certificado else None
+    evento_id = certificado.inscripcion.evento_id if certificado else None
+    cache.set(
+        clave,
+        {
+            'resultado': resultado,
+            'evento': evento_id,
+            'version': versiones(_grupo_evento(evento_id))[0] if certificado else None,
+        },
+        SEGUNDOS_CACHE_VERIFICACION if resultado else SEGUNDOS_CACHE_NO_ENCONTRADO
+    )
+    return resultado
+
+
+def consumir_token(cliente):
+    """
+    Descuenta un token de la cubeta del cliente
+    Retorna 0 si la consulta se permite, o los segundos a esperar si no
+    """
+    ahora = time.monotonic()
+    with _bloqueo_cubetas:
+        tokens, ultimo = _cubetas.get(cliente, (CAPACIDAD_CUBETA, ahora))
+        tokens = min(CAPACIDAD_CUBETA, tokens + (ahora - ultimo) * TOKENS_POR_SEGUNDO)
+        if tokens < 1:
+            _cubetas[cliente] = (tokens, ahora)
+            return (1 - tokens) / TOKENS_POR_SEGUNDO
+
+        _cubetas[cliente] = (tokens - 1, ahora)
+        if len(_cubetas) > MAX_CLIENTES_EN_CUBETA:
+            # Las cubetas que ya se habrían recargado del todo no aportan nada
+            lleno = CAPACIDAD_CUBETA / TOKENS_POR_SEGUNDO
+            for clave in [c for c, (_, u) in _cubetas.items() if ahora - u >= lleno]:
+                del _cubetas[clave]
+            if len(_cubetas) > MAX_CLIENTES_EN_CUBETA:
+                _cubetas.clear()
+        return 0
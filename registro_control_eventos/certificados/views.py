@@ -6,8 +6,9 @@ Placeholder - Implementar según necesidades
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import HttpResponse
-from .models import Certificado
+from django.http import HttpResponse, JsonResponse
+from .models import Certificado, TareaGeneracionCertificados
+from registro_control_eventos.paginacion import paginar_por_cursor
 from inscripciones.models import Inscripcion
 
 
@@ -19,7 +20,9 @@ def lista_certificados(request):
         Q(inscripcion__usuario=request.user) | 
         Q(inscripcion__correo=request.user.email)
     ).select_related('inscripcion__evento')
-    return render(request, 'certificados/lista.html', {'certificados': certificados})
+    return render(request, 'certificados/lista.html', {
+        'certificados': paginar_por_cursor(request, certificados, ['-fecha_generacion'])
+    })
 
 
 @login_required
@@ -32,29 +35,26 @@ def generar_masivo(request, evento_id=None):
         messages.error(request, 'No tiene permisos')
         return redirect('dashboard:index')
     
-    # If evento_id is provided, generate certificates for that event
+    # Si se indica un evento, se encola la generación en segundo plano
     if evento_id:
         evento = get_object_or_404(Evento, pk=evento_id)
         
-        try:
-            certificados_generados = Certificado.generar_certificados_evento(evento)
-            
-            if len(certificados_generados) > 0:
-                messages.success(
-                    request, 
-                    f'✓ Se generaron {len(certificados_generados)} certificado(s) para {evento.nombre}. '
-                    f'Los certificados están disponibles en la lista de certificados de cada participante.'
-                )
-            else:
-                messages.warning(
-                    request,
-                    f'No se generaron certificados para {evento.nombre}. '
-                    f'Verifica que los participantes cumplan con el porcentaje mínimo de asistencia ({evento.porcentaje_asistencia_minimo}%).'
-                )
-        except Exception as e:
-            messages.error(request, f'Error al generar certificados: {str(e)}')
-            import logging
-            logging.error(f'Certificate generation error: {e}', exc_info=True)
+        if not evento.genera_certificado:
+            messages.error(request, f'El evento {evento.nombre} no genera certificados.')
+            return redirect('certificados:generar_masivo')
+        
+        tarea, creada = TareaGeneracionCertificados.encolar(evento, request.user)
+        if creada:
+            messages.success(
+                request,
+                f'✓ Se programó la generación de certificados para {evento.nombre}. '
+                f'Puede seguir el avance en esta página.'
+            )
+        else:
+            messages.info(
+                request,
+                f'Ya hay una generación en curso para {evento.nombre}.'
+            )
         
         return redirect('certificados:generar_masivo')
     
@@ -65,6 +65,13 @@ def generar_masivo(request, evento_id=None):
         inscritos_count=Count('inscripciones', filter=Q(inscripciones__estado='CONFIRMADA'))
     ).filter(inscritos_count__gt=0).order_by('-fecha_fin')
     
+    # Tareas activas y la última de cada evento, para mostrar el avance
+    tareas = {}
+    for tarea in TareaGeneracionCertificados.objects.filter(evento__in=eventos).order_by('fecha_creacion'):
+        tareas[tarea.evento_id] = tarea
+    for evento in eventos:
+        evento.tarea_certificados = tareas.get(evento.pk)
+    
     context = {
         'eventos': eventos
     }
@@ -72,10 +79,30 @@ def generar_masivo(request, evento_id=None):
     return render(request, 'certificados/generar_masivo.html', context)
 
 
+@login_required
+def estado_tarea(request, tarea_id):
+    """Estado de una tarea de generación masiva en JSON (consultado desde generar_masivo)"""
+    if not request.user.puede_gestionar_eventos():
+        return JsonResponse({'error': 'No tiene permisos'}, status=403)
+    
+    tarea = get_object_or_404(TareaGeneracionCertificados, pk=tarea_id)
+    return JsonResponse({
+        'id': tarea.pk,
+        'evento': tarea.evento_id,
+        'estado': tarea.estado,
+        'estado_display': tarea.get_estado_display(),
+        'total': tarea.total,
+        'procesados': tarea.procesados,
+        'generados': tarea.generados,
+        'porcentaje': round(tarea.porcentaje_avance, 1),
+        'mensaje_error': tarea.mensaje_error,
+    })
+
+
 @login_required
 def generar_certificado(request, inscripcion_id):
     """Genera un certificado individualmente"""
-    inscripcion = get_object_or_404(Inscripcion, pk=inscripcion_id)
+    inscripcion = get_object_or_404(Inscripcion.objects.select_related('evento'), pk=inscripcion_id)
     
     # Verificar permisos (solo admin o el propio usuario si cumple requisitos)
     es_propietario = (inscripcion.usuario == request.user) or (inscripcion.correo == request.user.email)
@@ -109,14 +136,62 @@ def descargar_certificado(request, certificado_id):
         
     if not certificado.archivo_pdf:
         certificado.generar_pdf()
-        
-    # Simulación: En lugar de descargar archivo, mostrar vista previa HTML
-    return render(request, 'certificados/ver_certificado.html', {'certificado': certificado})
     
-    # Código original comentado para referencia
-    # response = HttpResponse(certificado.archivo_pdf, content_type='application/pdf')
-    # response['Content-Disposition'] = f'attachment; filename="certificado_{certificado.codigo_verificacion}.pdf"'
-    # return response
+    # Vista previa HTML del certificado (?vista=html)
+    if request.GET.get('vista') == 'html':
+        return render(request, 'certificados/ver_certificado.html', {'certificado': certificado})
+    
+    from .descarga import respuesta_certificado
+    return respuesta_certificado(request, certificado, adjunto=request.GET.get('adjunto') == '1')
+
+
+@login_required
+def descargar_certificados_evento(request, evento_id, formato):
+    """
+    Descarga los certificados generados de un evento en un ZIP o en un solo PDF
+    La respuesta se envía por bloques y acepta Range para retomar la descarga
+    """
+    from eventos.models import Evento
+    from django.http import Http404
+    from .descarga import respuesta_por_rangos, leer_bloques, zip_certificados, pdf_combinado
+    
+    if not request.user.puede_gestionar_eventos():
+        messages.error(request, 'No tiene permisos')
+        return redirect('dashboard:index')
+    if formato not in ('zip', 'pdf'):
+        raise Http404('Formato no soportado')
+    
+    evento = get_object_or_404(Evento, pk=evento_id)
+    if not Certificado.objects.filter(inscripcion__evento=evento).exclude(archivo_pdf='').exists():
+        messages.info(request, f'El evento {evento.nombre} no tiene certificados generados.')
+        return redirect('certificados:generar_masivo')
+    
+    if formato == 'zip':
+        try:
+            archivo = zip_certificados(evento)
+        except ValueError as e:
+            messages.error(request, str(e))
+            return redirect('certificados:generar_masivo')
+        return respuesta_por_rangos(
+            request, archivo.leer, archivo.tamano,
+            f'certificados_evento_{evento.pk}.zip', 'application/zip', archivo.etag
+        )
+    
+    try:
+        ruta, tamano, etag = pdf_combinado(evento)
+    except ValueError as e:
+        messages.error(request, str(e))
+        return redirect('certificados:generar_masivo')
+    storage = Certificado._meta.get_field('archivo_pdf').storage
+    
+    def leer(inicio, fin):
+        with storage.open(ruta, 'rb') as archivo:
+            yield from leer_bloques(archivo, inicio, fin)
+    
+    return respuesta_por_rangos(
+        request, leer, tamano,
+        f'certificados_evento_{evento.pk}.pdf', 'application/pdf', etag
+    )
 
 
 @login_required
@@ -136,6 +211,43 @@ def enviar_certificado(request, certificado_id):
 
 
 def verificar_certificado(request, codigo):
-    """Verifica la validez de un certificado"""
-    certificado = get_object_or_404(Certificado, codigo_verificacion=codigo)
-    return render(request, 'certificados/verificar.html', {'certificado': certificado})
+    """
+    Verifica la validez de un certificado (página pública)
+    Con ?formato=json o Accept: application/json responde en JSON con ETag
+    """
+    from django.http import Http404
+    from django.utils.cache import patch_cache_control
+    from .verificacion import verificar, consumir_token, SEGUNDOS_CACHE_VERIFICACION
+    
+    en_json = (
+        request.GET.get('formato') == 'json' or
+        'application/json' in request.headers.get('Accept', '')
+    )
+    
+    espera = consumir_token(request.META.get('REMOTE_ADDR', ''))
+    if espera:
+        if en_json:
+            response = JsonResponse({'error': 'Demasiadas solicitudes'}, status=429)
+        else:
+            response = HttpResponse('Demasiadas solicitudes. Intente más tarde.', status=429)
+        response['Retry-After'] = str(int(espera) + 1)
+        return response
+    
+    resultado = verificar(codigo)
+    
+    if en_json:
+        if resultado is None:
+            return JsonResponse({'codigo': codigo, 'valido': False, 'error': 'Certificado no encontrado'}, status=404)
+        
+        etag = resultado['etag']
+        if etag in request.headers.get('If-None-Match', ''):
+            response = HttpResponse(status=304)
+        else:
+            response = JsonResponse({k: v for k, v in resultado.items() if k != 'etag'})
+        response['ETag'] = etag
+        patch_cache_control(response, public=True, max_age=SEGUNDOS_CACHE_VERIFICACION)
+        return response
+    
+    if resultado is None:
+        raise Http404('Certificado no encontrado')
+    return render(request, 'certificados/verificar.html', {'verificacion': resultado})
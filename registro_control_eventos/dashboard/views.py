@@ -6,14 +6,12 @@ HU-30: Panel de Estadísticas Generales
 
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
-from django.db.models import Count, Sum, Avg, Q
+from django.db.models import Q
 from django.utils import timezone
 from datetime import timedelta
 
 from eventos.models import Evento
 from inscripciones.models import Inscripcion
-from pagos.models import Pago
-from asistencias.models import Asistencia
 
 
 @login_required
@@ -43,41 +41,15 @@ def dashboard_view(request):
         if user.es_organizador() and not user.es_administrador():
             eventos_query = eventos_query.filter(creado_por=user)
         
-        stats['total_eventos'] = eventos_query.count()
-        
-        # Inscripciones
-        stats['total_inscripciones'] = Inscripcion.objects.filter(
-            evento__in=eventos_query,
-            estado='CONFIRMADA'
-        ).count()
-        
-        # Recaudado
-        total_recaudado = Pago.objects.filter(
-            inscripcion__evento__in=eventos_query,
-            estado='COMPLETADO'
-        ).aggregate(total=Sum('monto'))['total'] or 0
-        stats['total_recaudado'] = total_recaudado
-        
-        # Promedio de asistencia
-        # Eventos finalizados
-        eventos_finalizados = eventos_query.filter(estado='FINALIZADO')
-        if eventos_finalizados.exists():
-            promedios = []
-            for evento in eventos_finalizados:
-                total_inscritos = evento.inscripciones.filter(estado='CONFIRMADA').count()
-                if total_inscritos > 0:
-                    total_asistencias = evento.inscripciones.filter(
-                        estado='CONFIRMADA',
-                        asistencias__isnull=False
-                    ).distinct().count()
-                    promedio_evento = (total_asistencias / total_inscritos) * 100
-                    promedios.append(promedio_evento)
-            
-            if promedios:
-                stats['promedio_asistencia'] = sum(promedios) / len(promedios)
+        # Totales desde los contadores del evento y EstadisticaEvento (una consulta)
+        resumen = eventos_query.resumen()
+        stats['total_eventos'] = resumen['total_eventos']
+        stats['total_inscripciones'] = resumen['total_inscripciones']
+        stats['total_recaudado'] = resumen['total_recaudado']
+        stats['promedio_asistencia'] = resumen['promedio_asistencia']
         
         # Próximos eventos - CORREGIDO
-        proximos_eventos = eventos_query.filter(
+        proximos_eventos = eventos_query.with_occupancy().filter(
             fecha_inicio__gte=timezone.now(),
             estado__in=['PUBLICADO', 'EN_CURSO']
         ).select_related('tipo_evento', 'creado_por').order_by('fecha_inicio')[:5]
@@ -104,14 +76,14 @@ def dashboard_view(request):
         ).count()
         
         # Eventos en los que está inscrito
-        eventos_inscritos = Evento.objects.filter(
+        eventos_inscritos = Evento.objects.with_occupancy().filter(
             Q(inscripciones__usuario=user) | Q(inscripciones__correo=user.email),
             fecha_inicio__gte=timezone.now(),
             estado__in=['PUBLICADO', 'EN_CURSO']
         ).distinct().select_related('tipo_evento').order_by('fecha_inicio')[:5]
         
         # Eventos disponibles para inscribirse (no inscrito aún)
-        eventos_disponibles = Evento.objects.filter(
+        eventos_disponibles = Evento.objects.with_occupancy().filter(
             estado='PUBLICADO',
             fecha_inicio__gte=timezone.now()
         ).exclude(
@@ -3,7 +3,7 @@ Configuración del Admin para la aplicación de Eventos
 """
 
 from django.contrib import admin
-from .models import Evento, TipoEvento, HistorialCambioEvento
+from .models import Evento, TipoEvento, HistorialCambioEvento, EstadisticaEvento
 
 
 @admin.register(TipoEvento)
@@ -23,7 +23,10 @@ class EventoAdmin(admin.ModelAdmin):
     ]
     list_filter = ['estado', 'tipo_evento', 'fecha_inicio', 'genera_certificado']
     search_fields = ['nombre', 'descripcion', 'lugar']
-    readonly_fields = ['fecha_creacion', 'fecha_modificacion', 'creado_por', 'modificado_por']
+    readonly_fields = [
+        'fecha_creacion', 'fecha_modificacion', 'creado_por', 'modificado_por',
+        'inscritos_confirmados', 'inscritos_pendientes'
+    ]
     date_hierarchy = 'fecha_inicio'
     
     fieldsets = (
@@ -34,7 +37,7 @@ class EventoAdmin(admin.ModelAdmin):
             'fields': ('fecha_inicio', 'fecha_fin', 'lugar', 'direccion')
         }),
         ('Capacidad y Costo', {
-            'fields': ('cupo_maximo', 'costo')
+            'fields': ('cupo_maximo', 'costo', 'inscritos_confirmados', 'inscritos_pendientes')
         }),
         ('Imagen Promocional', {
             'fields': ('imagen_banner',)
@@ -89,3 +92,18 @@ class HistorialCambioEventoAdmin(admin.ModelAdmin):
     search_fields = ['evento__nombre']
     readonly_fields = ['fecha_cambio']
     ordering = ['-fecha_cambio']
+
+
+@admin.register(EstadisticaEvento)
+class EstadisticaEventoAdmin(admin.ModelAdmin):
+    """Admin para EstadisticaEvento (solo lectura, se mantiene automáticamente)"""
+    list_display = [
+        'evento', 'inscritos_confirmados', 'asistentes',
+        'sesiones_asistidas', 'total_recaudado', 'fecha_actualizacion'
+    ]
+    search_fields = ['evento__nombre']
+    list_select_related = ['evento']
+    readonly_fields = [
+        'evento', 'asistentes', 'sesiones_asistidas',
+        'total_recaudado', 'fecha_actualizacion'
+    ]
@@ -0,0 +1,30 @@
+"""
+Reconstruye los contadores de ocupación de los eventos
+(inscritos_confirmados / inscritos_pendientes) a partir de las inscripciones
+"""
+
+from django.core.management.base import BaseCommand
+from eventos.models import Evento
+
+
+class Command(BaseCommand):
+    help = 'Recalcula los contadores de inscritos confirmados y pendientes de los eventos'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--evento',
+            type=int,
+            action='append',
+            dest='eventos',
+            help='ID del evento a recalcular (se puede repetir). Por defecto todos.'
+        )
+
+    def handle(self, *args, **options):
+        eventos = Evento.objects.all()
+        if options['eventos']:
+            eventos = eventos.filter(pk__in=options['eventos'])
+
+        self.stdout.write(f'Recalculando contadores de {eventos.count()} evento(s)...')
+        corregidos = Evento.recalcular_contadores(eventos)
+
+        self.stdout.write(self.style.SUCCESS(f'✓ {corregidos} evento(s) corregido(s)'))
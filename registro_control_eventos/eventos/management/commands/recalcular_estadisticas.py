@@ -0,0 +1,37 @@
+"""
+Reconstruye la tabla materializada EstadisticaEvento
+(asistentes, sesiones asistidas y recaudo) a partir de asistencias y pagos,
+y el contador asistencias_count de las inscripciones
+"""
+
+from django.core.management.base import BaseCommand
+from eventos.models import Evento, EstadisticaEvento
+from inscripciones.models import Inscripcion
+
+
+class Command(BaseCommand):
+    help = 'Recalcula las estadísticas materializadas de los eventos'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--evento',
+            type=int,
+            action='append',
+            dest='eventos',
+            help='ID del evento a recalcular (se puede repetir). Por defecto todos.'
+        )
+
+    def handle(self, *args, **options):
+        eventos = Evento.objects.all()
+        if options['eventos']:
+            eventos = eventos.filter(pk__in=options['eventos'])
+
+        self.stdout.write('Recalculando estadísticas de eventos...')
+        procesados = EstadisticaEvento.recalcular(eventos)
+        inscripciones = Inscripcion.recalcular_asistencias(
+            Inscripcion.objects.filter(evento__in=eventos)
+        )
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ {procesados} evento(s) y {inscripciones} inscripción(es) recalculados'
+        ))
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.8 on 2026-10-17 21:33
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def poblar_contadores(apps, schema_editor):
+    """Inicializa los contadores con las inscripciones existentes"""
+    Evento = apps.get_model('eventos', 'Evento')
+    eventos = Evento.objects.annotate(
+        confirmados=Count('inscripciones', filter=Q(inscripciones__estado='CONFIRMADA')),
+        pendientes=Count('inscripciones', filter=Q(inscripciones__estado='PENDIENTE')),
+    )
+    for evento in eventos.iterator():
+        Evento.objects.filter(pk=evento.pk).update(
+            inscritos_confirmados=evento.confirmados,
+            inscritos_pendientes=evento.pendientes,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('eventos', '0002_initial'),
+        ('inscripciones', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='evento',
+            name='inscritos_confirmados',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Número de inscripciones confirmadas'),
+        ),
+        migrations.AddField(
+            model_name='evento',
+            name='inscritos_pendientes',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Número de inscripciones pendientes'),
+        ),
+        migrations.RunPython(poblar_contadores, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.8 on 2026-10-17 21:58
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('eventos', '0003_evento_contadores_ocupacion'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='evento',
+            index=models.Index(fields=['-fecha_inicio', '-id'], name='eventos_eve_fecha_i_e83a53_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='evento',
+            index=models.Index(fields=['nombre', 'id'], name='eventos_eve_nombre_4a9f92_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='evento',
+            index=models.Index(fields=['-fecha_creacion', '-id'], name='eventos_eve_fecha_c_cc43e1_idx'),
+        ),
+    ]
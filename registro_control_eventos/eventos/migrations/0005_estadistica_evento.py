@@ -0,0 +1,67 @@
+# Generated by Django 5.2.8 on 2026-10-17 22:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def poblar_estadisticas(apps, schema_editor):
+    """Calcula las estadísticas iniciales de los eventos existentes"""
+    Evento = apps.get_model('eventos', 'Evento')
+    EstadisticaEvento = apps.get_model('eventos', 'EstadisticaEvento')
+    Asistencia = apps.get_model('asistencias', 'Asistencia')
+    Pago = apps.get_model('pagos', 'Pago')
+
+    asistencias = {
+        fila['inscripcion__evento']: fila
+        for fila in Asistencia.objects.order_by().values('inscripcion__evento').annotate(
+            asistentes=Count('inscripcion', distinct=True),
+            sesiones=Count('pk'),
+        )
+    }
+    recaudado = dict(
+        Pago.objects.filter(estado='COMPLETADO').order_by().values('inscripcion__evento').annotate(
+            total=Sum('monto')
+        ).values_list('inscripcion__evento', 'total')
+    )
+
+    EstadisticaEvento.objects.bulk_create(
+        [
+            EstadisticaEvento(
+                evento_id=evento_id,
+                asistentes=asistencias.get(evento_id, {}).get('asistentes', 0),
+                sesiones_asistidas=asistencias.get(evento_id, {}).get('sesiones', 0),
+                total_recaudado=recaudado.get(evento_id) or 0,
+            )
+            for evento_id in Evento.objects.values_list('pk', flat=True).iterator()
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('eventos', '0004_indices_paginacion'),
+        ('asistencias', '0003_initial'),
+        ('pagos', '0004_indices_paginacion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EstadisticaEvento',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('asistentes', models.PositiveIntegerField(default=0, help_text='Inscripciones con al menos una sesión asistida')),
+                ('sesiones_asistidas', models.PositiveIntegerField(default=0, help_text='Total de asistencias registradas (inscripción x sesión)')),
+                ('total_recaudado', models.DecimalField(decimal_places=2, default=0, help_text='Suma de los pagos completados', max_digits=12)),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True)),
+                ('evento', models.OneToOneField(help_text='Evento al que pertenecen las estadísticas', on_delete=django.db.models.deletion.CASCADE, related_name='estadistica', to='eventos.evento')),
+            ],
+            options={
+                'verbose_name': 'Estadística de Evento',
+                'verbose_name_plural': 'Estadísticas de Eventos',
+            },
+        ),
+        migrations.RunPython(poblar_estadisticas, migrations.RunPython.noop),
+    ]
@@ -11,10 +11,15 @@ HU-09: Duplicar Evento Existente
 """
 
 from django.db import models
+from django.db.models import (
+    F, Q, Avg, Count, Sum, OuterRef, Subquery, DecimalField, ExpressionWrapper, FloatField
+)
+from django.db.models.functions import Coalesce, Greatest
 from django.utils import timezone
 from django.core.validators import MinValueValidator, FileExtensionValidator
 from django.core.exceptions import ValidationError
 from usuarios.models import Usuario
+from registro_control_eventos.cache_publico import invalidar
 
 
 def validate_image_size(image):
@@ -65,6 +70,61 @@ class TipoEvento(models.Model):
         return self.get_nombre_display()
 
 
+class EventoQuerySet(models.QuerySet):
+    """
+    QuerySet de eventos con anotaciones de ocupación en una sola consulta
+    """
+    
+    def with_occupancy(self):
+        """
+        Anota cupos libres, asistentes y recaudo de cada evento (HU-30)
+        Los confirmados salen de los contadores mantenidos en la fila del evento;
+        asistentes y recaudo de la tabla materializada EstadisticaEvento.
+        """
+        return self.annotate(
+            cupos_libres=Greatest(F('cupo_maximo') - F('inscritos_confirmados'), 0),
+            asistentes_count=Coalesce(F('estadistica__asistentes'), 0),
+            recaudado_total=Coalesce(
+                F('estadistica__total_recaudado'),
+                0,
+                output_field=DecimalField(max_digits=12, decimal_places=2)
+            ),
+        )
+    
+    def resumen(self):
+        """
+        Totales agregados de los eventos del queryset en una sola consulta (HU-30)
+        Lee los contadores del evento y la tabla EstadisticaEvento, sin recorrer
+        inscripciones, asistencias ni pagos.
+        """
+        decimal = DecimalField(max_digits=14, decimal_places=2)
+        tasa_asistencia = ExpressionWrapper(
+            F('estadistica__asistentes') * 100.0 / F('inscritos_confirmados'),
+            output_field=FloatField()
+        )
+        
+        return self.order_by().aggregate(
+            total_eventos=Count('pk'),
+            eventos_activos=Count('pk', filter=Q(estado='PUBLICADO')),
+            total_inscripciones=Coalesce(Sum('inscritos_confirmados'), 0),
+            total_pendientes=Coalesce(Sum('inscritos_pendientes'), 0),
+            total_asistentes=Coalesce(Sum('estadistica__asistentes'), 0),
+            total_recaudado=Coalesce(Sum('estadistica__total_recaudado'), 0, output_field=decimal),
+            # Promedio de la tasa de asistencia de los eventos finalizados con confirmados
+            promedio_asistencia=Coalesce(
+                Avg(
+                    Coalesce(tasa_asistencia, 0.0),
+                    filter=Q(estado='FINALIZADO', inscritos_confirmados__gt=0)
+                ),
+                0.0
+            ),
+        )
+    
+    def disponibles(self):
+        """Eventos con al menos un cupo libre (filtro en SQL)"""
+        return self.filter(inscritos_confirmados__lt=F('cupo_maximo'))
+
+
 class Evento(models.Model):
     """
     Modelo principal de Evento
@@ -188,6 +248,22 @@ class Evento(models.Model):
         help_text="Número de sesiones del evento"
     )
     
+    # Contadores de ocupación (mantenidos por Inscripcion con F(), ver reservar_cupo)
+    inscritos_confirmados = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text="Número de inscripciones confirmadas"
+    )
+    inscritos_pendientes = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text="Número de inscripciones pendientes"
+    )
+    
+    CAMPOS_CONTADORES = ('inscritos_confirmados', 'inscritos_pendientes')
+    
+    objects = EventoQuerySet.as_manager()
+    
     class Meta:
         verbose_name = 'Evento'
         verbose_name_plural = 'Eventos'
@@ -196,6 +272,10 @@ class Evento(models.Model):
             models.Index(fields=['estado']),
             models.Index(fields=['fecha_inicio']),
             models.Index(fields=['tipo_evento']),
+            # Paginación por cursor de la lista de eventos (ORDENES_EVENTOS)
+            models.Index(fields=['-fecha_inicio', '-id']),
+            models.Index(fields=['nombre', 'id']),
+            models.Index(fields=['-fecha_creacion', '-id']),
         ]
     
     def __str__(self):
@@ -217,13 +297,100 @@ class Evento(models.Model):
     def save(self, *args, **kwargs):
         """Override save para ejecutar validaciones"""
         self.full_clean()
+        es_nuevo = self._state.adding
+        
+        # Los contadores solo se modifican con F(); no sobrescribirlos con
+        # valores en memoria que pueden estar desactualizados
+        if not self._state.adding and not kwargs.get('update_fields') and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.CAMPOS_CONTADORES
+            ]
         super().save(*args, **kwargs)
+        invalidar('catalogo')
+        
+        # Recalcular la fecha del recordatorio si cambió el inicio del evento (HU-22)
+        configuracion = None if es_nuevo else getattr(self, 'configuracion_recordatorio', None)
+        if configuracion and configuracion.fecha_recordatorio != configuracion.calcular_fecha_recordatorio():
+            configuracion.save(update_fields=['fecha_recordatorio'])
+    
+    def delete(self, *args, **kwargs):
+        resultado = super().delete(*args, **kwargs)
+        invalidar('catalogo')
+        return resultado
+    
+    def reservar_cupo(self):
+        """
+        Reserva atómicamente un cupo confirmado (HU-03)
+        Un único UPDATE condicional: falla si el evento ya está lleno
+        """
+        reservado = Evento.objects.filter(
+            pk=self.pk,
+            inscritos_confirmados__lt=F('cupo_maximo')
+        ).update(inscritos_confirmados=F('inscritos_confirmados') + 1)
+        
+        if not reservado:
+            raise ValueError('Evento sin cupos disponibles')
+        
+        self.inscritos_confirmados += 1
+        if self.inscritos_confirmados >= self.cupo_maximo:
+            # Se llenó: sale del catálogo público
+            invalidar('catalogo')
+    
+    def ajustar_contadores(self, confirmados=0, pendientes=0):
+        """Aplica incrementos/decrementos a los contadores sin leer el evento"""
+        cambios = {}
+        for campo, delta in (('inscritos_confirmados', confirmados), ('inscritos_pendientes', pendientes)):
+            if delta > 0:
+                cambios[campo] = F(campo) + delta
+            elif delta < 0:
+                cambios[campo] = Greatest(F(campo) + delta, 0)
+            else:
+                continue
+            setattr(self, campo, max(0, getattr(self, campo) + delta))
+        
+        if cambios:
+            Evento.objects.filter(pk=self.pk).update(**cambios)
+        
+        # Liberar un cupo de un evento lleno lo devuelve al catálogo público
+        # (sin cupo_maximo cargado no se sabe si estaba lleno)
+        if confirmados < 0 and (
+            self.cupo_maximo is None or
+            self.inscritos_confirmados < self.cupo_maximo <= self.inscritos_confirmados - confirmados
+        ):
+            invalidar('catalogo')
+    
+    @classmethod
+    def recalcular_contadores(cls, eventos=None):
+        """
+        Reconstruye los contadores de ocupación desde las inscripciones
+        Retorna el número de eventos corregidos
+        """
+        if eventos is None:
+            eventos = cls.objects.all()
+        
+        eventos = eventos.order_by().annotate(
+            confirmados_reales=Count('inscripciones', filter=Q(inscripciones__estado='CONFIRMADA')),
+            pendientes_reales=Count('inscripciones', filter=Q(inscripciones__estado='PENDIENTE')),
+        )
+        
+        corregidos = []
+        for evento in eventos.only('pk', *cls.CAMPOS_CONTADORES).iterator(chunk_size=2000):
+            if (evento.inscritos_confirmados != evento.confirmados_reales or
+                    evento.inscritos_pendientes != evento.pendientes_reales):
+                evento.inscritos_confirmados = evento.confirmados_reales
+                evento.inscritos_pendientes = evento.pendientes_reales
+                corregidos.append(evento)
+        
+        cls.objects.bulk_update(corregidos, cls.CAMPOS_CONTADORES, batch_size=500)
+        return len(corregidos)
     
     @property
     def cupos_disponibles(self):
         """Calcula los cupos disponibles del evento"""
-        inscritos = self.inscripciones.filter(estado='CONFIRMADA').count()
-        return max(0, self.cupo_maximo - inscritos)
+        if hasattr(self, 'cupos_libres'):
+            return self.cupos_libres
+        return max(0, self.cupo_maximo - self.inscritos_confirmados)
     
     @property
     def esta_lleno(self):
@@ -233,16 +400,18 @@ class Evento(models.Model):
     @property
     def total_inscritos(self):
         """Total de inscritos confirmados"""
-        return self.inscripciones.filter(estado='CONFIRMADA').count()
+        return self.inscritos_confirmados
     
     @property
     def tiene_inscripciones_confirmadas(self):
         """Verifica si el evento tiene inscripciones confirmadas"""
-        return self.inscripciones.filter(estado='CONFIRMADA').exists()
+        return self.inscritos_confirmados > 0
     
     @property
     def total_asistencias(self):
         """Total de asistencias registradas"""
+        if hasattr(self, 'asistentes_count'):
+            return self.asistentes_count
         return self.inscripciones.filter(asistencias__isnull=False).distinct().count()
     
     @property
@@ -325,6 +494,9 @@ class Evento(models.Model):
     
     def total_recaudado(self):
         """Calcula el total recaudado del evento"""
+        if hasattr(self, 'recaudado_total'):
+            return self.recaudado_total
+        
         from pagos.models import Pago
         return Pago.objects.filter(
             inscripcion__evento=self,
@@ -334,6 +506,142 @@ class Evento(models.Model):
         )['total'] or 0
 
 
+class EstadisticaEvento(models.Model):
+    """
+    Estadísticas materializadas por evento (HU-30)
+    
+    Se mantienen con incrementos F() desde Asistencia, Pago e Inscripcion
+    (ver ajustar) y se reconstruyen con el comando `recalcular_estadisticas`.
+    Los inscritos confirmados y pendientes viven en los contadores del propio
+    Evento; aquí se guardan las cifras que dependen de otras tablas.
+    """
+    evento = models.OneToOneField(
+        Evento,
+        on_delete=models.CASCADE,
+        related_name='estadistica',
+        help_text="Evento al que pertenecen las estadísticas"
+    )
+    asistentes = models.PositiveIntegerField(
+        default=0,
+        help_text="Inscripciones con al menos una sesión asistida"
+    )
+    sesiones_asistidas = models.PositiveIntegerField(
+        default=0,
+        help_text="Total de asistencias registradas (inscripción x sesión)"
+    )
+    total_recaudado = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=0,
+        help_text="Suma de los pagos completados"
+    )
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+    
+    CAMPOS_ESTADISTICAS = ('asistentes', 'sesiones_asistidas', 'total_recaudado')
+    
+    class Meta:
+        verbose_name = 'Estadística de Evento'
+        verbose_name_plural = 'Estadísticas de Eventos'
+    
+    def __str__(self):
+        return f"Estadísticas - {self.evento.nombre}"
+    
+    @property
+    def inscritos_confirmados(self):
+        return self.evento.inscritos_confirmados
+    
+    @property
+    def inscritos_pendientes(self):
+        return self.evento.inscritos_pendientes
+    
+    @property
+    def porcentaje_asistencia(self):
+        """Porcentaje de confirmados que asistieron al menos a una sesión"""
+        if self.inscritos_confirmados == 0:
+            return 0
+        return self.asistentes / self.inscritos_confirmados * 100
+    
+    @classmethod
+    def ajustar(cls, evento_id, asistentes=0, sesiones_asistidas=0, recaudado=0):
+        """
+        Aplica incrementos/decrementos sin leer la fila
+        La fila se crea la primera vez que el evento recibe un ajuste.
+        """
+        cambios = {}
+        for campo, delta in (
+            ('asistentes', asistentes),
+            ('sesiones_asistidas', sesiones_asistidas),
+            ('total_recaudado', recaudado),
+        ):
+            if delta > 0:
+                cambios[campo] = F(campo) + delta
+            elif delta < 0:
+                cambios[campo] = Greatest(F(campo) + delta, 0)
+        
+        if not cambios:
+            return
+        
+        cambios['fecha_actualizacion'] = timezone.now()
+        if not cls.objects.filter(evento_id=evento_id).update(**cambios):
+            cls.objects.get_or_create(evento_id=evento_id)
+            cls.objects.filter(evento_id=evento_id).update(**cambios)
+    
+    @classmethod
+    def recalcular(cls, eventos=None):
+        """
+        Reconstruye las estadísticas desde asistencias y pagos
+        Retorna el número de eventos procesados
+        """
+        from asistencias.models import Asistencia
+        from pagos.models import Pago
+        
+        if eventos is None:
+            eventos = Evento.objects.all()
+        
+        asistencias = Asistencia.objects.filter(
+            inscripcion__evento=OuterRef('pk')
+        ).order_by().values('inscripcion__evento')
+        
+        recaudado = Pago.objects.filter(
+            inscripcion__evento=OuterRef('pk'),
+            estado='COMPLETADO'
+        ).order_by().values('inscripcion__evento').annotate(
+            total=Sum('monto')
+        ).values('total')
+        
+        decimal = DecimalField(max_digits=12, decimal_places=2)
+        eventos = eventos.order_by('pk').annotate(
+            asistentes_reales=Coalesce(Subquery(
+                asistencias.annotate(total=Count('inscripcion', distinct=True)).values('total')
+            ), 0),
+            sesiones_reales=Coalesce(Subquery(
+                asistencias.annotate(total=Count('pk')).values('total')
+            ), 0),
+            recaudado_real=Coalesce(Subquery(recaudado, output_field=decimal), 0, output_field=decimal),
+        ).values_list('pk', 'asistentes_reales', 'sesiones_reales', 'recaudado_real')
+        
+        ahora = timezone.now()
+        estadisticas = [
+            cls(
+                evento_id=evento_id,
+                asistentes=asistentes,
+                sesiones_asistidas=sesiones,
+                total_recaudado=total,
+                fecha_actualizacion=ahora,
+            )
+            for evento_id, asistentes, sesiones, total in eventos.iterator(chunk_size=2000)
+        ]
+        
+        cls.objects.bulk_create(
+            estadisticas,
+            batch_size=500,
+            update_conflicts=True,
+            unique_fields=['evento'],
+            update_fields=[*cls.CAMPOS_ESTADISTICAS, 'fecha_actualizacion'],
+        )
+        return len(estadisticas)
+
+
 class HistorialCambioEvento(models.Model):
     """
     Modelo para registrar cambios importantes en eventos (HU-02)
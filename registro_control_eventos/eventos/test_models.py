@@ -179,3 +179,147 @@ class TestEventoModel:
         evento.save()
         assert not evento.puede_inscribirse
 
+
+
+@pytest.mark.django_db
+class TestContadoresOcupacion:
+    """Tests para los contadores de ocupación y la reserva de cupos (HU-03)"""
+    
+    @pytest.fixture
+    def evento(self):
+        organizador = Usuario.objects.create_user(
+            username='organizador_cupos',
+            email='cupos@test.com',
+            password='Test123456',
+            documento='87654321',
+            rol='ORGANIZADOR'
+        )
+        tipo = TipoEvento.objects.create(nombre='CULTURAL')
+        fecha_inicio = timezone.now() + timedelta(days=7)
+        return Evento.objects.create(
+            nombre='Evento con Contadores',
+            descripcion='Descripción',
+            tipo_evento=tipo,
+            fecha_inicio=fecha_inicio,
+            fecha_fin=fecha_inicio + timedelta(hours=3),
+            lugar='Auditorio',
+            cupo_maximo=2,
+            costo=10000,
+            creado_por=organizador,
+            estado='PUBLICADO'
+        )
+    
+    def _inscribir(self, evento, documento, estado='PENDIENTE'):
+        from inscripciones.models import Inscripcion
+        return Inscripcion.objects.create(
+            evento=evento,
+            nombre='Ana',
+            apellido='Gómez',
+            documento=documento,
+            correo=f'{documento}@test.com',
+            telefono='3001234567',
+            estado=estado
+        )
+    
+    def test_transiciones_actualizan_contadores(self, evento):
+        """Test: Confirmar y cancelar mueven los contadores"""
+        inscripcion = self._inscribir(evento, '100001')
+        evento.refresh_from_db()
+        assert evento.inscritos_pendientes == 1
+        assert evento.inscritos_confirmados == 0
+        
+        inscripcion.confirmar()
+        evento.refresh_from_db()
+        assert evento.inscritos_pendientes == 0
+        assert evento.total_inscritos == 1
+        assert evento.cupos_disponibles == 1
+        
+        inscripcion.cancelar()
+        evento.refresh_from_db()
+        assert evento.inscritos_confirmados == 0
+        
+        otra = self._inscribir(evento, '100002', estado='CONFIRMADA')
+        otra.delete()
+        evento.refresh_from_db()
+        assert evento.inscritos_confirmados == 0
+    
+    def test_reserva_falla_con_evento_lleno(self, evento):
+        """Test: No se puede confirmar por encima del cupo máximo"""
+        self._inscribir(evento, '200001', estado='CONFIRMADA')
+        self._inscribir(evento, '200002', estado='CONFIRMADA')
+        pendiente = self._inscribir(evento, '200003')
+        
+        with pytest.raises(ValueError):
+            pendiente.confirmar()
+        
+        evento.refresh_from_db()
+        assert evento.esta_lleno
+        assert evento.inscritos_confirmados == 2
+        assert evento.inscritos_pendientes == 1
+    
+    def test_guardar_evento_no_sobrescribe_contadores(self, evento):
+        """Test: Un Evento en memoria desactualizado no pisa los contadores"""
+        copia = Evento.objects.get(pk=evento.pk)
+        self._inscribir(evento, '300001', estado='CONFIRMADA')
+        
+        copia.lugar = 'Sala B'
+        copia.save()
+        
+        evento.refresh_from_db()
+        assert evento.lugar == 'Sala B'
+        assert evento.inscritos_confirmados == 1
+    
+    def test_recalcular_contadores(self, evento):
+        """Test: El recálculo corrige contadores desalineados"""
+        self._inscribir(evento, '400001', estado='CONFIRMADA')
+        Evento.objects.filter(pk=evento.pk).update(inscritos_confirmados=0, inscritos_pendientes=5)
+        
+        assert Evento.recalcular_contadores() == 1
+        evento.refresh_from_db()
+        assert evento.inscritos_confirmados == 1
+        assert evento.inscritos_pendientes == 0
+    
+    def test_with_occupancy_anota_en_una_consulta(self, evento, django_assert_num_queries):
+        """Test: with_occupancy anota cupos, asistentes y recaudo"""
+        from asistencias.models import Asistencia
+        from pagos.models import Pago, MetodoPago
+        
+        inscripcion = self._inscribir(evento, '500001', estado='CONFIRMADA')
+        self._inscribir(evento, '500002', estado='CONFIRMADA')
+        Asistencia.objects.create(inscripcion=inscripcion, sesion=1)
+        metodo = MetodoPago.objects.create(codigo='EFECTIVO', nombre='Efectivo')
+        Pago.objects.create(inscripcion=inscripcion, monto=10000, metodo_pago=metodo, estado='COMPLETADO')
+        
+        with django_assert_num_queries(1):
+            anotado = Evento.objects.with_occupancy().get(pk=evento.pk)
+            assert anotado.total_inscritos == 2
+            assert anotado.cupos_disponibles == 0
+            assert anotado.total_asistencias == 1
+            assert anotado.total_recaudado() == 10000
+        
+        assert not Evento.objects.disponibles().filter(pk=evento.pk).exists()
+
+    def test_lista_en_consultas_constantes(self, evento, client):
+        """Test: La lista de eventos cuesta lo mismo con 1 o con 6 eventos"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from django.urls import reverse
+
+        client.force_login(evento.creado_por)
+        url = reverse('eventos:lista')
+        # La primera página guarda el token CSRF en la sesión
+        client.get(url)
+        with CaptureQueriesContext(connection) as consultas:
+            assert client.get(url).status_code == 200
+        esperado = len(consultas)
+
+        for numero in range(5):
+            Evento.objects.create(
+                nombre=f'Evento {numero}', descripcion='Descripción', tipo_evento=evento.tipo_evento,
+                fecha_inicio=evento.fecha_inicio, fecha_fin=evento.fecha_fin, lugar='Sala',
+                cupo_maximo=10, costo=0, creado_por=evento.creado_por, estado='PUBLICADO'
+            )
+        with CaptureQueriesContext(connection) as consultas:
+            response = client.get(url)
+        assert len(consultas) == esperado
+        assert all(hasattr(e, 'asistentes_count') for e in response.context['eventos'])
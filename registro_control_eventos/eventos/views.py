@@ -11,6 +11,11 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from .models import Evento
 from .forms import EventoForm
+from registro_control_eventos.paginacion import paginar_por_cursor
+
+
+# Órdenes permitidos en la lista de eventos
+ORDENES_EVENTOS = ['-fecha_inicio', 'fecha_inicio', 'nombre', '-nombre', '-fecha_creacion']
 
 
 @login_required
@@ -19,11 +24,11 @@ def lista_eventos(request):
     from django.db.models import Q
     from django.utils import timezone
     
-    # Base query según permisos
+    # Base query según permisos; la ocupación se anota en la misma consulta
     if request.user.puede_gestionar_eventos():
-        eventos = Evento.objects.select_related('tipo_evento', 'creado_por').all()
+        eventos = Evento.objects.with_occupancy().select_related('tipo_evento', 'creado_por')
     else:
-        eventos = Evento.objects.filter(estado='PUBLICADO').select_related('tipo_evento')
+        eventos = Evento.objects.with_occupancy().filter(estado='PUBLICADO').select_related('tipo_evento')
     
     # Filtros
     tipo_filtro = request.GET.get('tipo')
@@ -62,16 +67,18 @@ def lista_eventos(request):
         except ValueError:
             pass
     
-    # Ordenar
+    # Ordenar (solo por los campos que tienen índice para paginar)
     orden = request.GET.get('orden', '-fecha_inicio')
-    eventos = eventos.order_by(orden)
+    if orden not in ORDENES_EVENTOS:
+        orden = '-fecha_inicio'
     
     # Obtener tipos de evento para filtro
     from .models import TipoEvento
     tipos_evento = TipoEvento.objects.filter(activo=True)
     
     context = {
-        'eventos': eventos,
+        'eventos': paginar_por_cursor(request, eventos, [orden]),
+        'total_eventos': eventos.count(),
         'tipos_evento': tipos_evento,
         'filtros_activos': {
             'tipo': tipo_filtro,
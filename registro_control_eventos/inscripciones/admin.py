@@ -2,7 +2,10 @@
 Configuración del Admin para la aplicación de Inscripciones
 """
 
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.db import transaction
+from eventos.models import Evento, EstadisticaEvento
+from registro_control_eventos.cache_publico import invalidar
 from .models import Inscripcion, RegistroMasivo
 
 
@@ -16,6 +19,8 @@ class InscripcionAdmin(admin.ModelAdmin):
     list_filter = ['estado', 'evento', 'fecha_inscripcion', 'registro_masivo']
     search_fields = ['nombre', 'apellido', 'documento', 'correo']
     readonly_fields = ['codigo_qr', 'fecha_inscripcion', 'fecha_confirmacion', 'porcentaje_asistencia']
+    # porcentaje_asistencia lee el contador y el evento: sin consultas por fila
+    list_select_related = ['evento']
     date_hierarchy = 'fecha_inscripcion'
     
     fieldsets = (
@@ -40,9 +45,21 @@ class InscripcionAdmin(admin.ModelAdmin):
     
     def confirmar_inscripciones(self, request, queryset):
         """Acción para confirmar inscripciones"""
+        confirmadas = 0
+        sin_cupo = 0
         for inscripcion in queryset:
-            inscripcion.confirmar()
-        self.message_user(request, f"{queryset.count()} inscripción(es) confirmada(s).")
+            try:
+                inscripcion.confirmar()
+                confirmadas += 1
+            except ValueError:
+                sin_cupo += 1
+        self.message_user(request, f"{confirmadas} inscripción(es) confirmada(s).")
+        if sin_cupo:
+            self.message_user(
+                request,
+                f"{sin_cupo} inscripción(es) no se confirmaron: el evento no tiene cupos disponibles.",
+                messages.WARNING
+            )
     confirmar_inscripciones.short_description = "Confirmar inscripciones seleccionadas"
     
     def cancelar_inscripciones(self, request, queryset):
@@ -51,16 +68,38 @@ class InscripcionAdmin(admin.ModelAdmin):
             inscripcion.cancelar()
         self.message_user(request, f"{queryset.count()} inscripción(es) cancelada(s).")
     cancelar_inscripciones.short_description = "Cancelar inscripciones seleccionadas"
+    
+    def delete_queryset(self, request, queryset):
+        """
+        Borrado masivo: el DELETE no pasa por Inscripcion.delete, así que se
+        reconstruyen los contadores y estadísticas de los eventos afectados
+        """
+        from asistencias.checkin import invalidar_roster
+        from certificados.verificacion import limpiar_verificaciones_evento
+        
+        eventos_ids = set(queryset.values_list('evento_id', flat=True))
+        with transaction.atomic():
+            super().delete_queryset(request, queryset)
+            eventos = Evento.objects.filter(pk__in=eventos_ids)
+            Evento.recalcular_contadores(eventos)
+            EstadisticaEvento.recalcular(eventos)
+        invalidar('catalogo')
+        for evento_id in eventos_ids:
+            invalidar_roster(evento_id)
+            limpiar_verificaciones_evento(evento_id)
 
 
 @admin.register(RegistroMasivo)
 class RegistroMasivoAdmin(admin.ModelAdmin):
     """Admin para RegistroMasivo"""
     list_display = [
-        'evento', 'fecha_carga', 'cargado_por',
+        'evento', 'fecha_carga', 'cargado_por', 'estado',
         'total_registros', 'registros_exitosos', 'registros_fallidos'
     ]
-    list_filter = ['fecha_carga', 'evento']
+    list_filter = ['estado', 'fecha_carga', 'evento']
     search_fields = ['evento__nombre']
-    readonly_fields = ['fecha_carga', 'total_registros', 'registros_exitosos', 'registros_fallidos']
+    readonly_fields = [
+        'fecha_carga', 'total_registros', 'registros_exitosos', 'registros_fallidos',
+        'filas_procesadas', 'fecha_inicio', 'fecha_fin', 'fecha_latido'
+    ]
     date_hierarchy = 'fecha_carga'
@@ -0,0 +1,198 @@
+"""
+Importación masiva de inscripciones desde CSV/XLSX
+HU-10: Registro Masivo de Asistentes
+
+El archivo se lee fila por fila. Cada fila se valida con InscripcionPublicaForm
+sin evento (sin consultas por fila); los duplicados se detectan contra
+conjuntos de documentos y correos precargados y las inscripciones válidas se
+insertan con bulk_create por lotes.
+"""
+
+import csv
+import io
+import logging
+import unicodedata
+from itertools import islice
+
+from django.db import transaction
+from django.utils import timezone
+
+from eventos.models import Evento
+from .forms import InscripcionPublicaForm
+from .models import Inscripcion
+
+logger = logging.getLogger(__name__)
+
+COLUMNAS = ['nombre', 'apellido', 'documento', 'correo', 'telefono']
+EXTENSIONES = ('.csv', '.xlsx')
+TAMANO_LOTE = 500
+
+
+def _normalizar_encabezado(valor):
+    """'Teléfono ' -> 'telefono'"""
+    texto = unicodedata.normalize('NFKD', str(valor or ''))
+    return texto.encode('ascii', 'ignore').decode().strip().lower()
+
+
+def _normalizar_valor(valor):
+    if valor is None:
+        return ''
+    # Excel guarda documentos y teléfonos como números
+    if isinstance(valor, float) and valor.is_integer():
+        valor = int(valor)
+    return str(valor).strip()
+
+
+def _filas_csv(archivo):
+    texto = io.TextIOWrapper(archivo, encoding='utf-8-sig', newline='')
+    primera = texto.readline()
+    # Excel en español exporta el CSV separado por punto y coma
+    delimitador = ';' if primera.count(';') > primera.count(',') else ','
+    yield next(csv.reader([primera], delimiter=delimitador), [])
+    yield from csv.reader(texto, delimiter=delimitador)
+
+
+def _filas_xlsx(archivo):
+    from openpyxl import load_workbook
+
+    libro = load_workbook(archivo, read_only=True, data_only=True)
+    try:
+        yield from libro.active.iter_rows(values_only=True)
+    finally:
+        libro.close()
+
+
+def leer_filas(archivo, nombre_archivo):
+    """
+    Genera tuplas (numero_fila, datos) por cada fila con contenido
+    Lanza ValueError si el formato o los encabezados no son válidos
+    """
+    nombre_archivo = nombre_archivo.lower()
+    if nombre_archivo.endswith('.csv'):
+        filas = _filas_csv(archivo)
+    elif nombre_archivo.endswith('.xlsx'):
+        filas = _filas_xlsx(archivo)
+    else:
+        raise ValueError('Formato de archivo no soportado (use .csv o .xlsx)')
+
+    encabezados = [_normalizar_encabezado(valor) for valor in next(filas, [])]
+    faltantes = [columna for columna in COLUMNAS if columna not in encabezados]
+    if faltantes:
+        raise ValueError(f"Faltan columnas requeridas: {', '.join(faltantes)}")
+
+    for numero, fila in enumerate(filas, start=2):
+        valores = [_normalizar_valor(valor) for valor in fila]
+        if not any(valores):
+            continue
+        yield numero, dict(zip(encabezados, valores))
+
+
+def _mensaje_errores(form):
+    return '; '.join(
+        mensaje for mensajes in form.errors.values() for mensaje in mensajes
+    )
+
+
+def _importar_lote(registro, lote, documentos, correos):
+    """
+    Valida e inserta un lote de filas
+    El lote y el avance del registro se guardan en la misma transacción
+    """
+    evento = registro.evento
+    errores = []
+    validas = []
+
+    for numero, datos in lote:
+        form = InscripcionPublicaForm(data=datos)
+        if not form.is_valid():
+            errores.append((numero, _mensaje_errores(form)))
+            continue
+
+        datos_limpios = {campo: form.cleaned_data[campo] for campo in COLUMNAS}
+        if datos_limpios['documento'] in documentos:
+            errores.append((numero, 'Ya existe una inscripción con este documento para este evento'))
+            continue
+        if datos_limpios['correo'] in correos:
+            errores.append((numero, 'Ya se encuentra inscrito a este evento'))
+            continue
+
+        documentos.add(datos_limpios['documento'])
+        correos.add(datos_limpios['correo'])
+        validas.append((numero, datos_limpios))
+
+    with transaction.atomic():
+        if evento.es_gratuito:
+            # Eventos gratuitos: las inscripciones quedan confirmadas y ocupan cupo.
+            # El bloqueo del evento serializa la reserva con las inscripciones individuales.
+            ocupacion = Evento.objects.select_for_update().values(
+                'cupo_maximo', 'inscritos_confirmados'
+            ).get(pk=evento.pk)
+            libres = max(0, ocupacion['cupo_maximo'] - ocupacion['inscritos_confirmados'])
+            for numero, _ in validas[libres:]:
+                errores.append((numero, 'Evento sin cupos disponibles'))
+            validas = validas[:libres]
+            estado = {
+                'estado': 'CONFIRMADA',
+                'pago_confirmado': True,
+                'fecha_confirmacion': timezone.now(),
+            }
+        else:
+            estado = {'estado': 'PENDIENTE'}
+
+        Inscripcion.objects.bulk_create([
+            Inscripcion(evento=evento, registro_masivo=True, **datos, **estado)
+            for _, datos in validas
+        ])
+        if estado['estado'] == 'CONFIRMADA':
+            evento.ajustar_contadores(confirmados=len(validas))
+        else:
+            evento.ajustar_contadores(pendientes=len(validas))
+
+        registro.filas_procesadas += len(lote)
+        registro.registros_exitosos += len(validas)
+        registro.registros_fallidos += len(lote) - len(validas)
+        if errores:
+            registro.reporte_errores += ''.join(
+                f"Fila {numero}: {mensaje}\n" for numero, mensaje in sorted(errores)
+            )
+        registro.guardar_avance(
+            'filas_procesadas', 'registros_exitosos', 'registros_fallidos', 'reporte_errores'
+        )
+
+
+def procesar_registro(registro, tamano_lote=TAMANO_LOTE):
+    """
+    Importa el archivo de un RegistroMasivo (HU-10)
+    Las filas ya procesadas (filas_procesadas) se omiten, de modo que una
+    carga interrumpida continúa donde quedó
+    """
+    evento = registro.evento
+    nombre_archivo = registro.archivo_original.name
+
+    try:
+        if registro.filas_procesadas == 0:
+            with registro.archivo_original.open('rb') as archivo:
+                registro.total_registros = sum(1 for _ in leer_filas(archivo, nombre_archivo))
+            registro.save(update_fields=['total_registros'])
+
+        existentes = Inscripcion.objects.filter(evento=evento)
+        documentos = set(existentes.values_list('documento', flat=True))
+        correos = set(existentes.values_list('correo', flat=True))
+
+        with registro.archivo_original.open('rb') as archivo:
+            filas = islice(leer_filas(archivo, nombre_archivo), registro.filas_procesadas, None)
+            while True:
+                lote = list(islice(filas, tamano_lote))
+                if not lote:
+                    break
+                _importar_lote(registro, lote, documentos, correos)
+    except ValueError as e:
+        registro.marcar_error(str(e))
+        return registro
+    except Exception as e:
+        logger.error(f'Error en carga masiva {registro.pk}: {e}', exc_info=True)
+        registro.marcar_error(f'Error inesperado: {e}')
+        return registro
+
+    registro.marcar_completada()
+    return registro
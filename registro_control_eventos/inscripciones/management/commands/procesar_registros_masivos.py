@@ -0,0 +1,27 @@
+"""
+Worker de cargas masivas de inscripciones (HU-10)
+Reclama los RegistroMasivo pendientes e importa sus archivos por lotes.
+"""
+
+from inscripciones.models import RegistroMasivo
+from inscripciones.importacion import TAMANO_LOTE, procesar_registro
+from registro_control_eventos.tareas import ComandoWorker
+
+
+class Command(ComandoWorker):
+    help = 'Procesa las cargas masivas de inscripciones pendientes'
+    modelo = RegistroMasivo
+    nombre = 'cargas masivas'
+    lote_por_defecto = TAMANO_LOTE
+
+    def procesar(self, registro, options):
+        procesar_registro(registro, tamano_lote=options['lote'])
+
+    def informar(self, registro):
+        if registro.completada:
+            self.stdout.write(self.style.SUCCESS(
+                f'✓ Carga {registro.pk}: {registro.registros_exitosos} inscrita(s), '
+                f'{registro.registros_fallidos} con error'
+            ))
+        else:
+            self.stdout.write(self.style.ERROR(f'✗ Carga {registro.pk}: error'))
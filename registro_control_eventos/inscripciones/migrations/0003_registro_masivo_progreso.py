@@ -0,0 +1,52 @@
+# Generated by Django 5.2.8 on 2026-10-17 21:54
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def marcar_cargas_existentes(apps, schema_editor):
+    # Las cargas anteriores nunca se procesaron; no importarlas ahora
+    RegistroMasivo = apps.get_model('inscripciones', 'RegistroMasivo')
+    RegistroMasivo.objects.update(estado='COMPLETADO')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('eventos', '0003_evento_contadores_ocupacion'),
+        ('inscripciones', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='registromasivo',
+            name='estado',
+            field=models.CharField(choices=[('PENDIENTE', 'Pendiente'), ('EN_PROCESO', 'En Proceso'), ('COMPLETADO', 'Completado'), ('ERROR', 'Error')], default='PENDIENTE', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='registromasivo',
+            name='fecha_fin',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='registromasivo',
+            name='fecha_inicio',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='registromasivo',
+            name='fecha_latido',
+            field=models.DateTimeField(blank=True, help_text='Última señal de vida del worker', null=True),
+        ),
+        migrations.AddField(
+            model_name='registromasivo',
+            name='filas_procesadas',
+            field=models.PositiveIntegerField(default=0, help_text='Filas del archivo ya procesadas (permite retomar la carga)'),
+        ),
+        migrations.AddIndex(
+            model_name='registromasivo',
+            index=models.Index(fields=['estado', 'fecha_carga'], name='inscripcion_estado_410211_idx'),
+        ),
+        migrations.RunPython(marcar_cargas_existentes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.8 on 2026-10-17 21:58
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('eventos', '0004_indices_paginacion'),
+        ('inscripciones', '0003_registro_masivo_progreso'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='inscripcion',
+            index=models.Index(fields=['-fecha_inscripcion', '-id'], name='inscripcion_fecha_i_ac004b_idx'),
+        ),
+    ]
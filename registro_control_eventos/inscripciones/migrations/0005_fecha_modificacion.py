@@ -0,0 +1,25 @@
+# Generated by Django 5.2.8 on 2026-10-17 22:23
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('eventos', '0005_estadistica_evento'),
+        ('inscripciones', '0004_indices_paginacion'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inscripcion',
+            name='fecha_modificacion',
+            field=models.DateTimeField(auto_now=True, help_text='Última modificación (versión del listado de check-in sin conexión)'),
+        ),
+        migrations.AddIndex(
+            model_name='inscripcion',
+            index=models.Index(fields=['evento', 'fecha_modificacion'], name='inscripcion_evento__766119_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.8 on 2026-10-17 22:37
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def poblar_asistencias_count(apps, schema_editor):
+    """Cuenta las asistencias ya registradas de cada inscripción"""
+    Inscripcion = apps.get_model('inscripciones', 'Inscripcion')
+    Asistencia = apps.get_model('asistencias', 'Asistencia')
+
+    total = Asistencia.objects.filter(
+        inscripcion=OuterRef('pk')
+    ).order_by().values('inscripcion').annotate(
+        total=Count('pk')
+    ).values('total')
+    Inscripcion.objects.update(asistencias_count=Coalesce(Subquery(total), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('asistencias', '0003_initial'),
+        ('inscripciones', '0005_fecha_modificacion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inscripcion',
+            name='asistencias_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Sesiones con asistencia registrada'),
+        ),
+        migrations.RunPython(poblar_asistencias_count, migrations.RunPython.noop),
+    ]
@@ -6,14 +6,47 @@ HU-03: Registro de Asistentes
 HU-10: Registro Masivo de Asistentes
 """
 
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F, Q, Sum
+from django.db.models.functions import Greatest
+from django.db.models.lookups import GreaterThanOrEqual
 from django.utils import timezone
 from django.core.validators import EmailValidator
-from eventos.models import Evento
+from eventos.models import Evento, EstadisticaEvento
+from registro_control_eventos.tareas import TareaSegundoPlano
 from usuarios.models import Usuario
 import uuid
 
 
+class InscripcionQuerySet(models.QuerySet):
+    """
+    QuerySet de inscripciones con los filtros de elegibilidad en SQL
+    """
+    
+    def cumplen_asistencia(self):
+        """
+        Inscripciones que cumplen el porcentaje mínimo de asistencia del evento
+        Compara columnas: asistencias * 100 >= mínimo * sesiones
+        """
+        return self.filter(
+            GreaterThanOrEqual(
+                F('asistencias_count') * 100,
+                F('evento__porcentaje_asistencia_minimo') * F('evento__numero_sesiones')
+            ),
+            Q(evento__numero_sesiones__gt=0) | Q(evento__porcentaje_asistencia_minimo=0)
+        )
+    
+    def elegibles_certificado(self):
+        """
+        Inscripciones que pueden generar certificado (HU-05, HU-19)
+        Misma regla que Inscripcion.puede_generar_certificado, en una consulta
+        """
+        return self.cumplen_asistencia().filter(
+            estado='CONFIRMADA',
+            evento__genera_certificado=True
+        )
+
+
 class Inscripcion(models.Model):
     """
     Modelo de Inscripción a eventos
@@ -93,6 +126,17 @@ class Inscripcion(models.Model):
         blank=True,
         help_text="Fecha de confirmación de la inscripción"
     )
+    fecha_modificacion = models.DateTimeField(
+        auto_now=True,
+        help_text="Última modificación (versión del listado de check-in sin conexión)"
+    )
+    
+    # Contador mantenido por Asistencia (HU-18); solo se modifica con F()
+    asistencias_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text="Sesiones con asistencia registrada"
+    )
     
     # Notas adicionales
     notas = models.TextField(
@@ -106,6 +150,10 @@ class Inscripcion(models.Model):
         help_text="¿Fue registrado mediante carga masiva?"
     )
     
+    CAMPOS_CONTADORES = ('asistencias_count',)
+    
+    objects = InscripcionQuerySet.as_manager()
+    
     class Meta:
         verbose_name = 'Inscripción'
         verbose_name_plural = 'Inscripciones'
@@ -114,7 +162,11 @@ class Inscripcion(models.Model):
         indexes = [
             models.Index(fields=['evento', 'estado']),
             models.Index(fields=['codigo_qr']),
+            # Deltas del listado de check-in sin conexión
+            models.Index(fields=['evento', 'fecha_modificacion']),
             models.Index(fields=['correo']),
+            # Paginación por cursor de la lista de inscripciones
+            models.Index(fields=['-fecha_inscripcion', '-id']),
         ]
     
     def __str__(self):
@@ -141,20 +193,114 @@ class Inscripcion(models.Model):
             if not self.documento and self.usuario.documento:
                 self.documento = self.usuario.documento
         
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            # Bloquear la fila para leer el estado anterior de forma consistente
+            anterior = None
+            if self.pk and not self._state.adding:
+                anterior = Inscripcion.objects.select_for_update().filter(
+                    pk=self.pk
+                ).values('evento_id', 'estado', 'codigo_qr').first()
+            
+            mismo_evento = anterior is not None and anterior['evento_id'] == self.evento_id
+            estado_anterior = anterior['estado'] if mismo_evento else None
+            
+            # Reservar cupo al pasar a CONFIRMADA (falla si el evento está lleno)
+            if self.estado == 'CONFIRMADA' and estado_anterior != 'CONFIRMADA':
+                self.evento.reservar_cupo()
+            
+            # El contador de asistencias solo se modifica con F(); no
+            # sobrescribirlo con un valor en memoria desactualizado
+            if anterior is not None and not kwargs.get('update_fields') and not kwargs.get('force_insert'):
+                kwargs['update_fields'] = [
+                    field.name for field in self._meta.concrete_fields
+                    if not field.primary_key and field.name not in self.CAMPOS_CONTADORES
+                ]
+            super().save(*args, **kwargs)
+            
+            self._actualizar_contadores(anterior, mismo_evento)
+        
+        # Un código que deja de ser válido no debe seguir en los listados de check-in
+        if anterior and anterior['estado'] == 'CONFIRMADA' and (
+            not mismo_evento or self.estado != 'CONFIRMADA' or anterior['codigo_qr'] != self.codigo_qr
+        ):
+            from asistencias.checkin import invalidar_roster
+            invalidar_roster(anterior['evento_id'])
+    
+    def delete(self, *args, **kwargs):
+        """Override delete para liberar el cupo en los contadores del evento"""
+        with transaction.atomic():
+            estado = Inscripcion.objects.select_for_update().filter(
+                pk=self.pk
+            ).values_list('estado', flat=True).first()
+            # Asistencias y pagos se borran en cascada sin pasar por su delete()
+            sesiones = self.asistencias.count()
+            recaudado = self.pagos.filter(estado='COMPLETADO').aggregate(
+                total=Sum('monto')
+            )['total'] or 0
+            resultado = super().delete(*args, **kwargs)
+            if estado is not None:
+                self.evento.ajustar_contadores(
+                    confirmados=-1 if estado == 'CONFIRMADA' else 0,
+                    pendientes=-1 if estado == 'PENDIENTE' else 0,
+                )
+            EstadisticaEvento.ajustar(
+                self.evento_id,
+                asistentes=-1 if sesiones else 0,
+                sesiones_asistidas=-sesiones,
+                recaudado=-recaudado,
+            )
+        if estado == 'CONFIRMADA':
+            from asistencias.checkin import invalidar_roster
+            invalidar_roster(self.evento_id)
+        # El certificado se borra en cascada sin pasar por Certificado.delete
+        from certificados.verificacion import limpiar_verificaciones_evento
+        limpiar_verificaciones_evento(self.evento_id)
+        return resultado
+    
+    def _actualizar_contadores(self, anterior, mismo_evento):
+        """
+        Ajusta los contadores del evento según la transición de estado
+        (el cupo confirmado ya se reservó antes de guardar)
+        """
+        estado_anterior = anterior['estado'] if anterior else None
+        
+        if anterior and not mismo_evento:
+            # Cambio de evento: liberar contadores del evento anterior
+            Evento(pk=anterior['evento_id']).ajustar_contadores(
+                confirmados=-1 if estado_anterior == 'CONFIRMADA' else 0,
+                pendientes=-1 if estado_anterior == 'PENDIENTE' else 0,
+            )
+            estado_anterior = None
+        
+        if estado_anterior == self.estado:
+            return
+        
+        confirmados = 0
+        pendientes = 0
+        if estado_anterior == 'CONFIRMADA':
+            confirmados -= 1
+        elif estado_anterior == 'PENDIENTE':
+            pendientes -= 1
+        if self.estado == 'PENDIENTE':
+            pendientes += 1
+        
+        self.evento.ajustar_contadores(confirmados=confirmados, pendientes=pendientes)
     
     def get_nombre_completo(self):
         """Retorna el nombre completo del participante"""
         return f"{self.nombre} {self.apellido}"
     
     def confirmar(self):
-        """Confirma la inscripción"""
+        """
+        Confirma la inscripción
+        Lanza ValueError si el evento ya no tiene cupos disponibles
+        """
         self.estado = 'CONFIRMADA'
         self.fecha_confirmacion = timezone.now()
         self.save()
     
     def cancelar(self):
-        """Cancela la inscripción"""
+        """Cancela la inscripción (libera el cupo si estaba confirmada)"""
         self.estado = 'CANCELADA'
         self.save()
     
@@ -163,16 +309,57 @@ class Inscripcion(models.Model):
         self.estado = 'RECHAZADA'
         self.save()
     
+    @classmethod
+    def ajustar_asistencias(cls, inscripcion_id, delta):
+        """
+        Suma o resta asistencias al contador sin leer la fila
+        Al sumar retorna True si eran las primeras (el contador estaba en 0)
+        """
+        if delta > 0:
+            # UPDATE condicional: entre lectores concurrentes solo uno lo aplica
+            if cls.objects.filter(pk=inscripcion_id, asistencias_count=0).update(asistencias_count=delta):
+                return True
+            valor = F('asistencias_count') + delta
+        elif delta < 0:
+            valor = Greatest(F('asistencias_count') + delta, 0)
+        else:
+            return False
+        cls.objects.filter(pk=inscripcion_id).update(asistencias_count=valor)
+        return False
+    
+    @classmethod
+    def recalcular_asistencias(cls, inscripciones=None):
+        """
+        Reconstruye asistencias_count desde la tabla de asistencias en un único UPDATE
+        `inscripciones` es un queryset o una lista de ids; por defecto, todas
+        Retorna el número de inscripciones actualizadas
+        """
+        from django.db.models import Count, OuterRef, Subquery
+        from django.db.models.functions import Coalesce
+        from asistencias.models import Asistencia
+        
+        if inscripciones is None:
+            inscripciones = cls.objects.all()
+        elif not isinstance(inscripciones, models.QuerySet):
+            inscripciones = cls.objects.filter(pk__in=list(inscripciones))
+        
+        total = Asistencia.objects.filter(
+            inscripcion=OuterRef('pk')
+        ).order_by().values('inscripcion').annotate(
+            total=Count('pk')
+        ).values('total')
+        return inscripciones.update(asistencias_count=Coalesce(Subquery(total), 0))
+    
     @property
     def porcentaje_asistencia(self):
         """
         Calcula el porcentaje de asistencia del participante (HU-18)
+        Usa el contador asistencias_count, sin consultar las asistencias
         """
         if self.evento.numero_sesiones == 0:
             return 0
         
-        total_asistencias = self.asistencias.count()
-        return (total_asistencias / self.evento.numero_sesiones) * 100
+        return (self.asistencias_count / self.evento.numero_sesiones) * 100
     
     @property
     def cumple_asistencia_minima(self):
@@ -194,10 +381,23 @@ class Inscripcion(models.Model):
         return reverse('asistencias:registrar_qr', kwargs={'codigo_qr': self.codigo_qr})
 
 
-class RegistroMasivo(models.Model):
+class RegistroMasivo(TareaSegundoPlano):
     """
     Modelo para registrar cargas masivas de inscripciones (HU-10)
+    La importación la procesa el comando `procesar_registros_masivos`
     """
+    ESTADO_COMPLETADO = 'COMPLETADO'
+    CAMPO_CREACION = 'fecha_carga'
+    CAMPO_TOTAL = 'total_registros'
+    CAMPO_AVANCE = 'filas_procesadas'
+    
+    ESTADO_CHOICES = [
+        ('PENDIENTE', 'Pendiente'),
+        ('EN_PROCESO', 'En Proceso'),
+        ('COMPLETADO', 'Completado'),
+        ('ERROR', 'Error'),
+    ]
+    
     evento = models.ForeignKey(
         Evento,
         on_delete=models.CASCADE,
@@ -223,10 +423,28 @@ class RegistroMasivo(models.Model):
         help_text="Detalle de errores encontrados"
     )
     
+    # Avance del procesamiento en segundo plano
+    estado = models.CharField(
+        max_length=20,
+        choices=ESTADO_CHOICES,
+        default='PENDIENTE'
+    )
+    filas_procesadas = models.PositiveIntegerField(
+        default=0,
+        help_text="Filas del archivo ya procesadas (permite retomar la carga)"
+    )
+    
     class Meta:
         verbose_name = 'Registro Masivo'
         verbose_name_plural = 'Registros Masivos'
         ordering = ['-fecha_carga']
+        indexes = [
+            models.Index(fields=['estado', 'fecha_carga']),
+        ]
     
     def __str__(self):
         return f"Carga masiva {self.evento.nombre} - {self.fecha_carga.strftime('%d/%m/%Y')}"
+    
+    def anotar_error(self, mensaje):
+        self.reporte_errores += f"{mensaje}\n"
+        return 'reporte_errores'
@@ -3,16 +3,27 @@ Tests para la aplicación de Inscripciones
 Pruebas unitarias y de integración para el proceso de registro público
 """
 
-from django.test import TestCase, Client
+import shutil
+import tempfile
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 from datetime import timedelta
 from decimal import Decimal
 
 from eventos.models import Evento, TipoEvento
-from inscripciones.models import Inscripcion
+from inscripciones.models import Inscripcion, RegistroMasivo
+from inscripciones.importacion import procesar_registro
 from usuarios.models import Usuario
 
+MEDIA_TEMPORAL = tempfile.mkdtemp()
+
 
 class RegistroPublicoViewTest(TestCase):
     """
@@ -171,6 +182,38 @@ class RegistroPublicoViewTest(TestCase):
         # El evento lleno NO debe aparecer en la lista
         self.assertNotIn(evento_lleno, eventos)
     
+    def test_consultas_constantes_con_mas_eventos(self):
+        """Test 6b: El listado público no hace una consulta por evento"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        
+        def crear_eventos(cantidad, inicio):
+            for i in range(inicio, inicio + cantidad):
+                Evento.objects.create(
+                    nombre=f'Evento Masivo {i}',
+                    descripcion='Evento',
+                    tipo_evento=self.tipo_evento,
+                    fecha_inicio=timezone.now() + timedelta(days=30 + i),
+                    fecha_fin=timezone.now() + timedelta(days=30 + i, hours=2),
+                    lugar='Sala',
+                    cupo_maximo=10,
+                    costo=Decimal('0.00'),
+                    estado='PUBLICADO',
+                    creado_por=self.admin
+                )
+        
+        url = reverse('inscripciones:registro_publico')
+        crear_eventos(2, 0)
+        with CaptureQueriesContext(connection) as pocos:
+            self.client.get(url)
+        
+        crear_eventos(15, 2)
+        with CaptureQueriesContext(connection) as muchos:
+            response = self.client.get(url)
+        
+        self.assertEqual(response.context['total_eventos'], 18)
+        self.assertEqual(len(pocos), len(muchos))
+    
     def test_template_maneja_sin_eventos(self):
         """Test 7: Verificar que el template maneja correctamente cuando no hay eventos"""
         # Eliminar todos los eventos
@@ -183,6 +226,75 @@ class RegistroPublicoViewTest(TestCase):
         self.assertContains(response, 'No hay eventos disponibles')
 
 
+class CatalogoEnCacheTest(TestCase):
+    """
+    Tests para el catálogo público servido desde la caché (HU-03)
+    """
+    
+    def setUp(self):
+        self.client = Client()
+        self.admin = Usuario.objects.create_user(
+            username='admin_catalogo',
+            email='admin_catalogo@test.com',
+            password='testpass123',
+            rol='ADMINISTRADOR',
+            documento='1234567899'
+        )
+        self.evento = Evento.objects.create(
+            nombre='Evento en Catálogo',
+            descripcion='Descripción',
+            tipo_evento=TipoEvento.objects.create(nombre='ACADEMICO'),
+            fecha_inicio=timezone.now() + timedelta(days=10),
+            fecha_fin=timezone.now() + timedelta(days=10, hours=2),
+            lugar='Auditorio Principal',
+            cupo_maximo=2,
+            costo=Decimal('0.00'),
+            estado='PUBLICADO',
+            creado_por=self.admin
+        )
+        self.url = reverse('inscripciones:registro_publico')
+    
+    def _inscribir(self, numero):
+        Inscripcion.objects.create(
+            evento=self.evento,
+            nombre='Participante',
+            apellido=str(numero),
+            documento=f'{7000000 + numero}',
+            correo=f'catalogo{numero}@test.com',
+            telefono='3001234567'
+        )
+    
+    def test_anonimos_reciben_la_pagina_cacheada(self):
+        """La segunda visita anónima no consulta la base de datos"""
+        self.assertContains(self.client.get(self.url), 'Evento en Catálogo')
+        with self.assertNumQueries(0):
+            self.assertContains(self.client.get(self.url), 'Evento en Catálogo')
+        
+        # Los usuarios autenticados siempre ven la página generada
+        self.client.login(username='admin_catalogo', password='testpass123')
+        response = self.client.get(self.url)
+        self.assertTemplateUsed(response, 'inscripciones/registro_publico.html')
+    
+    def test_guardar_evento_invalida_el_catalogo(self):
+        self.client.get(self.url)
+        self.evento.nombre = 'Evento Renombrado'
+        self.evento.save()
+        self.assertContains(self.client.get(self.url), 'Evento Renombrado')
+    
+    def test_inscripciones_solo_invalidan_al_llenar_o_liberar_cupo(self):
+        """Durante las inscripciones el catálogo sigue en caché hasta que el evento se llena"""
+        self.client.get(self.url)
+        self._inscribir(1)
+        with self.assertNumQueries(0):
+            self.client.get(self.url)
+        
+        self._inscribir(2)
+        self.assertNotContains(self.client.get(self.url), 'Evento en Catálogo')
+        
+        self.evento.inscripciones.first().cancelar()
+        self.assertContains(self.client.get(self.url), 'Evento en Catálogo')
+
+
 class RegistroPublicoEventoViewTest(TestCase):
     """
     Tests para la vista de registro a evento específico (HU-03)
@@ -675,6 +787,232 @@ class GuardadoInscripcionTest(TestCase):
         self.assertEqual(Inscripcion.objects.filter(correo='laura@test.com').count(), 1)
 
 
+@override_settings(MEDIA_ROOT=MEDIA_TEMPORAL)
+class RegistroMasivoTest(TestCase):
+    """
+    Tests para la carga masiva de inscripciones (HU-10)
+    """
+    
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_TEMPORAL, ignore_errors=True)
+    
+    def setUp(self):
+        self.client = Client()
+        self.admin = Usuario.objects.create_user(
+            username='admin_masivo',
+            email='admin_masivo@test.com',
+            password='testpass123',
+            rol='ADMINISTRADOR',
+            documento='1234567000'
+        )
+        self.evento = Evento.objects.create(
+            nombre='Evento Masivo',
+            descripcion='Evento para carga masiva',
+            tipo_evento=TipoEvento.objects.create(nombre='ACADEMICO'),
+            fecha_inicio=timezone.now() + timedelta(days=10),
+            fecha_fin=timezone.now() + timedelta(days=10, hours=2),
+            lugar='Auditorio',
+            cupo_maximo=4,
+            costo=Decimal('0.00'),
+            estado='PUBLICADO',
+            creado_por=self.admin
+        )
+        Inscripcion.objects.create(
+            evento=self.evento,
+            nombre='Ya',
+            apellido='Inscrito',
+            documento='11111111',
+            correo='existente@test.com',
+            telefono='3001234567'
+        )
+    
+    def _registro(self, nombre, contenido):
+        return RegistroMasivo.objects.create(
+            evento=self.evento,
+            archivo_original=SimpleUploadedFile(nombre, contenido),
+            cargado_por=self.admin
+        )
+    
+    def _csv(self, filas):
+        lineas = ['Nombre;Apellido;Documento;Correo;Teléfono'] + [';'.join(fila) for fila in filas]
+        return ('\n'.join(lineas) + '\n').encode('utf-8-sig')
+    
+    def test_importa_valida_y_respeta_cupo(self):
+        """Filas válidas se insertan; duplicados, inválidas y excedentes se reportan"""
+        registro = self._registro('carga.csv', self._csv([
+            ['Ana', 'Uno', '22222222', 'ana@test.com', '3001112233'],
+            ['Duplicado', 'Documento', '11111111', 'otro@test.com', '3001112233'],
+            ['Sin', 'Correo', '33333333', 'no-es-correo', '3001112233'],
+            ['Luis', 'Dos', '44444444', 'luis@test.com', '300-111-2233'],
+            ['Repetido', 'Archivo', '44444444', 'rep@test.com', '3001112233'],
+            ['Eva', 'Tres', '55555555', 'eva@test.com', '3001112233'],
+            ['Sin', 'Cupo', '66666666', 'cupo@test.com', '3001112233'],
+        ]))
+        
+        procesar_registro(registro, tamano_lote=3)
+        
+        registro.refresh_from_db()
+        self.assertEqual(registro.estado, 'COMPLETADO')
+        self.assertEqual(registro.total_registros, 7)
+        self.assertEqual((registro.registros_exitosos, registro.registros_fallidos), (3, 4))
+        self.assertIn('Fila 3: Ya existe una inscripción con este documento', registro.reporte_errores)
+        self.assertIn('Fila 4: Ingrese una dirección de correo electrónico válida', registro.reporte_errores)
+        self.assertIn('Fila 6: Ya existe una inscripción con este documento', registro.reporte_errores)
+        self.assertIn('Fila 8: Evento sin cupos disponibles', registro.reporte_errores)
+        
+        self.evento.refresh_from_db()
+        self.assertEqual(self.evento.inscritos_confirmados, 4)
+        luis = Inscripcion.objects.get(documento='44444444')
+        self.assertEqual((luis.telefono, luis.estado, luis.registro_masivo), ('3001112233', 'CONFIRMADA', True))
+    
+    def test_importa_xlsx_y_retoma(self):
+        """Los XLSX se leen con columnas numéricas y una carga retoma desde filas_procesadas"""
+        from io import BytesIO
+        from openpyxl import Workbook
+        
+        libro = Workbook()
+        hoja = libro.active
+        hoja.append(['nombre', 'apellido', 'documento', 'correo', 'telefono'])
+        hoja.append(['Ana', 'Uno', 22222222, 'ana@test.com', 3001112233])
+        hoja.append(['Luis', 'Dos', 44444444, 'luis@test.com', 3001112233])
+        archivo = BytesIO()
+        libro.save(archivo)
+        
+        registro = self._registro('carga.xlsx', archivo.getvalue())
+        registro.total_registros = 2
+        registro.filas_procesadas = 1
+        registro.save()
+        
+        procesar_registro(registro)
+        
+        self.assertEqual(
+            list(Inscripcion.objects.filter(registro_masivo=True).values_list('documento', flat=True)),
+            ['44444444']
+        )
+    
+    def test_vista_encola_y_worker_procesa(self):
+        """La vista solo guarda el archivo; el comando realiza la importación"""
+        self.client.login(username='admin_masivo', password='testpass123')
+        archivo = SimpleUploadedFile('carga.csv', self._csv([
+            ['Ana', 'Uno', '22222222', 'ana@test.com', '3001112233'],
+        ]))
+        
+        response = self.client.post(
+            reverse('inscripciones:registro_masivo'),
+            {'evento': self.evento.pk, 'archivo': archivo}
+        )
+        
+        self.assertEqual(response.status_code, 302)
+        registro = RegistroMasivo.objects.get()
+        self.assertEqual(registro.estado, 'PENDIENTE')
+        self.assertEqual(Inscripcion.objects.count(), 1)
+        
+        call_command('procesar_registros_masivos', '--una-vez', stdout=mock.MagicMock())
+        
+        response = self.client.get(reverse('inscripciones:estado_registro_masivo', args=[registro.pk]))
+        self.assertEqual(response.json()['estado'], 'COMPLETADO')
+        self.assertEqual(response.json()['exitosos'], 1)
+    
+    def test_encabezados_faltantes(self):
+        """Un archivo sin las columnas requeridas marca la carga con error"""
+        registro = self._registro('carga.csv', b'nombre,correo\nAna,ana@test.com\n')
+        
+        procesar_registro(registro)
+        
+        self.assertEqual(registro.estado, 'ERROR')
+        self.assertIn('Faltan columnas requeridas: apellido, documento, telefono', registro.reporte_errores)
+
+
+class ListaInscripcionesPaginadaTest(TestCase):
+    """
+    Tests para la paginación por cursor de las listas de gestión
+    """
+    
+    def setUp(self):
+        self.client = Client()
+        self.admin = Usuario.objects.create_user(
+            username='admin_lista',
+            email='admin_lista@test.com',
+            password='testpass123',
+            rol='ADMINISTRADOR',
+            documento='1234567111'
+        )
+        self.evento = Evento.objects.create(
+            nombre='Evento Paginado',
+            descripcion='Evento con muchas inscripciones',
+            tipo_evento=TipoEvento.objects.create(nombre='ACADEMICO'),
+            fecha_inicio=timezone.now() + timedelta(days=10),
+            fecha_fin=timezone.now() + timedelta(days=10, hours=2),
+            lugar='Auditorio',
+            cupo_maximo=500,
+            costo=Decimal('0.00'),
+            estado='PUBLICADO',
+            creado_por=self.admin
+        )
+        # Varias inscripciones comparten fecha para probar el desempate por id
+        fecha = timezone.now() - timedelta(days=1)
+        for i in range(60):
+            Inscripcion.objects.create(
+                evento=self.evento,
+                nombre='Participante',
+                apellido=f'{i:03d}',
+                documento=f'{5000000 + i}',
+                correo=f'pag{i}@test.com',
+                telefono='3001234567',
+                fecha_inscripcion=fecha - timedelta(hours=i // 3)
+            )
+        self.client.login(username='admin_lista', password='testpass123')
+    
+    def test_recorre_todas_las_paginas_sin_repetir(self):
+        """Las páginas siguientes y anteriores cubren todos los registros en orden estable"""
+        url = reverse('inscripciones:lista')
+        vistos = []
+        paginas = []
+        siguiente = ''
+        while siguiente is not None:
+            pagina = self.client.get(url + siguiente).context['inscripciones']
+            paginas.append(pagina)
+            vistos.extend(inscripcion.pk for inscripcion in pagina)
+            siguiente = pagina.url_siguiente
+        
+        esperados = list(
+            Inscripcion.objects.order_by('-fecha_inscripcion', '-id').values_list('pk', flat=True)
+        )
+        self.assertEqual(vistos, esperados)
+        self.assertEqual(len(paginas), 3)
+        self.assertFalse(paginas[0].hay_anterior)
+        
+        # Volver desde la última página entrega la página anterior completa
+        response = self.client.get(url + paginas[-1].url_anterior)
+        self.assertEqual(
+            [inscripcion.pk for inscripcion in response.context['inscripciones']],
+            [inscripcion.pk for inscripcion in paginas[1]]
+        )
+    
+    def test_pagina_n_cuesta_lo_mismo(self):
+        """La última página usa las mismas consultas que la primera y conserva los filtros"""
+        url = reverse('inscripciones:lista')
+        with CaptureQueriesContext(connection) as primera:
+            response = self.client.get(url, {'estado': 'CONFIRMADA'})
+        segunda_url = response.context['inscripciones'].url_siguiente
+        self.assertIn('estado=CONFIRMADA', segunda_url)
+        
+        response = self.client.get(url + segunda_url)
+        with CaptureQueriesContext(connection) as ultima:
+            self.client.get(url + response.context['inscripciones'].url_siguiente)
+        
+        self.assertEqual(len(primera), len(ultima))
+        self.assertFalse(any('OFFSET' in consulta['sql'] for consulta in ultima))
+    
+    def test_cursor_invalido_muestra_primera_pagina(self):
+        """Un cursor manipulado no genera error"""
+        response = self.client.get(reverse('inscripciones:lista'), {'cursor': 'no-es-un-cursor'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['inscripciones']), 25)
+
+
 # Resumen de pruebas implementadas:
 # ✅ Test 1-7: Vista registro_publico (carga de eventos, filtros, ordenamiento)
 # ✅ Test 8-12: Vista registro_publico_evento (acceso, validaciones)
@@ -682,3 +1020,5 @@ class GuardadoInscripcionTest(TestCase):
 # ✅ Test 16: Integración completa del flujo de registro
 # ✅ Test 17-20: Formulario de inscripción (validaciones)
 # ✅ Test 21-23: Guardado de inscripciones (gratuito, pago, duplicadas)
+# ✅ Test 24-27: Carga masiva (validación, cupo, XLSX, procesamiento en segundo plano)
+# ✅ Test 28-30: Paginación por cursor de la lista de inscripciones
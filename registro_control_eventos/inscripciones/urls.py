@@ -9,10 +9,14 @@ app_name = 'inscripciones'
 
 urlpatterns = [
     path('', views.lista_inscripciones, name='lista'),
+    path('exportar/<str:formato>/', views.exportar_inscripciones, name='exportar'),
     path('registro-publico/', views.registro_publico, name='registro_publico'),
     path('registro-publico/<int:evento_id>/', views.registro_publico_evento, name='registro_publico_evento'),
     path('confirmacion/<int:pk>/', views.confirmacion_inscripcion, name='confirmacion_inscripcion'),
     path('registro-masivo/', views.registro_masivo, name='registro_masivo'),
+    path('registro-masivo/plantilla/', views.plantilla_registro_masivo, name='plantilla_registro_masivo'),
+    path('registro-masivo/<int:pk>/estado/', views.estado_registro_masivo, name='estado_registro_masivo'),
+    path('registro-masivo/<int:pk>/errores/', views.reporte_errores_masivo, name='reporte_errores_masivo'),
     path('<int:pk>/', views.detalle_inscripcion, name='detalle'),
     path('<int:pk>/confirmar/', views.confirmar_inscripcion, name='confirmar'),
     path('<int:pk>/cancelar/', views.cancelar_inscripcion, name='cancelar'),
@@ -11,13 +11,15 @@ from django.utils import timezone
 
 from eventos.models import Evento
 from inscripciones.models import Inscripcion
+from registro_control_eventos.paginacion import paginar_por_cursor
+from registro_control_eventos.cache_publico import cache_anonimo
 from .forms import InscripcionPublicaForm
 
 
-@login_required
-def lista_inscripciones(request):
+def _filtrar_inscripciones(request):
     """
-    Lista de inscripciones con filtros y búsqueda
+    Construye el queryset de inscripciones visible para el usuario con los
+    filtros de la petición. Retorna (inscripciones, filtros_activos)
     Administradores/Organizadores: ven todas las inscripciones
     Asistentes: ven solo sus propias inscripciones
     """
@@ -84,6 +86,26 @@ def lista_inscripciones(request):
         except ValueError:
             pass
     
+    filtros_activos = {
+        'evento': evento_filtro,
+        'estado': estado_filtro,
+        'q': busqueda,
+        'fecha_desde': fecha_desde,
+        'fecha_hasta': fecha_hasta,
+    }
+    return inscripciones, filtros_activos
+
+
+@login_required
+def lista_inscripciones(request):
+    """
+    Lista de inscripciones con filtros y búsqueda
+    Administradores/Organizadores: ven todas las inscripciones
+    Asistentes: ven solo sus propias inscripciones
+    """
+    user = request.user
+    inscripciones, filtros_activos = _filtrar_inscripciones(request)
+    
     # Obtener eventos para filtro (solo para administradores/organizadores)
     eventos_para_filtro = None
     if user.puede_gestionar_eventos():
@@ -93,34 +115,64 @@ def lista_inscripciones(request):
             eventos_para_filtro = Evento.objects.all().order_by('nombre')
     
     context = {
-        'inscripciones': inscripciones,
+        'inscripciones': paginar_por_cursor(request, inscripciones, ['-fecha_inscripcion']),
         'eventos_para_filtro': eventos_para_filtro,
-        'filtros_activos': {
-            'evento': evento_filtro,
-            'estado': estado_filtro,
-            'q': busqueda,
-            'fecha_desde': fecha_desde,
-            'fecha_hasta': fecha_hasta,
-        },
+        'filtros_activos': filtros_activos,
         'total_inscripciones': inscripciones.count(),
     }
     
     return render(request, 'inscripciones/lista.html', context)
 
 
+ENCABEZADOS_INSCRIPCIONES = [
+    'ID', 'Evento', 'Nombre', 'Apellido', 'Documento', 'Correo',
+    'Teléfono', 'Estado', 'Pago confirmado', 'Fecha de inscripción'
+]
+
+
+@login_required
+def exportar_inscripciones(request, formato):
+    """
+    Exporta en streaming las inscripciones resultantes de los filtros (HU-29)
+    """
+    from reportes.exportacion import respuesta_exportacion, TAMANO_LOTE
+    
+    inscripciones, _ = _filtrar_inscripciones(request)
+    filas = inscripciones.values_list(
+        'pk', 'evento__nombre', 'nombre', 'apellido', 'documento', 'correo',
+        'telefono', 'estado', 'pago_confirmado', 'fecha_inscripcion'
+    )
+    
+    def generar_filas():
+        for fila in filas.iterator(chunk_size=TAMANO_LOTE):
+            fila = list(fila)
+            fila[8] = 'Sí' if fila[8] else 'No'
+            fila[9] = timezone.localtime(fila[9]).strftime('%d/%m/%Y %H:%M')
+            yield fila
+    
+    return respuesta_exportacion(
+        formato,
+        'inscripciones',
+        ENCABEZADOS_INSCRIPCIONES,
+        generar_filas(),
+        titulo_hoja='Inscripciones'
+    )
+
+
+@cache_anonimo('catalogo')
 def registro_publico(request):
     """
     Vista pública para mostrar eventos disponibles y permitir registro (HU-03)
     Accesible sin login - muestra solo eventos PUBLICADOS con cupos disponibles
+    Para anónimos se sirve desde la caché (grupo 'catalogo')
     """
-    # Obtener eventos publicados con cupos disponibles y fecha futura
-    eventos = Evento.objects.filter(
-        estado='PUBLICADO',
-        fecha_inicio__gt=timezone.now()
-    ).select_related('tipo_evento').order_by('fecha_inicio')
-    
-    # Filtrar eventos con cupos disponibles
-    eventos_disponibles = [evento for evento in eventos if not evento.esta_lleno]
+    # Obtener eventos publicados con cupos disponibles y fecha futura (filtro en SQL)
+    eventos_disponibles = list(
+        Evento.objects.disponibles().with_occupancy().filter(
+            estado='PUBLICADO',
+            fecha_inicio__gt=timezone.now()
+        ).select_related('tipo_evento').order_by('fecha_inicio')
+    )
     
     context = {
         'eventos': eventos_disponibles,
@@ -302,9 +354,106 @@ def confirmacion_inscripcion(request, pk):
     return render(request, 'inscripciones/confirmacion.html', context)
 
 
+# Tamaño máximo del archivo de carga masiva (HU-10)
+TAMANO_MAXIMO_CARGA = 5 * 1024 * 1024
+
+
 @login_required
 def registro_masivo(request):
-    return render(request, 'inscripciones/registro_masivo.html')
+    """
+    Carga masiva de inscripciones desde CSV/XLSX (HU-10)
+    El archivo se guarda y la importación la procesa el comando
+    `procesar_registros_masivos` fuera de la petición
+    """
+    from .importacion import EXTENSIONES
+    from .models import RegistroMasivo
+    
+    if not request.user.puede_gestionar_eventos():
+        messages.error(request, 'No tiene permisos')
+        return redirect('dashboard:index')
+    
+    eventos = Evento.objects.filter(
+        estado__in=['PUBLICADO', 'EN_CURSO']
+    ).order_by('fecha_inicio')
+    
+    if request.method == 'POST':
+        evento = eventos.filter(pk=request.POST.get('evento') or None).first()
+        archivo = request.FILES.get('archivo')
+        
+        if evento is None:
+            messages.error(request, 'Seleccione un evento válido')
+        elif archivo is None:
+            messages.error(request, 'Seleccione el archivo a cargar')
+        elif not archivo.name.lower().endswith(EXTENSIONES):
+            messages.error(request, 'Formato de archivo no soportado (use .csv o .xlsx)')
+        elif archivo.size > TAMANO_MAXIMO_CARGA:
+            messages.error(request, 'El archivo supera el tamaño máximo de 5MB')
+        else:
+            RegistroMasivo.objects.create(
+                evento=evento,
+                archivo_original=archivo,
+                cargado_por=request.user
+            )
+            messages.success(
+                request,
+                f'✓ Archivo recibido. La carga para {evento.nombre} se procesará en segundo plano.'
+            )
+            return redirect('inscripciones:registro_masivo')
+    
+    cargas = RegistroMasivo.objects.select_related('evento').order_by('-fecha_carga')[:10]
+    
+    context = {
+        'eventos': eventos,
+        'cargas': cargas,
+    }
+    return render(request, 'inscripciones/registro_masivo.html', context)
+
+
+@login_required
+def estado_registro_masivo(request, pk):
+    """Avance de una carga masiva en JSON (consultado desde registro_masivo)"""
+    from django.http import JsonResponse
+    from .models import RegistroMasivo
+    
+    if not request.user.puede_gestionar_eventos():
+        return JsonResponse({'error': 'No tiene permisos'}, status=403)
+    
+    registro = get_object_or_404(RegistroMasivo, pk=pk)
+    return JsonResponse({
+        'id': registro.pk,
+        'estado': registro.estado,
+        'estado_display': registro.get_estado_display(),
+        'total': registro.total_registros,
+        'procesados': registro.filas_procesadas,
+        'exitosos': registro.registros_exitosos,
+        'fallidos': registro.registros_fallidos,
+        'porcentaje': round(registro.porcentaje_avance, 1),
+    })
+
+
+@login_required
+def reporte_errores_masivo(request, pk):
+    """Descarga el reporte de errores de una carga masiva"""
+    from django.http import HttpResponse
+    from .models import RegistroMasivo
+    
+    if not request.user.puede_gestionar_eventos():
+        messages.error(request, 'No tiene permisos')
+        return redirect('dashboard:index')
+    
+    registro = get_object_or_404(RegistroMasivo, pk=pk)
+    response = HttpResponse(registro.reporte_errores, content_type='text/plain; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="errores_carga_{registro.pk}.txt"'
+    return response
+
+
+@login_required
+def plantilla_registro_masivo(request):
+    """Plantilla CSV con las columnas esperadas por la carga masiva"""
+    from reportes.exportacion import respuesta_csv
+    from .importacion import COLUMNAS
+    
+    return respuesta_csv('plantilla_inscripciones', COLUMNAS, [])
 
 
 @login_required
@@ -109,9 +109,9 @@ class NotificacionAdmin(admin.ModelAdmin):
 class ConfiguracionRecordatorioAdmin(admin.ModelAdmin):
     """Admin para ConfiguracionRecordatorio"""
     list_display = [
-        'evento', 'activo', 'horas_antes',
-        'enviado', 'fecha_envio'
+        'evento', 'activo', 'horas_antes', 'fecha_recordatorio',
+        'enviado', 'total_encolados', 'fecha_envio'
     ]
     list_filter = ['activo', 'enviado']
     search_fields = ['evento__nombre']
-    readonly_fields = ['fecha_envio']
+    readonly_fields = ['fecha_envio', 'fecha_recordatorio', 'total_encolados']
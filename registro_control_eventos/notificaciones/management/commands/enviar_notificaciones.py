@@ -0,0 +1,55 @@
+"""
+Despachador de notificaciones por correo (HU-21, HU-22, HU-23)
+Envía las notificaciones PENDIENTE cuya fecha programada ya pasó, por lotes
+y reutilizando una conexión SMTP por lote. Se pueden ejecutar varios
+despachadores en paralelo.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from notificaciones.models import Notificacion
+
+
+class Command(BaseCommand):
+    help = 'Envía las notificaciones pendientes por correo'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--una-vez',
+            action='store_true',
+            help='Envía lo pendiente y termina (útil desde cron)'
+        )
+        parser.add_argument(
+            '--intervalo',
+            type=int,
+            default=10,
+            help='Segundos de espera cuando no hay notificaciones pendientes'
+        )
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=50,
+            help='Notificaciones enviadas por conexión SMTP'
+        )
+
+    def handle(self, *args, **options):
+        total_enviadas = 0
+        total_fallidas = 0
+
+        while True:
+            enviadas, fallidas = Notificacion.despachar_pendientes(options['lote'])
+            total_enviadas += enviadas
+            total_fallidas += fallidas
+
+            if enviadas or fallidas:
+                self.stdout.write(f'Lote: {enviadas} enviada(s), {fallidas} fallida(s)')
+                continue
+
+            if options['una_vez']:
+                break
+            time.sleep(options['intervalo'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ {total_enviadas} notificación(es) enviada(s), {total_fallidas} fallida(s)'
+        ))
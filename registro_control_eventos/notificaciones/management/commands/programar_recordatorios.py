@@ -0,0 +1,43 @@
+"""
+Programador de recordatorios previos a los eventos (HU-22)
+Encola notificaciones RECORDATORIO_EVENTO para las configuraciones vencidas;
+el envío lo realiza `enviar_notificaciones`.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from notificaciones.models import ConfiguracionRecordatorio
+
+
+class Command(BaseCommand):
+    help = 'Encola los recordatorios de eventos cuya hora de aviso ya llegó'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--una-vez',
+            action='store_true',
+            help='Procesa las configuraciones vencidas y termina (útil desde cron)'
+        )
+        parser.add_argument(
+            '--intervalo',
+            type=int,
+            default=60,
+            help='Segundos entre revisiones'
+        )
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=2000,
+            help='Notificaciones insertadas por transacción'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            encolados = ConfiguracionRecordatorio.procesar_pendientes(options['lote'])
+            if encolados:
+                self.stdout.write(self.style.SUCCESS(f'✓ {encolados} recordatorio(s) encolado(s)'))
+
+            if options['una_vez']:
+                break
+            time.sleep(options['intervalo'])
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-17 21:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notificaciones', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='plantillacorreo',
+            name='fecha_modificacion',
+            field=models.DateTimeField(auto_now=True, help_text='Versión de la plantilla para la caché de plantillas compiladas'),
+        ),
+    ]
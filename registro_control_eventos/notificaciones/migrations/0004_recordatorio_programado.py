@@ -0,0 +1,46 @@
+# Generated by Django 5.2.8 on 2026-10-17 21:49
+
+from datetime import timedelta
+
+from django.db import migrations, models
+
+
+def calcular_fechas_recordatorio(apps, schema_editor):
+    ConfiguracionRecordatorio = apps.get_model('notificaciones', 'ConfiguracionRecordatorio')
+    configuraciones = list(ConfiguracionRecordatorio.objects.select_related('evento'))
+    for configuracion in configuraciones:
+        configuracion.fecha_recordatorio = (
+            configuracion.evento.fecha_inicio - timedelta(hours=configuracion.horas_antes)
+        )
+    ConfiguracionRecordatorio.objects.bulk_update(configuraciones, ['fecha_recordatorio'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('eventos', '0003_evento_contadores_ocupacion'),
+        ('notificaciones', '0003_plantillacorreo_fecha_modificacion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='configuracionrecordatorio',
+            name='fecha_recordatorio',
+            field=models.DateTimeField(blank=True, editable=False, help_text='Inicio del evento menos horas_antes (calculado)', null=True),
+        ),
+        migrations.AddField(
+            model_name='configuracionrecordatorio',
+            name='total_encolados',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Recordatorios encolados hasta ahora'),
+        ),
+        migrations.AddField(
+            model_name='configuracionrecordatorio',
+            name='ultimo_id_procesado',
+            field=models.PositiveBigIntegerField(default=0, editable=False, help_text='Cursor: id de la última inscripción con recordatorio encolado'),
+        ),
+        migrations.AddIndex(
+            model_name='configuracionrecordatorio',
+            index=models.Index(fields=['activo', 'enviado', 'fecha_recordatorio'], name='notificacio_activo_56d51a_idx'),
+        ),
+        migrations.RunPython(calcular_fechas_recordatorio, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-17 21:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('eventos', '0004_indices_paginacion'),
+        ('inscripciones', '0004_indices_paginacion'),
+        ('notificaciones', '0004_recordatorio_programado'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notificacion',
+            index=models.Index(fields=['-fecha_programada', '-id'], name='notificacio_fecha_p_14bc60_idx'),
+        ),
+    ]
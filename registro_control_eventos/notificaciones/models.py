@@ -8,6 +8,10 @@ HU-23: Notificación de Cambios o Cancelación
 HU-24: Configuración de Plantillas de Correo
 """
 
+from collections import OrderedDict
+import threading
+import time
+
 from django.db import models
 from django.utils import timezone
 from django.core.mail import send_mail, EmailMultiAlternatives
@@ -18,6 +22,35 @@ from inscripciones.models import Inscripcion
 from usuarios.models import Usuario
 
 
+# Cachés locales al proceso para el renderizado de plantillas (HU-24).
+# Las plantillas compiladas se indexan por (pk, fecha_modificacion), de modo
+# que una edición hecha desde otro proceso genera una clave nueva.
+MAX_PLANTILLAS_COMPILADAS = 128
+_plantillas_compiladas = OrderedDict()
+
+# La plantilla activa por tipo se consulta de nuevo tras este tiempo, para
+# ver los cambios hechos desde otros procesos.
+SEGUNDOS_CACHE_PLANTILLA_ACTIVA = 60
+_plantilla_activa = {}
+
+_bloqueo_cache = threading.Lock()
+
+
+def limpiar_cache_plantillas(plantilla_id=None):
+    """
+    Invalida las cachés de plantillas
+    Con plantilla_id solo descarta sus versiones compiladas; la plantilla
+    activa por tipo se descarta siempre
+    """
+    with _bloqueo_cache:
+        if plantilla_id is None:
+            _plantillas_compiladas.clear()
+        else:
+            for clave in [c for c in _plantillas_compiladas if c[0] == plantilla_id]:
+                del _plantillas_compiladas[clave]
+        _plantilla_activa.clear()
+
+
 class TipoNotificacion(models.Model):
     """
     Catálogo de tipos de notificación
@@ -59,6 +92,10 @@ class TipoNotificacion(models.Model):
     
     def __str__(self):
         return self.get_codigo_display()
+    
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        limpiar_cache_plantillas()
 
 
 class PlantillaCorreo(models.Model):
@@ -98,6 +135,10 @@ class PlantillaCorreo(models.Model):
         help_text="¿Es la plantilla predeterminada del sistema?"
     )
     fecha_creacion = models.DateTimeField(default=timezone.now)
+    fecha_modificacion = models.DateTimeField(
+        auto_now=True,
+        help_text="Versión de la plantilla para la caché de plantillas compiladas"
+    )
     creada_por = models.ForeignKey(
         Usuario,
         on_delete=models.SET_NULL,
@@ -128,36 +169,98 @@ class PlantillaCorreo(models.Model):
                 activa=True
             ).exclude(pk=self.pk).update(activa=False)
         super().save(*args, **kwargs)
+        limpiar_cache_plantillas(self.pk)
     
-    def renderizar(self, contexto):
+    def delete(self, *args, **kwargs):
+        plantilla_id = self.pk
+        resultado = super().delete(*args, **kwargs)
+        limpiar_cache_plantillas(plantilla_id)
+        return resultado
+    
+    @classmethod
+    def activa_para(cls, tipo_codigo):
         """
-        Renderiza la plantilla con el contexto proporcionado
+        Retorna (tipo_notificacion, plantilla activa) para un código de tipo
+        Usa una caché local al proceso; lanza TipoNotificacion.DoesNotExist
+        si el tipo no existe o está inactivo
         """
-        asunto_template = Template(self.asunto)
-        cuerpo_template = Template(self.cuerpo_texto)
+        ahora = time.monotonic()
+        en_cache = _plantilla_activa.get(tipo_codigo)
+        if en_cache and en_cache[0] > ahora:
+            return en_cache[1], en_cache[2]
         
-        context = Context(contexto)
+        tipo_notif = TipoNotificacion.objects.get(codigo=tipo_codigo, activo=True)
+        plantilla = cls.objects.filter(
+            tipo_notificacion=tipo_notif,
+            activa=True
+        ).first()
         
-        asunto_renderizado = asunto_template.render(context)
-        cuerpo_renderizado = cuerpo_template.render(context)
+        with _bloqueo_cache:
+            _plantilla_activa[tipo_codigo] = (
+                ahora + SEGUNDOS_CACHE_PLANTILLA_ACTIVA, tipo_notif, plantilla
+            )
+        return tipo_notif, plantilla
+    
+    def _compilar(self):
+        """
+        Retorna las plantillas compiladas (asunto, cuerpo_texto, cuerpo_html)
+        desde la caché LRU, compilándolas solo la primera vez
+        """
+        clave = (self.pk, self.fecha_modificacion)
+        if self.pk is not None:
+            with _bloqueo_cache:
+                compiladas = _plantillas_compiladas.get(clave)
+                if compiladas is not None:
+                    _plantillas_compiladas.move_to_end(clave)
+                    return compiladas
         
-        if self.cuerpo_html:
-            html_template = Template(self.cuerpo_html)
-            html_renderizado = html_template.render(context)
-        else:
-            html_renderizado = None
+        compiladas = (
+            Template(self.asunto),
+            Template(self.cuerpo_texto),
+            Template(self.cuerpo_html) if self.cuerpo_html else None,
+        )
         
-        # Agregar pie de página
-        if self.pie_pagina:
-            cuerpo_renderizado += f"\n\n{self.pie_pagina}"
-            if html_renderizado:
-                html_renderizado += f"<br><br>{self.pie_pagina}"
+        if self.pk is not None:
+            with _bloqueo_cache:
+                _plantillas_compiladas[clave] = compiladas
+                while len(_plantillas_compiladas) > MAX_PLANTILLAS_COMPILADAS:
+                    _plantillas_compiladas.popitem(last=False)
+        return compiladas
+    
+    def renderizar(self, contexto):
+        """
+        Renderiza la plantilla con el contexto proporcionado
+        """
+        return self.renderizar_lote([contexto])[0]
+    
+    def renderizar_lote(self, contextos):
+        """
+        Renderiza la plantilla para varios destinatarios compilándola una sola vez
+        Retorna una lista de diccionarios en el mismo orden de los contextos
+        """
+        asunto_template, cuerpo_template, html_template = self._compilar()
         
-        return {
-            'asunto': asunto_renderizado,
-            'cuerpo_texto': cuerpo_renderizado,
-            'cuerpo_html': html_renderizado
-        }
+        resultados = []
+        for contexto in contextos:
+            context = Context(contexto)
+            
+            asunto_renderizado = asunto_template.render(context)
+            cuerpo_renderizado = cuerpo_template.render(context)
+            html_renderizado = html_template.render(context) if html_template else None
+            
+            # Agregar pie de página
+            if self.pie_pagina:
+                cuerpo_renderizado += f"\n\n{self.pie_pagina}"
+                if html_renderizado:
+                    html_renderizado += f"<br><br>{self.pie_pagina}"
+            
+            resultados.append({
+                'asunto': asunto_renderizado,
+                'cuerpo_texto': cuerpo_renderizado,
+                'cuerpo_html': html_renderizado
+            })
+        
+        return resultados
 
 
 class Notificacion(models.Model):
@@ -237,56 +340,150 @@ class Notificacion(models.Model):
         indexes = [
             models.Index(fields=['estado', 'fecha_programada']),
             models.Index(fields=['destinatario_email']),
+            # Paginación por cursor de la lista de notificaciones
+            models.Index(fields=['-fecha_programada', '-id']),
         ]
     
     def __str__(self):
         return f"{self.tipo_notificacion} - {self.destinatario_email} - {self.get_estado_display()}"
     
+    # Reintentos con espera exponencial: 5, 10, 20, 40... minutos
+    MAX_INTENTOS = 5
+    ESPERA_REINTENTO_MINUTOS = 5
+    
+    def construir_mensaje(self, connection=None):
+        """Construye el correo de la notificación"""
+        email = EmailMultiAlternatives(
+            subject=self.asunto,
+            body=self.cuerpo,
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[self.destinatario_email],
+            connection=connection
+        )
+        
+        # Si hay contenido HTML, agregarlo
+        if '<' in self.cuerpo and '>' in self.cuerpo:
+            email.attach_alternative(self.cuerpo, "text/html")
+        
+        return email
+    
+    def marcar_enviado(self):
+        """Registra el envío exitoso (sin guardar)"""
+        self.estado = 'ENVIADO'
+        self.fecha_envio = timezone.now()
+        self.error_mensaje = ''
+    
+    def marcar_fallido(self, error):
+        """
+        Registra un intento fallido (sin guardar)
+        Reprograma con espera exponencial hasta agotar MAX_INTENTOS
+        """
+        from datetime import timedelta
+        
+        self.error_mensaje = str(error)
+        if self.intentos >= self.MAX_INTENTOS:
+            self.estado = 'ERROR'
+        else:
+            self.estado = 'PENDIENTE'
+            espera = self.ESPERA_REINTENTO_MINUTOS * 2 ** max(self.intentos - 1, 0)
+            self.fecha_programada = timezone.now() + timedelta(minutes=espera)
+    
     def enviar(self):
         """
-        Envía la notificación por correo
+        Envía la notificación por correo de inmediato
+        El envío normal lo hace el comando `enviar_notificaciones`
         """
+        self.intentos += 1
         try:
-            email = EmailMultiAlternatives(
-                subject=self.asunto,
-                body=self.cuerpo,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                to=[self.destinatario_email]
-            )
-            
-            # Si hay contenido HTML, agregarlo
-            if '<' in self.cuerpo and '>' in self.cuerpo:
-                email.attach_alternative(self.cuerpo, "text/html")
-            
-            email.send()
-            
-            self.estado = 'ENVIADO'
-            self.fecha_envio = timezone.now()
-            self.intentos += 1
-            self.error_mensaje = ''
+            self.construir_mensaje().send()
+            self.marcar_enviado()
             self.save()
-            
             return True
             
         except Exception as e:
-            self.estado = 'ERROR'
-            self.intentos += 1
-            self.error_mensaje = str(e)
+            self.marcar_fallido(e)
             self.save()
-            
             return False
     
     @classmethod
-    def crear_desde_plantilla(cls, tipo_codigo, destinatario_email, contexto, evento=None, inscripcion=None):
+    def reclamar_pendientes(cls, limite=100, minutos_reserva=10):
+        """
+        Reserva hasta `limite` notificaciones pendientes cuya fecha programada ya pasó
+        
+        Las filas se bloquean con skip_locked para que varios workers puedan
+        trabajar en paralelo. La reserva adelanta fecha_programada: si el worker
+        se cae antes de registrar el resultado, la notificación vuelve a quedar
+        disponible al terminar la reserva.
+        """
+        from datetime import timedelta
+        from django.db import transaction
+        
+        ahora = timezone.now()
+        with transaction.atomic():
+            notificaciones = list(
+                cls.objects.select_for_update(skip_locked=True).filter(
+                    estado='PENDIENTE',
+                    fecha_programada__lte=ahora
+                ).order_by('fecha_programada', 'pk')[:limite]
+            )
+            if notificaciones:
+                cls.objects.filter(pk__in=[n.pk for n in notificaciones]).update(
+                    fecha_programada=ahora + timedelta(minutes=minutos_reserva),
+                    intentos=models.F('intentos') + 1
+                )
+                for notificacion in notificaciones:
+                    notificacion.intentos += 1
+        
+        return notificaciones
+    
+    @classmethod
+    def despachar_pendientes(cls, tamano_lote=50):
         """
-        Crea y envía una notificación usando una plantilla activa
+        Envía un lote de notificaciones pendientes reutilizando una sola
+        conexión SMTP para todo el lote
+        Retorna una tupla (enviadas, fallidas)
         """
+        from django.core.mail import get_connection
+        
+        notificaciones = cls.reclamar_pendientes(limite=tamano_lote)
+        if not notificaciones:
+            return 0, 0
+        
+        enviadas = 0
+        connection = get_connection()
         try:
-            tipo_notif = TipoNotificacion.objects.get(codigo=tipo_codigo, activo=True)
-            plantilla = PlantillaCorreo.objects.filter(
-                tipo_notificacion=tipo_notif,
-                activa=True
-            ).first()
+            connection.open()
+        except Exception as e:
+            for notificacion in notificaciones:
+                notificacion.marcar_fallido(e)
+        else:
+            try:
+                for notificacion in notificaciones:
+                    # Un mensaje por llamada para aislar los errores de cada destinatario
+                    try:
+                        connection.send_messages([notificacion.construir_mensaje(connection)])
+                        notificacion.marcar_enviado()
+                        enviadas += 1
+                    except Exception as e:
+                        notificacion.marcar_fallido(e)
+            finally:
+                connection.close()
+        
+        cls.objects.bulk_update(
+            notificaciones,
+            ['estado', 'fecha_envio', 'fecha_programada', 'error_mensaje']
+        )
+        return enviadas, len(notificaciones) - enviadas
+    
+    @classmethod
+    def crear_desde_plantilla(cls, tipo_codigo, destinatario_email, contexto, evento=None,
+                              inscripcion=None, fecha_programada=None):
+        """
+        Crea una notificación PENDIENTE usando una plantilla activa
+        El envío lo realiza el comando `enviar_notificaciones`
+        """
+        try:
+            tipo_notif, plantilla = PlantillaCorreo.activa_para(tipo_codigo)
             
             if not plantilla:
                 raise ValueError(f"No hay plantilla activa para {tipo_codigo}")
@@ -302,12 +499,10 @@ class Notificacion(models.Model):
                 asunto=contenido['asunto'],
                 cuerpo=contenido['cuerpo_html'] or contenido['cuerpo_texto'],
                 evento=evento,
-                inscripcion=inscripcion
+                inscripcion=inscripcion,
+                fecha_programada=fecha_programada or timezone.now()
             )
             
-            # Enviar inmediatamente
-            notificacion.enviar()
-            
             return notificacion
             
         except Exception as e:
@@ -348,10 +543,149 @@ class ConfiguracionRecordatorio(models.Model):
         blank=True,
         help_text="Fecha en que se envió el recordatorio"
     )
+    fecha_recordatorio = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="Inicio del evento menos horas_antes (calculado)"
+    )
+    ultimo_id_procesado = models.PositiveBigIntegerField(
+        default=0,
+        editable=False,
+        help_text="Cursor: id de la última inscripción con recordatorio encolado"
+    )
+    total_encolados = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text="Recordatorios encolados hasta ahora"
+    )
     
     class Meta:
         verbose_name = 'Configuración de Recordatorio'
         verbose_name_plural = 'Configuraciones de Recordatorios'
+        indexes = [
+            models.Index(fields=['activo', 'enviado', 'fecha_recordatorio']),
+        ]
     
     def __str__(self):
         return f"Recordatorio: {self.evento.nombre} ({self.horas_antes}h antes)"
+    
+    def calcular_fecha_recordatorio(self):
+        from datetime import timedelta
+        return self.evento.fecha_inicio - timedelta(hours=self.horas_antes)
+    
+    def save(self, *args, **kwargs):
+        """Mantiene fecha_recordatorio sincronizada con el evento"""
+        self.fecha_recordatorio = self.calcular_fecha_recordatorio()
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = set(kwargs['update_fields']) | {'fecha_recordatorio'}
+        super().save(*args, **kwargs)
+    
+    @classmethod
+    def pendientes(cls, ahora=None):
+        """
+        Configuraciones cuyo recordatorio ya debe enviarse (HU-22)
+        Una sola consulta sobre el índice (activo, enviado, fecha_recordatorio);
+        se omiten eventos que ya comenzaron o no están publicados
+        """
+        ahora = ahora or timezone.now()
+        return cls.objects.filter(
+            activo=True,
+            enviado=False,
+            fecha_recordatorio__lte=ahora,
+            evento__fecha_inicio__gt=ahora,
+            evento__estado='PUBLICADO'
+        ).select_related('evento').order_by('fecha_recordatorio')
+    
+    @classmethod
+    def procesar_pendientes(cls, tamano_lote=2000):
+        """
+        Encola los recordatorios de todas las configuraciones vencidas
+        Retorna el número de notificaciones encoladas
+        """
+        import logging
+        logger = logging.getLogger('django')
+        
+        total = 0
+        for configuracion in cls.pendientes():
+            try:
+                total += configuracion.encolar_recordatorios(tamano_lote)
+            except (ValueError, TipoNotificacion.DoesNotExist) as e:
+                logger.error(f"Recordatorio de {configuracion.evento.nombre} no encolado: {str(e)}")
+        return total
+    
+    def encolar_recordatorios(self, tamano_lote=2000):
+        """
+        Crea las notificaciones RECORDATORIO_EVENTO para los inscritos confirmados
+        
+        Cada lote se inserta con bulk_create en la misma transacción que avanza
+        el cursor ultimo_id_procesado, así una ejecución interrumpida continúa
+        donde quedó sin duplicar recordatorios. La fila se bloquea con
+        skip_locked para que dos programadores no procesen el mismo evento.
+        """
+        from django.db import transaction
+        
+        tipo_notif, plantilla = PlantillaCorreo.activa_para('RECORDATORIO_EVENTO')
+        if not plantilla:
+            raise ValueError("No hay plantilla activa para RECORDATORIO_EVENTO")
+        
+        evento = self.evento
+        contexto_evento = {
+            'evento': evento.nombre,
+            'fecha': timezone.localtime(evento.fecha_inicio).strftime('%d/%m/%Y'),
+            'hora': timezone.localtime(evento.fecha_inicio).strftime('%H:%M'),
+            'lugar': evento.lugar,
+            'mensaje': self.mensaje_personalizado,
+        }
+        
+        encolados = 0
+        while True:
+            with transaction.atomic():
+                configuracion = ConfiguracionRecordatorio.objects.select_for_update(
+                    skip_locked=True
+                ).filter(pk=self.pk, enviado=False).first()
+                if configuracion is None:
+                    break
+                
+                filas = list(
+                    Inscripcion.objects.filter(
+                        evento_id=self.evento_id,
+                        estado='CONFIRMADA',
+                        pk__gt=configuracion.ultimo_id_procesado
+                    ).order_by('pk').values_list('pk', 'nombre', 'apellido', 'correo')[:tamano_lote]
+                )
+                
+                if not filas:
+                    configuracion.enviado = True
+                    configuracion.fecha_envio = timezone.now()
+                    configuracion.save(update_fields=['enviado', 'fecha_envio'])
+                    break
+                
+                contenidos = plantilla.renderizar_lote([
+                    dict(contexto_evento, nombre=f"{nombre} {apellido}")
+                    for _, nombre, apellido, _ in filas
+                ])
+                ahora = timezone.now()
+                Notificacion.objects.bulk_create([
+                    Notificacion(
+                        tipo_notificacion=tipo_notif,
+                        destinatario_email=correo,
+                        destinatario_nombre=f"{nombre} {apellido}",
+                        asunto=contenido['asunto'],
+                        cuerpo=contenido['cuerpo_html'] or contenido['cuerpo_texto'],
+                        fecha_programada=ahora,
+                        evento_id=self.evento_id,
+                        inscripcion_id=inscripcion_id
+                    )
+                    for (inscripcion_id, nombre, apellido, correo), contenido in zip(filas, contenidos)
+                ])
+                
+                configuracion.ultimo_id_procesado = filas[-1][0]
+                configuracion.total_encolados += len(filas)
+                configuracion.save(update_fields=['ultimo_id_procesado', 'total_encolados'])
+                encolados += len(filas)
+        
+        self.refresh_from_db(fields=[
+            'enviado', 'fecha_envio', 'ultimo_id_procesado', 'total_encolados'
+        ])
+        return encolados
@@ -1,3 +1,254 @@
+"""
+Tests para la aplicación de Notificaciones
+HU-21: Confirmación de Inscripción
+HU-22: Recordatorios Previos
+HU-24: Configuración de Plantillas de Correo
+"""
+
+from django.core import mail
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
 from django.test import TestCase
+from django.utils import timezone
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from eventos.models import Evento, TipoEvento
+from inscripciones.models import Inscripcion
+from usuarios.models import Usuario
+
+from notificaciones import models as modelos_notificaciones
+from notificaciones.models import (
+    ConfiguracionRecordatorio, Notificacion, PlantillaCorreo, TipoNotificacion,
+    limpiar_cache_plantillas
+)
+
+
+class DespachoNotificacionesTest(TestCase):
+    """
+    Tests para el envío asíncrono de notificaciones
+    """
+
+    def setUp(self):
+        self.tipo = TipoNotificacion.objects.create(
+            codigo='CONFIRMACION_INSCRIPCION',
+            nombre='Confirmación'
+        )
+        PlantillaCorreo.objects.create(
+            tipo_notificacion=self.tipo,
+            nombre='Base',
+            asunto='Inscripción a {{ evento }}',
+            cuerpo_texto='Hola {{ nombre }}',
+            activa=True
+        )
+
+    def _crear(self, cantidad, **kwargs):
+        return [
+            Notificacion.objects.create(
+                tipo_notificacion=self.tipo,
+                destinatario_email=f'n{i}@test.com',
+                asunto='Asunto',
+                cuerpo='Cuerpo',
+                **kwargs
+            )
+            for i in range(cantidad)
+        ]
+
+    def test_crear_desde_plantilla_solo_encola(self):
+        """La notificación queda PENDIENTE sin enviar correo en la petición"""
+        notificacion = Notificacion.crear_desde_plantilla(
+            'CONFIRMACION_INSCRIPCION', 'ana@test.com',
+            {'nombre': 'Ana', 'evento': 'Congreso'}
+        )
+
+        self.assertEqual(notificacion.estado, 'PENDIENTE')
+        self.assertEqual(notificacion.asunto, 'Inscripción a Congreso')
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_despacha_en_lotes_con_una_conexion(self):
+        """Cada lote abre una sola conexión y solo envía las notificaciones vencidas"""
+        self._crear(5)
+        self._crear(2, fecha_programada=timezone.now() + timedelta(hours=2))
+
+        with mock.patch.object(EmailBackend, 'open', autospec=True) as abrir:
+            call_command('enviar_notificaciones', '--una-vez', '--lote=3', stdout=mock.MagicMock())
+
+        self.assertEqual(abrir.call_count, 2)
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertEqual(Notificacion.objects.filter(estado='ENVIADO').count(), 5)
+        self.assertEqual(Notificacion.objects.filter(estado='PENDIENTE').count(), 2)
+
+    def test_reintento_con_espera(self):
+        """Un envío fallido se reprograma y pasa a ERROR al agotar los intentos"""
+        notificacion, = self._crear(1)
+
+        with mock.patch.object(EmailBackend, 'send_messages', side_effect=OSError('SMTP caído')):
+            self.assertEqual(Notificacion.despachar_pendientes(), (0, 1))
+
+        notificacion.refresh_from_db()
+        self.assertEqual(notificacion.estado, 'PENDIENTE')
+        self.assertEqual(notificacion.intentos, 1)
+        self.assertGreater(notificacion.fecha_programada, timezone.now() + timedelta(minutes=4))
+        self.assertEqual(Notificacion.despachar_pendientes(), (0, 0))
+
+        Notificacion.objects.filter(pk=notificacion.pk).update(
+            intentos=Notificacion.MAX_INTENTOS - 1,
+            fecha_programada=timezone.now()
+        )
+        with mock.patch.object(EmailBackend, 'send_messages', side_effect=OSError('SMTP caído')):
+            Notificacion.despachar_pendientes()
+
+        notificacion.refresh_from_db()
+        self.assertEqual(notificacion.estado, 'ERROR')
+        self.assertEqual(notificacion.error_mensaje, 'SMTP caído')
+
+
+class CachePlantillasTest(TestCase):
+    """
+    Tests para la caché de plantillas compiladas (HU-24)
+    """
+
+    def setUp(self):
+        limpiar_cache_plantillas()
+        self.tipo = TipoNotificacion.objects.create(
+            codigo='RECORDATORIO_EVENTO',
+            nombre='Recordatorio'
+        )
+        self.plantilla = PlantillaCorreo.objects.create(
+            tipo_notificacion=self.tipo,
+            nombre='Base',
+            asunto='Recordatorio: {{ evento }}',
+            cuerpo_texto='Hola {{ nombre }}',
+            cuerpo_html='<p>Hola {{ nombre }}</p>',
+            pie_pagina='PRCE',
+            activa=True
+        )
+
+    def test_renderizar_lote_compila_una_vez(self):
+        """Las plantillas se compilan una sola vez para todo el lote"""
+        contextos = [{'nombre': f'P{i}', 'evento': 'Congreso'} for i in range(50)]
+
+        with mock.patch.object(modelos_notificaciones, 'Template', wraps=modelos_notificaciones.Template) as compilar:
+            resultados = self.plantilla.renderizar_lote(contextos)
+            self.plantilla.renderizar(contextos[0])
+
+        self.assertEqual(compilar.call_count, 3)
+        self.assertEqual(len(resultados), 50)
+        self.assertEqual(resultados[7]['cuerpo_texto'], 'Hola P7\n\nPRCE')
+        self.assertEqual(resultados[7]['cuerpo_html'], '<p>Hola P7</p><br><br>PRCE')
+
+    def test_guardar_invalida_la_cache(self):
+        """Editar la plantilla descarta la versión compilada anterior"""
+        self.assertEqual(self.plantilla.renderizar({'evento': 'A'})['asunto'], 'Recordatorio: A')
+
+        self.plantilla.asunto = 'Mañana: {{ evento }}'
+        self.plantilla.save()
+
+        self.assertEqual(self.plantilla.renderizar({'evento': 'A'})['asunto'], 'Mañana: A')
+
+    def test_plantilla_activa_en_cache(self):
+        """La plantilla activa por tipo se consulta una vez y se renueva al guardar"""
+        with self.assertNumQueries(2):
+            PlantillaCorreo.activa_para('RECORDATORIO_EVENTO')
+        with self.assertNumQueries(0):
+            tipo, plantilla = PlantillaCorreo.activa_para('RECORDATORIO_EVENTO')
+        self.assertEqual(plantilla, self.plantilla)
+
+        nueva = PlantillaCorreo.objects.create(
+            tipo_notificacion=self.tipo,
+            nombre='Nueva',
+            asunto='Nuevo',
+            cuerpo_texto='Nuevo',
+            activa=True
+        )
+        self.assertEqual(PlantillaCorreo.activa_para('RECORDATORIO_EVENTO')[1], nueva)
+
+
+class RecordatoriosProgramadosTest(TestCase):
+    """
+    Tests para el programador de recordatorios (HU-22)
+    """
+
+    def setUp(self):
+        limpiar_cache_plantillas()
+        tipo = TipoNotificacion.objects.create(codigo='RECORDATORIO_EVENTO', nombre='Recordatorio')
+        PlantillaCorreo.objects.create(
+            tipo_notificacion=tipo,
+            nombre='Base',
+            asunto='Recordatorio: {{ evento }}',
+            cuerpo_texto='Hola {{ nombre }}, te esperamos el {{ fecha }}',
+            activa=True
+        )
+        self.evento = Evento.objects.create(
+            nombre='Congreso',
+            descripcion='Congreso',
+            tipo_evento=TipoEvento.objects.create(nombre='ACADEMICO'),
+            fecha_inicio=timezone.now() + timedelta(hours=10),
+            fecha_fin=timezone.now() + timedelta(hours=20),
+            lugar='Auditorio',
+            cupo_maximo=100,
+            costo=Decimal('0.00'),
+            estado='PUBLICADO',
+            creado_por=Usuario.objects.create_user(
+                username='organizador', password='testpass123', documento='5570001'
+            )
+        )
+        for i in range(5):
+            Inscripcion.objects.create(
+                evento=self.evento,
+                nombre='Participante',
+                apellido=str(i),
+                documento=f'{7000000 + i}',
+                correo=f'r{i}@test.com',
+                telefono='3001234567'
+            )
+        self.configuracion = ConfiguracionRecordatorio.objects.create(
+            evento=self.evento,
+            horas_antes=24
+        )
+
+    def test_solo_configuraciones_vencidas(self):
+        """Solo se encolan los recordatorios cuya hora de aviso llegó"""
+        self.configuracion.horas_antes = 2
+        self.configuracion.save()
+        self.assertEqual(ConfiguracionRecordatorio.procesar_pendientes(), 0)
+
+        # Adelantar el evento recalcula la fecha del recordatorio
+        self.evento.fecha_inicio = timezone.now() + timedelta(hours=1)
+        self.evento.save()
+        self.assertEqual(ConfiguracionRecordatorio.pendientes().count(), 1)
+
+    def test_encola_por_lotes_y_marca_enviado(self):
+        """Las notificaciones se insertan por lotes y la configuración queda enviada"""
+        with CaptureQueriesContext(connection) as consultas:
+            encolados = ConfiguracionRecordatorio.procesar_pendientes(tamano_lote=2)
+
+        inserciones = [q for q in consultas if q['sql'].startswith('INSERT')]
+        self.assertEqual(len(inserciones), 3)
+
+        self.assertEqual(encolados, 5)
+        self.configuracion.refresh_from_db()
+        self.assertTrue(self.configuracion.enviado)
+        self.assertEqual(self.configuracion.total_encolados, 5)
+        notificacion = Notificacion.objects.get(destinatario_email='r3@test.com')
+        self.assertEqual(notificacion.asunto, 'Recordatorio: Congreso')
+        self.assertTrue(notificacion.cuerpo.startswith('Hola Participante 3'))
+
+        self.assertEqual(ConfiguracionRecordatorio.procesar_pendientes(), 0)
+
+    def test_retoma_sin_duplicar(self):
+        """Una ejecución interrumpida continúa desde el cursor"""
+        primeras = Inscripcion.objects.order_by('pk')[:2]
+        ConfiguracionRecordatorio.objects.filter(pk=self.configuracion.pk).update(
+            ultimo_id_procesado=primeras[1].pk
+        )
+
+        call_command('programar_recordatorios', '--una-vez', stdout=mock.MagicMock())
 
-# Create your tests here.
+        self.assertEqual(Notificacion.objects.count(), 3)
+        self.assertFalse(
+            Notificacion.objects.filter(inscripcion__in=list(primeras)).exists()
+        )
@@ -26,6 +26,7 @@ from .forms import (
 from eventos.models import Evento
 from inscripciones.models import Inscripcion
 from usuarios.models import Usuario
+from registro_control_eventos.paginacion import paginar_por_cursor
 
 
 @login_required
@@ -53,7 +54,7 @@ def lista_notificaciones(request):
     errores = notificaciones.filter(estado='ERROR').count()
     
     context = {
-        'notificaciones': notificaciones.order_by('-fecha_programada')[:100],
+        'notificaciones': paginar_por_cursor(request, notificaciones, ['-fecha_programada']),
         'tipos': TipoNotificacion.objects.all(),
         'total': total,
         'enviadas': enviadas,
@@ -2,7 +2,9 @@
 Configuración del Admin para la aplicación de Pagos
 """
 
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.db import transaction
+from eventos.models import Evento, EstadisticaEvento
 from .models import MetodoPago, Pago
 
 
@@ -52,11 +54,33 @@ class PagoAdmin(admin.ModelAdmin):
     
     actions = ['confirmar_pagos', 'rechazar_pagos']
     
+    def delete_queryset(self, request, queryset):
+        """
+        Borrado masivo: el DELETE no pasa por Pago.delete, así que se
+        reconstruye el recaudo de los eventos afectados
+        """
+        eventos_ids = set(queryset.values_list('inscripcion__evento_id', flat=True))
+        with transaction.atomic():
+            super().delete_queryset(request, queryset)
+            EstadisticaEvento.recalcular(Evento.objects.filter(pk__in=eventos_ids))
+    
     def confirmar_pagos(self, request, queryset):
         """Acción para confirmar pagos seleccionados"""
+        confirmados = 0
+        sin_cupo = 0
         for pago in queryset.filter(estado='PENDIENTE'):
-            pago.confirmar(usuario=request.user)
-        self.message_user(request, f"{queryset.count()} pago(s) confirmado(s).")
+            try:
+                pago.confirmar(usuario=request.user)
+                confirmados += 1
+            except ValueError:
+                sin_cupo += 1
+        self.message_user(request, f"{confirmados} pago(s) confirmado(s).")
+        if sin_cupo:
+            self.message_user(
+                request,
+                f"{sin_cupo} pago(s) siguen pendientes: el evento no tiene cupos disponibles.",
+                messages.WARNING
+            )
     confirmar_pagos.short_description = "Confirmar pagos seleccionados"
     
     def rechazar_pagos(self, request, queryset):
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.8 on 2026-10-17 21:58
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inscripciones', '0004_indices_paginacion'),
+        ('pagos', '0003_delete_configuracionpasarela_alter_metodopago_codigo'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pago',
+            index=models.Index(fields=['-fecha_pago', '-id'], name='pagos_pago_fecha_p_ce86cd_idx'),
+        ),
+    ]
@@ -7,12 +7,12 @@ HU-26: Integración con Pasarela de Pagos
 HU-27: Reporte Financiero por Evento
 """
 
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone
 from django.core.validators import MinValueValidator
 from inscripciones.models import Inscripcion
 from usuarios.models import Usuario
-from eventos.models import Evento
+from eventos.models import Evento, EstadisticaEvento
 from decimal import Decimal
 
 
@@ -152,31 +152,75 @@ class Pago(models.Model):
             models.Index(fields=['inscripcion', 'estado']),
             models.Index(fields=['referencia']),
             models.Index(fields=['pasarela_transaccion_id']),
+            # Paginación por cursor de la lista de pagos
+            models.Index(fields=['-fecha_pago', '-id']),
         ]
     
     def __str__(self):
         return f"Pago {self.id} - {self.inscripcion.get_nombre_completo()} - ${self.monto}"
     
     def save(self, *args, **kwargs):
-        """Override save para lógica de negocio"""
+        """
+        Override save para lógica de negocio
+        Un pago completado confirma la inscripción en la misma transacción:
+        si el evento ya no tiene cupos lanza ValueError y el pago no se guarda
+        """
         is_new = self.pk is None
         
-        super().save(*args, **kwargs)
-        
-        # Si el pago se completa, actualizar la inscripción
-        if self.estado == 'COMPLETADO' and not self.inscripcion.pago_confirmado:
-            self.inscripcion.pago_confirmado = True
-            self.inscripcion.confirmar()
+        with transaction.atomic():
+            anterior = None
+            if not self._state.adding:
+                anterior = Pago.objects.select_for_update().filter(
+                    pk=self.pk
+                ).values('estado', 'monto').first()
             
-            # Generar código QR si no existe
-            if not self.inscripcion.codigo_qr:
-                import uuid
-                self.inscripcion.codigo_qr = uuid.uuid4()
-                self.inscripcion.save()
+            super().save(*args, **kwargs)
             
-            # Enviar notificación de confirmación
-            if is_new:
-                self.enviar_notificacion_confirmacion()
+            # Mantener el recaudo materializado del evento (HU-27, HU-30)
+            recaudado = Decimal('0')
+            if anterior and anterior['estado'] == 'COMPLETADO':
+                recaudado -= anterior['monto']
+            if self.estado == 'COMPLETADO':
+                recaudado += Decimal(self.monto)
+            if recaudado:
+                EstadisticaEvento.ajustar(self.inscripcion.evento_id, recaudado=recaudado)
+            
+            # Si el pago se completa, confirmar la inscripción (reserva el cupo)
+            confirma_inscripcion = self.estado == 'COMPLETADO' and not self.inscripcion.pago_confirmado
+            if confirma_inscripcion:
+                self.inscripcion.pago_confirmado = True
+                
+                # Generar código QR si no existe
+                if not self.inscripcion.codigo_qr:
+                    import uuid
+                    self.inscripcion.codigo_qr = uuid.uuid4()
+                
+                estado_inscripcion = self.inscripcion.estado
+                try:
+                    self.inscripcion.confirmar()
+                except ValueError:
+                    # La transacción se revierte: dejar los objetos como en la base
+                    self.inscripcion.estado = estado_inscripcion
+                    self.inscripcion.pago_confirmado = False
+                    if is_new:
+                        self.pk = None
+                        self._state.adding = True
+                    raise
+        
+        # Enviar notificación de confirmación
+        if confirma_inscripcion and is_new:
+            self.enviar_notificacion_confirmacion()
+    
+    def delete(self, *args, **kwargs):
+        """Override delete para descontar el pago del recaudo del evento"""
+        with transaction.atomic():
+            anterior = Pago.objects.select_for_update().filter(
+                pk=self.pk
+            ).values('estado', 'monto').first()
+            resultado = super().delete(*args, **kwargs)
+            if anterior and anterior['estado'] == 'COMPLETADO':
+                EstadisticaEvento.ajustar(self.inscripcion.evento_id, recaudado=-anterior['monto'])
+        return resultado
     
     def confirmar(self, usuario=None):
         """Confirma el pago (HU-25)"""
@@ -226,51 +270,93 @@ class Pago(models.Model):
             logger.error(f"Error al enviar notificación de pago: {str(e)}")
     
     @classmethod
-    def obtener_reporte_evento(cls, evento):
+    def resumen_financiero(cls, eventos, desde=None, hasta=None):
         """
-        Genera reporte financiero del evento (HU-27)
+        Resumen financiero de uno o varios eventos (HU-27)
+        
+        Todo el desglose (por evento, estado y método) sale de un único
+        GROUP BY sobre los pagos; el total esperado usa los contadores de
+        confirmados de cada evento. `desde`/`hasta` acotan la fecha de pago
+        (hasta es exclusivo). `eventos` puede ser un QuerySet o una lista.
         """
-        pagos_completados = cls.objects.filter(
-            inscripcion__evento=evento,
-            estado='COMPLETADO'
-        )
+        if isinstance(eventos, models.QuerySet):
+            pagos = cls.objects.filter(inscripcion__evento__in=eventos.values('pk'))
+            eventos = list(eventos)
+        else:
+            eventos = list(eventos)
+            pagos = cls.objects.filter(inscripcion__evento__in=[evento.pk for evento in eventos])
         
-        total_recaudado = pagos_completados.aggregate(
-            total=models.Sum('monto')
-        )['total'] or Decimal('0.00')
+        if desde:
+            pagos = pagos.filter(fecha_pago__gte=desde)
+        if hasta:
+            pagos = pagos.filter(fecha_pago__lt=hasta)
         
-        pagos_pendientes = cls.objects.filter(
-            inscripcion__evento=evento,
-            estado='PENDIENTE'
+        grupos = pagos.order_by().values(
+            'inscripcion__evento', 'estado', 'metodo_pago__codigo'
+        ).annotate(
+            total=models.Sum('monto'),
+            cantidad=models.Count('pk')
         )
         
-        total_pendiente = pagos_pendientes.aggregate(
-            total=models.Sum('monto')
-        )['total'] or Decimal('0.00')
-        
-        # Calcular total esperado
-        inscritos_confirmados = evento.inscripciones.filter(estado='CONFIRMADA').count()
-        total_esperado = evento.costo * inscritos_confirmados
-        
-        # Desglose por método de pago
+        cero = Decimal('0.00')
+        nombres_metodo = dict(MetodoPago.METODOS)
+        por_estado = {
+            codigo: {'estado': nombre, 'total': cero, 'cantidad': 0}
+            for codigo, nombre in cls.ESTADO_CHOICES
+        }
         por_metodo = {}
-        for metodo in MetodoPago.objects.filter(activo=True):
-            total_metodo = pagos_completados.filter(
-                metodo_pago=metodo
-            ).aggregate(total=models.Sum('monto'))['total'] or Decimal('0.00')
-            
-            por_metodo[metodo.get_codigo_display()] = {
-                'total': total_metodo,
-                'cantidad': pagos_completados.filter(metodo_pago=metodo).count()
+        por_evento = {
+            evento.pk: {
+                'evento': evento,
+                'inscritos_confirmados': evento.inscritos_confirmados,
+                'total_esperado': evento.costo * evento.inscritos_confirmados,
+                'total_recaudado': cero,
+                'total_pendiente': cero,
+                'pagos_completados': 0,
+                'pagos_pendientes': 0,
             }
+            for evento in eventos
+        }
+        
+        for grupo in grupos:
+            por_estado[grupo['estado']]['total'] += grupo['total']
+            por_estado[grupo['estado']]['cantidad'] += grupo['cantidad']
+            
+            fila = por_evento[grupo['inscripcion__evento']]
+            if grupo['estado'] == 'COMPLETADO':
+                fila['total_recaudado'] += grupo['total']
+                fila['pagos_completados'] += grupo['cantidad']
+                
+                metodo = por_metodo.setdefault(
+                    nombres_metodo.get(grupo['metodo_pago__codigo'], grupo['metodo_pago__codigo']),
+                    {'total': cero, 'cantidad': 0}
+                )
+                metodo['total'] += grupo['total']
+                metodo['cantidad'] += grupo['cantidad']
+            elif grupo['estado'] == 'PENDIENTE':
+                fila['total_pendiente'] += grupo['total']
+                fila['pagos_pendientes'] += grupo['cantidad']
         
         return {
-            'total_recaudado': total_recaudado,
-            'total_pendiente': total_pendiente,
-            'total_esperado': total_esperado,
-            'inscritos_confirmados': inscritos_confirmados,
-            'costo_evento': evento.costo,
+            'total_recaudado': por_estado['COMPLETADO']['total'],
+            'total_pendiente': por_estado['PENDIENTE']['total'],
+            'total_esperado': sum((fila['total_esperado'] for fila in por_evento.values()), cero),
+            'inscritos_confirmados': sum(fila['inscritos_confirmados'] for fila in por_evento.values()),
             'por_metodo': por_metodo,
-            'pagos_completados': pagos_completados.count(),
-            'pagos_pendientes': pagos_pendientes.count(),
+            'por_estado': list(por_estado.values()),
+            'por_evento': list(por_evento.values()),
+            'pagos_completados': por_estado['COMPLETADO']['cantidad'],
+            'pagos_pendientes': por_estado['PENDIENTE']['cantidad'],
+            'desde': desde,
+            'hasta': hasta,
         }
+    
+    @classmethod
+    def obtener_reporte_evento(cls, evento, desde=None, hasta=None):
+        """
+        Genera reporte financiero del evento (HU-27)
+        Una sola consulta agrupada (ver resumen_financiero)
+        """
+        reporte = cls.resumen_financiero([evento], desde=desde, hasta=hasta)
+        reporte['costo_evento'] = evento.costo
+        return reporte
@@ -1,3 +1,182 @@
-from django.test import TestCase
+"""
+Tests para la aplicación de Pagos
+HU-27: Reporte Financiero por Evento
+"""
 
-# Create your tests here.
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from datetime import timedelta
+from decimal import Decimal
+
+from eventos.models import Evento, TipoEvento
+from inscripciones.models import Inscripcion
+from usuarios.models import Usuario
+from pagos.models import MetodoPago, Pago
+
+
+class ReporteFinancieroTest(TestCase):
+    """
+    Tests para el reporte financiero agrupado (HU-27)
+    Verifica los totales y que el número de consultas sea constante
+    """
+
+    def setUp(self):
+        self.client = Client()
+        self.tipo_evento = TipoEvento.objects.create(nombre='ACADEMICO')
+        self.admin = Usuario.objects.create_user(
+            username='admin_pagos',
+            email='admin_pagos@test.com',
+            password='testpass123',
+            rol='ADMINISTRADOR',
+            documento='7770001'
+        )
+        self.efectivo = MetodoPago.objects.create(codigo='EFECTIVO', nombre='Efectivo')
+        self.tarjeta = MetodoPago.objects.create(codigo='TARJETA', nombre='Tarjeta')
+        self.eventos = [self._crear_evento(f'Curso {numero}') for numero in range(2)]
+        self.contador = 0
+
+    def _crear_evento(self, nombre):
+        return Evento.objects.create(
+            nombre=nombre,
+            descripcion='Curso pago',
+            tipo_evento=self.tipo_evento,
+            fecha_inicio=timezone.now() + timedelta(days=3),
+            fecha_fin=timezone.now() + timedelta(days=4),
+            lugar='Sala 1',
+            cupo_maximo=100,
+            costo=Decimal('100.00'),
+            estado='PUBLICADO',
+            creado_por=self.admin
+        )
+
+    def _pagar(self, evento, metodo, estado, fecha_pago=None):
+        self.contador += 1
+        inscripcion = Inscripcion.objects.create(
+            evento=evento,
+            nombre='Participante',
+            apellido=f'{self.contador:04d}',
+            documento=f'{8000000 + self.contador}',
+            correo=f'pago{self.contador}@test.com',
+            telefono='3001234567'
+        )
+        return Pago.objects.create(
+            inscripcion=inscripcion,
+            monto=evento.costo,
+            metodo_pago=metodo,
+            estado=estado,
+            fecha_pago=fecha_pago or timezone.now()
+        )
+
+    def test_pago_de_evento_lleno_no_se_guarda(self):
+        """Sin cupos, el pago completado se revierte junto con la confirmación"""
+        evento = self.eventos[0]
+        evento.cupo_maximo = 1
+        evento.save()
+        self._pagar(evento, self.efectivo, 'COMPLETADO')
+
+        with self.assertRaises(ValueError):
+            self._pagar(evento, self.tarjeta, 'COMPLETADO')
+
+        self.assertEqual(Pago.objects.filter(inscripcion__evento=evento).count(), 1)
+        rezagada = Inscripcion.objects.get(evento=evento, apellido=f'{self.contador:04d}')
+        self.assertEqual(rezagada.estado, 'PENDIENTE')
+        self.assertFalse(rezagada.pago_confirmado)
+        evento.refresh_from_db()
+        self.assertEqual(evento.inscritos_confirmados, 1)
+
+    def test_pagar_evento_lleno_muestra_mensaje(self):
+        """La vista de pago en efectivo informa la falta de cupos en vez de fallar"""
+        evento = self.eventos[0]
+        evento.cupo_maximo = 1
+        evento.save()
+        self._pagar(evento, self.efectivo, 'COMPLETADO')
+        inscripcion = Inscripcion.objects.create(
+            evento=evento,
+            nombre='Participante',
+            apellido='Rezagado',
+            documento='8999999',
+            correo='rezagado@test.com',
+            telefono='3001234567'
+        )
+
+        response = self.client.post(
+            reverse('pagos:pagar_efectivo', args=[inscripcion.pk]),
+            {'monto': '100.00', 'notas': ''},
+            follow=True
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'no fue registrado')
+        self.assertFalse(Pago.objects.filter(inscripcion=inscripcion).exists())
+        inscripcion.refresh_from_db()
+        self.assertEqual(inscripcion.estado, 'PENDIENTE')
+
+    def test_reporte_evento_en_una_consulta(self):
+        """El reporte de un evento sale de un único GROUP BY"""
+        evento = self.eventos[0]
+        self._pagar(evento, self.efectivo, 'COMPLETADO')
+        self._pagar(evento, self.tarjeta, 'COMPLETADO')
+        self._pagar(evento, self.tarjeta, 'COMPLETADO')
+        self._pagar(evento, self.efectivo, 'PENDIENTE')
+        self._pagar(self.eventos[1], self.efectivo, 'COMPLETADO')
+        evento.refresh_from_db()
+
+        with self.assertNumQueries(1):
+            reporte = Pago.obtener_reporte_evento(evento)
+
+        self.assertEqual(reporte['total_recaudado'], Decimal('300.00'))
+        self.assertEqual(reporte['total_pendiente'], Decimal('100.00'))
+        self.assertEqual(reporte['pagos_completados'], 3)
+        self.assertEqual(reporte['pagos_pendientes'], 1)
+        self.assertEqual(reporte['inscritos_confirmados'], 3)
+        self.assertEqual(reporte['total_esperado'], Decimal('300.00'))
+        self.assertEqual(reporte['por_metodo']['Tarjeta de Crédito/Débito']['cantidad'], 2)
+        self.assertEqual(reporte['por_metodo']['Efectivo']['total'], Decimal('100.00'))
+
+    def test_resumen_varios_eventos_y_rango(self):
+        """El resumen separa por evento y respeta el rango de fechas de pago"""
+        self._pagar(self.eventos[0], self.efectivo, 'COMPLETADO', timezone.now() - timedelta(days=10))
+        self._pagar(self.eventos[0], self.efectivo, 'COMPLETADO')
+        self._pagar(self.eventos[1], self.tarjeta, 'COMPLETADO')
+
+        reporte = Pago.resumen_financiero(
+            Evento.objects.order_by('pk'),
+            desde=timezone.now() - timedelta(days=1)
+        )
+
+        self.assertEqual(reporte['total_recaudado'], Decimal('200.00'))
+        self.assertEqual(
+            [fila['total_recaudado'] for fila in reporte['por_evento']],
+            [Decimal('100.00'), Decimal('100.00')]
+        )
+
+    def test_vistas_en_consultas_constantes(self):
+        """Las vistas del reporte cuestan lo mismo con más pagos, métodos y eventos"""
+        self.client.login(username='admin_pagos', password='testpass123')
+        urls = [
+            reverse('pagos:reporte', args=[self.eventos[0].pk]),
+            reverse('pagos:reporte_general'),
+        ]
+        self._pagar(self.eventos[0], self.efectivo, 'COMPLETADO')
+
+        consultas_iniciales = []
+        for url in urls:
+            with CaptureQueriesContext(connection) as consultas:
+                self.assertEqual(self.client.get(url).status_code, 200)
+            consultas_iniciales.append(len(consultas))
+
+        transferencia = MetodoPago.objects.create(codigo='TRANSFERENCIA', nombre='Transferencia')
+        self.eventos.append(self._crear_evento('Curso extra'))
+        for evento in self.eventos:
+            for metodo in (self.efectivo, self.tarjeta, transferencia):
+                self._pagar(evento, metodo, 'COMPLETADO')
+                self._pagar(evento, metodo, 'PENDIENTE')
+
+        for url, esperado in zip(urls, consultas_iniciales):
+            with CaptureQueriesContext(connection) as consultas:
+                response = self.client.get(url, {'desde': '2000-01-01'})
+            self.assertEqual(len(consultas), esperado, url)
+        self.assertEqual(response.context['reporte']['total_recaudado'], Decimal('1000.00'))
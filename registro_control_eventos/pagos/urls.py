@@ -23,7 +23,9 @@ urlpatterns = [
     path('<int:pago_id>/confirmar-manual/', views.confirmar_pago_manual, name='confirmar_manual'),
     
     # Reportes
+    path('reporte/', views.reporte_financiero, name='reporte_general'),
     path('reporte/<int:evento_id>/', views.reporte_financiero, name='reporte'),
+    path('reporte/<int:evento_id>/exportar/<str:formato>/', views.exportar_reporte_financiero, name='exportar_reporte'),
 ]
 
 
@@ -27,6 +27,8 @@ from .forms import (
 )
 from inscripciones.models import Inscripcion
 from eventos.models import Evento
+from reportes.exportacion import respuesta_exportacion, TAMANO_LOTE
+from registro_control_eventos.paginacion import paginar_por_cursor
 
 
 def verificar_acceso_pago(request, inscripcion):
@@ -81,7 +83,7 @@ def lista_pagos(request):
     pendientes = pagos.filter(estado='PENDIENTE').count()
     
     context = {
-        'pagos': pagos.order_by('-fecha_pago'),
+        'pagos': paginar_por_cursor(request, pagos, ['-fecha_pago']),
         'metodos_pago': MetodoPago.objects.filter(activo=True),
         'eventos': Evento.objects.all(),
         'total_pagos': total_pagos,
@@ -149,16 +151,13 @@ def procesar_pago_efectivo(request, inscripcion_id):
             pago.metodo_pago = metodo
             pago.estado = 'COMPLETADO'  # Efectivo se considera completado inmediatamente
             pago.registrado_por = request.user if request.user.is_authenticated else None
-            pago.save()
-            
-            # Actualizar inscripción
-            inscripcion.pago_confirmado = True
-            inscripcion.fecha_confirmacion = timezone.now()
-            inscripcion.estado = 'CONFIRMADA'
-            inscripcion.save()
             
-            # Enviar notificación (simulada)
-            pago.enviar_notificacion_confirmacion()
+            try:
+                # Pago.save confirma la inscripción y reserva el cupo en la misma transacción
+                pago.save()
+            except ValueError as e:
+                messages.error(request, f'{e}. El pago no fue registrado.')
+                return redirect('inscripciones:confirmacion_inscripcion', pk=inscripcion.pk)
             
             messages.success(request, '✓ Pago en efectivo registrado exitosamente')
             return redirect('inscripciones:confirmacion_inscripcion', pk=inscripcion.pk)
@@ -244,16 +243,12 @@ def procesar_pago_tarjeta(request, inscripcion_id):
             # Generar ID de transacción simulado
             pago.pasarela_transaccion_id = f"SIM-{uuid.uuid4().hex[:12].upper()}"
             
-            pago.save()
-            
-            # Actualizar inscripción
-            inscripcion.pago_confirmado = True
-            inscripcion.fecha_confirmacion = timezone.now()
-            inscripcion.estado = 'CONFIRMADA'
-            inscripcion.save()
-            
-            # Enviar notificación (simulada)
-            pago.enviar_notificacion_confirmacion()
+            try:
+                # Pago.save confirma la inscripción y reserva el cupo en la misma transacción
+                pago.save()
+            except ValueError as e:
+                messages.error(request, f'{e}. El pago no fue procesado.')
+                return redirect('inscripciones:confirmacion_inscripcion', pk=inscripcion.pk)
             
             messages.success(request, '✓ Pago con tarjeta procesado exitosamente')
             return redirect('inscripciones:confirmacion_inscripcion', pk=inscripcion.pk)
@@ -316,7 +311,11 @@ def confirmar_pago_manual(request, pago_id):
             notas = form.cleaned_data.get('notas', '')
             
             if accion == 'CONFIRMAR':
-                pago.confirmar(usuario=request.user)
+                try:
+                    pago.confirmar(usuario=request.user)
+                except ValueError as e:
+                    messages.error(request, f'{e}. El pago sigue pendiente.')
+                    return redirect('pagos:detalle', pago_id=pago.id)
                 messages.success(request, '✓ Pago confirmado exitosamente')
             else:
                 pago.rechazar(motivo=notas)
@@ -334,19 +333,103 @@ def confirmar_pago_manual(request, pago_id):
     return render(request, 'pagos/confirmar_manual.html', context)
 
 
+def _rango_fechas(request):
+    """
+    Lee el rango ?desde=AAAA-MM-DD&hasta=AAAA-MM-DD (ambos inclusive)
+    Retorna (desde, hasta) como datetimes con zona horaria; hasta es exclusivo
+    """
+    from datetime import datetime, timedelta
+    
+    rango = []
+    for parametro, dias in (('desde', 0), ('hasta', 1)):
+        valor = request.GET.get(parametro, '').strip()
+        if not valor:
+            rango.append(None)
+            continue
+        try:
+            fecha = datetime.strptime(valor, '%Y-%m-%d') + timedelta(days=dias)
+        except ValueError:
+            messages.warning(request, f'Fecha "{valor}" inválida, se ignora el filtro')
+            rango.append(None)
+            continue
+        rango.append(timezone.make_aware(fecha))
+    return tuple(rango)
+
+
 @login_required
-def reporte_financiero(request, evento_id):
-    """Reporte financiero de un evento (HU-27)"""
+def reporte_financiero(request, evento_id=None):
+    """
+    Reporte financiero de un evento o resumen de varios eventos (HU-27)
+    Admite ?desde= y ?hasta= para acotar por fecha de pago y, en el resumen,
+    ?evento=<id> (repetible) para elegir los eventos.
+    """
     if not request.user.puede_gestionar_eventos():
         messages.error(request, 'No tiene permisos')
         return redirect('dashboard:index')
     
-    evento = get_object_or_404(Evento, pk=evento_id)
-    reporte = Pago.obtener_reporte_evento(evento)
+    desde, hasta = _rango_fechas(request)
+    
+    if evento_id is not None:
+        evento = get_object_or_404(Evento, pk=evento_id)
+        seleccionados = []
+        reporte = Pago.obtener_reporte_evento(evento, desde=desde, hasta=hasta)
+    else:
+        evento = None
+        eventos = Evento.objects.only(
+            'pk', 'nombre', 'estado', 'fecha_inicio', 'costo', 'inscritos_confirmados'
+        ).order_by('-fecha_inicio', '-pk')
+        if request.user.es_organizador() and not request.user.es_administrador():
+            eventos = eventos.filter(creado_por=request.user)
+        seleccionados = [valor for valor in request.GET.getlist('evento') if valor.isdigit()]
+        if seleccionados:
+            eventos = eventos.filter(pk__in=seleccionados)
+        reporte = Pago.resumen_financiero(eventos, desde=desde, hasta=hasta)
     
     context = {
         'evento': evento,
         'reporte': reporte,
+        'desde': request.GET.get('desde', ''),
+        'hasta': request.GET.get('hasta', ''),
+        'eventos_seleccionados': seleccionados,
     }
     
     return render(request, 'pagos/reporte.html', context)
+
+
+ENCABEZADOS_PAGOS = [
+    'ID', 'Nombre', 'Apellido', 'Documento', 'Método de pago',
+    'Monto', 'Estado', 'Referencia', 'Fecha de pago', 'Fecha de confirmación'
+]
+
+
+def _filas_pagos_evento(evento):
+    """Filas de pagos del evento recorridas en lotes con .iterator()"""
+    filas = Pago.objects.filter(
+        inscripcion__evento=evento
+    ).order_by('-fecha_pago', '-pk').values_list(
+        'pk', 'inscripcion__nombre', 'inscripcion__apellido', 'inscripcion__documento',
+        'metodo_pago__nombre', 'monto', 'estado', 'referencia',
+        'fecha_pago', 'fecha_confirmacion'
+    )
+    for fila in filas.iterator(chunk_size=TAMANO_LOTE):
+        fila = list(fila)
+        fila[8] = timezone.localtime(fila[8]).strftime('%d/%m/%Y %H:%M')
+        fila[9] = timezone.localtime(fila[9]).strftime('%d/%m/%Y %H:%M') if fila[9] else ''
+        yield fila
+
+
+@login_required
+def exportar_reporte_financiero(request, evento_id, formato):
+    """Exporta en streaming los pagos del reporte financiero de un evento (HU-27, HU-29)"""
+    if not request.user.puede_gestionar_eventos():
+        messages.error(request, 'No tiene permisos')
+        return redirect('dashboard:index')
+    
+    evento = get_object_or_404(Evento, pk=evento_id)
+    return respuesta_exportacion(
+        formato,
+        f'pagos_evento_{evento.pk}',
+        ENCABEZADOS_PAGOS,
+        _filas_pagos_evento(evento),
+        titulo_hoja='Pagos'
+    )
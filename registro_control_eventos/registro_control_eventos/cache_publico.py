@@ -0,0 +1,75 @@
+"""
+Caché de páginas públicas con claves versionadas
+PRCE - Plataforma de Registro y Control de Eventos
+
+Cada página cacheada pertenece a uno o más grupos ('catalogo', ...). La
+versión vigente de cada grupo forma parte de la clave, así que invalidar un
+grupo es un solo incremento: las entradas anteriores dejan de leerse y el
+backend las descarta al vencer. Funciona igual con LocMem, archivo,
+memcached o redis (settings.CACHES).
+
+Solo se cachean respuestas 200 a GET/HEAD de usuarios anónimos sin mensajes
+pendientes y que no usaron el token CSRF, por lo que nunca se comparte
+contenido propio de una sesión.
+"""
+
+from functools import wraps
+import hashlib
+
+from django.conf import settings
+from django.contrib import messages
+from django.core.cache import cache
+
+
+def _clave_version(grupo):
+    return f'version:{grupo}'
+
+
+def versiones(*grupos):
+    """Versión vigente de cada grupo (1 si nunca se invalidó)"""
+    claves = [_clave_version(grupo) for grupo in grupos]
+    guardadas = cache.get_many(claves)
+    return [guardadas.get(clave, 1) for clave in claves]
+
+
+def invalidar(*grupos):
+    """Descarta las páginas de los grupos incrementando su versión"""
+    for grupo in grupos:
+        clave = _clave_version(grupo)
+        try:
+            cache.incr(clave)
+        except ValueError:
+            # Sin versión guardada (nunca se invalidó o el backend la descartó)
+            cache.set(clave, 2, None)
+
+
+def cache_anonimo(*grupos, segundos=None):
+    """
+    Decorador de vistas: sirve la respuesta desde la caché a los anónimos
+    `grupos` admite campos de los argumentos de la vista ('evento:{evento_id}')
+    """
+    def decorador(vista):
+        @wraps(vista)
+        def envoltura(request, *args, **kwargs):
+            if (request.method not in ('GET', 'HEAD') or
+                    request.user.is_authenticated or
+                    len(messages.get_messages(request))):
+                return vista(request, *args, **kwargs)
+
+            nombres = [grupo.format(**kwargs) for grupo in grupos]
+            huella = hashlib.sha1(request.get_full_path().encode('utf-8')).hexdigest()
+            clave = 'pagina:{}:{}'.format(huella, '.'.join(map(str, versiones(*nombres))))
+
+            response = cache.get(clave)
+            if response is not None:
+                return response
+
+            response = vista(request, *args, **kwargs)
+            if response.status_code == 200 and not response.streaming and not request.META.get('CSRF_COOKIE_USED'):
+                if hasattr(response, 'render'):
+                    response.render()
+                tiempo = settings.SEGUNDOS_CACHE_PAGINAS_PUBLICAS if segundos is None else segundos
+                cache.set(clave, response, tiempo)
+            return response
+        return envoltura
+    return decorador
@@ -0,0 +1,144 @@
+"""
+Paginación por cursor (keyset) para las listas de gestión
+PRCE - Plataforma de Registro y Control de Eventos
+
+En lugar de OFFSET, cada página se consulta a partir de los valores de orden
+del último registro mostrado (WHERE (campo, id) < (valor, id) ORDER BY ...
+LIMIT n). Con un índice sobre los campos de orden, la página N cuesta lo
+mismo que la primera y los registros nuevos no desplazan las páginas.
+
+El cursor es opaco para el usuario (JSON en base64) y siempre incluye la
+clave primaria como desempate, por lo que el orden es estable aunque varios
+registros compartan fecha.
+"""
+
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+TAMANO_PAGINA = 25
+
+
+def _codificar_cursor(valores, direccion):
+    datos = json.dumps({'v': valores, 'd': direccion}, default=str, separators=(',', ':'))
+    return base64.urlsafe_b64encode(datos.encode()).decode().rstrip('=')
+
+
+def _decodificar_cursor(cursor):
+    """Retorna (valores, direccion) o None si el cursor no es válido"""
+    try:
+        relleno = '=' * (-len(cursor) % 4)
+        datos = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+        valores, direccion = datos['v'], datos['d']
+    except (ValueError, KeyError, TypeError, binascii.Error):
+        return None
+    if direccion not in ('siguiente', 'anterior') or not isinstance(valores, list):
+        return None
+    return valores, direccion
+
+
+def _filtro_keyset(campos, valores, hacia_adelante):
+    """
+    Construye la condición "después de (v1, v2, ...)" para un orden con
+    direcciones mixtas: (c1 > v1) OR (c1 = v1 AND c2 > v2) OR ...
+    """
+    condicion = Q()
+    iguales = {}
+    for (campo, descendente), valor in zip(campos, valores):
+        operador = 'lt' if descendente == hacia_adelante else 'gt'
+        condicion |= Q(**iguales, **{f'{campo}__{operador}': valor})
+        iguales[campo] = valor
+    return condicion
+
+
+class PaginaCursor:
+    """
+    Página de resultados; se itera como una lista en las plantillas
+    """
+
+    def __init__(self, items, url_anterior, url_siguiente):
+        self.items = items
+        self.url_anterior = url_anterior
+        self.url_siguiente = url_siguiente
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __bool__(self):
+        return bool(self.items)
+
+    @property
+    def hay_anterior(self):
+        return self.url_anterior is not None
+
+    @property
+    def hay_siguiente(self):
+        return self.url_siguiente is not None
+
+
+def paginar_por_cursor(request, queryset, orden, tamano=TAMANO_PAGINA, parametro='cursor'):
+    """
+    Pagina un queryset por cursor según `orden` (p. ej. ['-fecha_inscripcion'])
+
+    Los campos de orden deben ser columnas del modelo que no admitan NULL;
+    la clave primaria se agrega como desempate en la misma dirección que el
+    último campo. Un cursor inválido o de otro orden muestra la primera página.
+    """
+    modelo = queryset.model
+    campos = [(campo.lstrip('-'), campo.startswith('-')) for campo in orden]
+    if campos[-1][0] not in ('pk', modelo._meta.pk.name):
+        campos.append(('pk', campos[-1][1]))
+
+    def a_python(nombre, valor):
+        campo = modelo._meta.pk if nombre == 'pk' else modelo._meta.get_field(nombre)
+        return campo.to_python(valor)
+
+    direccion = 'siguiente'
+    cursor = _decodificar_cursor(request.GET.get(parametro, ''))
+    if cursor and len(cursor[0]) == len(campos):
+        valores, direccion = cursor
+        try:
+            valores = [a_python(nombre, valor) for (nombre, _), valor in zip(campos, valores)]
+        except ValidationError:
+            valores, direccion = None, 'siguiente'
+    else:
+        valores = None
+
+    hacia_adelante = direccion == 'siguiente'
+    orden_consulta = [
+        f"{'-' if descendente == hacia_adelante else ''}{nombre}"
+        for nombre, descendente in campos
+    ]
+    consulta = queryset.order_by(*orden_consulta)
+    if valores is not None:
+        consulta = consulta.filter(_filtro_keyset(campos, valores, hacia_adelante))
+
+    items = list(consulta[:tamano + 1])
+    hay_mas = len(items) > tamano
+    items = items[:tamano]
+    if not hacia_adelante:
+        items.reverse()
+
+    def url(item, nueva_direccion):
+        parametros = request.GET.copy()
+        parametros[parametro] = _codificar_cursor(
+            [getattr(item, nombre) for nombre, _ in campos], nueva_direccion
+        )
+        return f'?{parametros.urlencode()}'
+
+    if hacia_adelante:
+        hay_siguiente, hay_anterior = hay_mas, valores is not None
+    else:
+        hay_siguiente, hay_anterior = True, hay_mas
+
+    return PaginaCursor(
+        items,
+        url_anterior=url(items[0], 'anterior') if items and hay_anterior else None,
+        url_siguiente=url(items[-1], 'siguiente') if items and hay_siguiente else None,
+    )
@@ -10,6 +10,7 @@ Stack: Django 5.x + Python 3.12+
 import os
 from pathlib import Path
 from dotenv import load_dotenv
+from django.utils.crypto import salted_hmac
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -54,6 +55,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
+    "usuarios.middleware.RenovacionSesionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
@@ -64,6 +66,9 @@ MIDDLEWARE = [
 # Modelo de usuario personalizado
 AUTH_USER_MODEL = 'usuarios.Usuario'
 
+# Inicio de sesión con nombre de usuario o correo (HU-04)
+AUTHENTICATION_BACKENDS = ['usuarios.backends.UsuarioOCorreoBackend']
+
 ROOT_URLCONF = "registro_control_eventos.urls"
 
 TEMPLATES = [
@@ -158,11 +163,47 @@ EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER', '')
 EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD', '')
 DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', 'noreply@prce.com')
 
+# Caché compartida (HU-03): catálogo público y verificación de certificados.
+# CACHE_BACKEND: locmem (por defecto, local a cada proceso), archivo,
+# memcached o redis; CACHE_LOCATION reemplaza la ubicación por defecto.
+_BACKENDS_CACHE = {
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', 'prce'),
+    'archivo': ('django.core.cache.backends.filebased.FileBasedCache', str(BASE_DIR / 'cache')),
+    'memcached': ('django.core.cache.backends.memcached.PyMemcacheCache', '127.0.0.1:11211'),
+    'redis': ('django.core.cache.backends.redis.RedisCache', 'redis://127.0.0.1:6379/1'),
+}
+_backend_cache, _ubicacion_cache = _BACKENDS_CACHE[os.getenv('CACHE_BACKEND', 'locmem')]
+CACHES = {
+    "default": {
+        "BACKEND": _backend_cache,
+        "LOCATION": os.getenv('CACHE_LOCATION', _ubicacion_cache),
+        "KEY_PREFIX": 'prce',
+        "TIMEOUT": 300,
+    }
+}
+
+# Segundos que una página pública cacheada puede mostrar cupos desactualizados
+# (la inscripción vuelve a validar el cupo en la base de datos)
+SEGUNDOS_CACHE_PAGINAS_PUBLICAS = int(os.getenv('SEGUNDOS_CACHE_PAGINAS_PUBLICAS', 30))
+
 # Configuración de Sesiones (HU-04: Sesión expira tras 20 minutos de inactividad)
 SESSION_COOKIE_AGE = int(os.getenv('SESSION_COOKIE_AGE', 1200))  # 20 minutos en segundos
-SESSION_SAVE_EVERY_REQUEST = True
+# La expiración se renueva con usuarios.middleware.RenovacionSesionMiddleware,
+# que solo guarda la sesión cada SEGUNDOS_RENOVACION_SESION en lugar de en cada
+# petición; cached_db lee la sesión de la caché y la conserva en la base de datos.
+SESSION_SAVE_EVERY_REQUEST = False
+SESSION_ENGINE = os.getenv('SESSION_ENGINE', 'django.contrib.sessions.backends.cached_db')
+SEGUNDOS_RENOVACION_SESION = int(os.getenv('SEGUNDOS_RENOVACION_SESION', 60))
 SESSION_COOKIE_NAME = 'prce_sessionid'
 
+# Check-in sin conexión (HU-17): clave HMAC con la que se firman los listados
+# descargados por los kioscos. Los dispositivos guardan esta clave, así que
+# nunca es SECRET_KEY: sin CHECKIN_CLAVE_FIRMA se deriva una clave propia de
+# ella, de la que no se puede recuperar SECRET_KEY.
+CHECKIN_CLAVE_FIRMA = os.getenv('CHECKIN_CLAVE_FIRMA') or salted_hmac(
+    'prce.checkin', 'clave-firma-listados', secret=SECRET_KEY, algorithm='sha256'
+).hexdigest()
+
 # Configuración de Login
 LOGIN_URL = '/usuarios/login/'
 LOGIN_REDIRECT_URL = '/dashboard/'
@@ -0,0 +1,159 @@
+"""
+Tareas en segundo plano procesadas por workers
+PRCE - Plataforma de Registro y Control de Eventos
+
+Las cargas masivas de inscripciones (HU-10) y la generación masiva de
+certificados (HU-05, HU-19) se encolan como filas en la base de datos. Un
+worker (comando de gestión) reclama la siguiente con SELECT ... FOR UPDATE
+SKIP LOCKED, guarda su avance y un latido al final de cada lote, y la marca
+completada o con error al terminar. Una tarea EN_PROCESO cuyo worker dejó de
+dar latidos se puede reclamar de nuevo y continúa desde su avance guardado.
+"""
+
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import models, transaction
+from django.utils import timezone
+
+
+class TareaSegundoPlano(models.Model):
+    """
+    Base abstracta de las tareas reclamadas por un worker
+
+    Cada subclase define su campo `estado` (PENDIENTE, EN_PROCESO,
+    ESTADO_COMPLETADO y ERROR), los nombres de sus campos de fecha de
+    creación, total y avance, y anotar_error.
+    """
+    ESTADO_COMPLETADO = 'COMPLETADA'
+    CAMPO_CREACION = 'fecha_creacion'
+    CAMPO_TOTAL = 'total'
+    CAMPO_AVANCE = 'procesados'
+
+    fecha_inicio = models.DateTimeField(null=True, blank=True)
+    fecha_fin = models.DateTimeField(null=True, blank=True)
+    fecha_latido = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Última señal de vida del worker"
+    )
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def reclamar_siguiente(cls, timeout_minutos=10):
+        """
+        Reclama la siguiente tarea pendiente (o una en proceso cuyo worker
+        dejó de dar señales) y la marca EN_PROCESO
+        """
+        limite = timezone.now() - timedelta(minutes=timeout_minutos)
+        with transaction.atomic():
+            tarea = cls.objects.select_for_update(skip_locked=True).filter(
+                models.Q(estado='PENDIENTE') |
+                models.Q(estado='EN_PROCESO', fecha_latido__lt=limite)
+            ).order_by(cls.CAMPO_CREACION).first()
+
+            if tarea is None:
+                return None
+
+            ahora = timezone.now()
+            tarea.estado = 'EN_PROCESO'
+            tarea.fecha_inicio = tarea.fecha_inicio or ahora
+            tarea.fecha_latido = ahora
+            tarea.save(update_fields=['estado', 'fecha_inicio', 'fecha_latido'])
+            return tarea
+
+    def guardar_avance(self, *campos):
+        """Guarda los campos de avance del lote junto con el latido del worker"""
+        self.fecha_latido = timezone.now()
+        self.save(update_fields=[*campos, 'fecha_latido'])
+
+    def marcar_completada(self):
+        self.estado = self.ESTADO_COMPLETADO
+        self.fecha_fin = timezone.now()
+        self.save(update_fields=['estado', 'fecha_fin'])
+
+    def marcar_error(self, mensaje):
+        self.estado = 'ERROR'
+        campo = self.anotar_error(mensaje)
+        self.fecha_fin = timezone.now()
+        self.save(update_fields=['estado', campo, 'fecha_fin'])
+
+    def anotar_error(self, mensaje):
+        """Registra el mensaje en la tarea y retorna el nombre del campo modificado"""
+        raise NotImplementedError
+
+    @property
+    def completada(self):
+        return self.estado == self.ESTADO_COMPLETADO
+
+    @property
+    def porcentaje_avance(self):
+        """Porcentaje de elementos procesados"""
+        if self.completada:
+            return 100
+        total = getattr(self, self.CAMPO_TOTAL)
+        if total == 0:
+            return 0
+        return min(100, getattr(self, self.CAMPO_AVANCE) / total * 100)
+
+
+class ComandoWorker(BaseCommand):
+    """
+    Comando que reclama y procesa tareas de `modelo` hasta que se detiene
+
+    Las subclases definen modelo, nombre, procesar(tarea, options) e
+    informar(tarea); pueden agregar argumentos con super().add_arguments.
+    """
+    modelo = None
+    nombre = 'tareas'
+    lote_por_defecto = 100
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--una-vez',
+            action='store_true',
+            help=f'Procesa las {self.nombre} pendientes y termina (sin quedar escuchando)'
+        )
+        parser.add_argument(
+            '--intervalo',
+            type=int,
+            default=5,
+            help=f'Segundos de espera entre consultas cuando no hay {self.nombre}'
+        )
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=self.lote_por_defecto,
+            help='Elementos por lote; el avance se guarda al final de cada lote'
+        )
+        parser.add_argument(
+            '--timeout',
+            type=int,
+            default=10,
+            help='Minutos sin latido tras los cuales una tarea EN_PROCESO se retoma'
+        )
+
+    def procesar(self, tarea, options):
+        raise NotImplementedError
+
+    def informar(self, tarea):
+        raise NotImplementedError
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'Worker de {self.nombre} iniciado')
+
+        while True:
+            tarea = self.modelo.reclamar_siguiente(options['timeout'])
+
+            if tarea is None:
+                if options['una_vez']:
+                    break
+                time.sleep(options['intervalo'])
+                continue
+
+            self.stdout.write(f'Procesando {self.modelo._meta.verbose_name} {tarea.pk} ({tarea.evento.nombre})...')
+            self.procesar(tarea, options)
+            self.informar(tarea)
@@ -0,0 +1,76 @@
+"""
+Exportación de reportes a CSV y Excel en streaming
+HU-29: Exportación de Reportes
+
+Las filas llegan como iterables (normalmente un .values_list().iterator()),
+de modo que la memoria se mantiene constante sin importar el volumen.
+"""
+
+import csv
+import tempfile
+
+from django.http import FileResponse, Http404, StreamingHttpResponse
+
+FORMATOS_EXPORTACION = ('csv', 'xlsx')
+
+# Tamaño de lote para recorrer querysets con .iterator()
+TAMANO_LOTE = 2000
+
+
+class _Eco:
+    """Pseudo-archivo que devuelve lo escrito, para usar csv.writer en streaming"""
+
+    def write(self, valor):
+        return valor
+
+
+def _filas_csv(encabezados, filas):
+    escritor = csv.writer(_Eco())
+    # BOM para que Excel detecte UTF-8 al abrir el CSV
+    yield '\ufeff' + escritor.writerow(encabezados)
+    for fila in filas:
+        yield escritor.writerow(fila)
+
+
+def respuesta_csv(nombre_archivo, encabezados, filas):
+    """StreamingHttpResponse que envía el CSV fila por fila"""
+    response = StreamingHttpResponse(
+        _filas_csv(encabezados, filas),
+        content_type='text/csv; charset=utf-8'
+    )
+    response['Content-Disposition'] = f'attachment; filename="{nombre_archivo}.csv"'
+    return response
+
+
+def respuesta_xlsx(nombre_archivo, encabezados, filas, titulo_hoja='Reporte'):
+    """
+    Genera el XLSX con openpyxl en modo write-only (memoria constante)
+    sobre un archivo temporal y lo envía por bloques
+    """
+    from openpyxl import Workbook
+
+    libro = Workbook(write_only=True)
+    hoja = libro.create_sheet(title=titulo_hoja[:31])
+    hoja.append(list(encabezados))
+    for fila in filas:
+        hoja.append(list(fila))
+
+    archivo = tempfile.TemporaryFile()
+    libro.save(archivo)
+    archivo.seek(0)
+
+    return FileResponse(
+        archivo,
+        as_attachment=True,
+        filename=f'{nombre_archivo}.xlsx',
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    )
+
+
+def respuesta_exportacion(formato, nombre_archivo, encabezados, filas, titulo_hoja='Reporte'):
+    """Despacha la exportación según el formato solicitado ('csv' o 'xlsx')"""
+    if formato == 'csv':
+        return respuesta_csv(nombre_archivo, encabezados, filas)
+    if formato == 'xlsx':
+        return respuesta_xlsx(nombre_archivo, encabezados, filas, titulo_hoja)
+    raise Http404('Formato de exportación no soportado')
@@ -0,0 +1,79 @@
+"""
+Servicios de cálculo para reportes
+HU-28: Generación de Reportes de Asistencia
+HU-29: Exportación de Reportes
+"""
+
+from inscripciones.models import Inscripcion
+from .exportacion import TAMANO_LOTE
+
+
+def participantes_asistencia(evento):
+    """
+    QuerySet de inscripciones confirmadas; las sesiones asistidas salen
+    del contador asistencias_count, sin agrupar asistencias
+    """
+    return Inscripcion.objects.filter(
+        evento=evento,
+        estado='CONFIRMADA'
+    ).order_by('apellido', 'nombre', 'pk')
+
+
+def calcular_porcentaje(asistencias, evento):
+    """Porcentaje de sesiones asistidas sobre el total del evento"""
+    if evento.numero_sesiones <= 0:
+        return 0
+    return asistencias / evento.numero_sesiones * 100
+
+
+def construir_reporte_asistencia(evento):
+    """
+    Construye el reporte de asistencia de un evento (HU-28)
+    Todo el detalle por participante sale de una sola consulta.
+    """
+    participantes = []
+    total_asistencias = 0
+
+    for inscripcion in participantes_asistencia(evento):
+        porcentaje = calcular_porcentaje(inscripcion.asistencias_count, evento)
+        if inscripcion.asistencias_count > 0:
+            total_asistencias += 1
+        participantes.append({
+            'inscripcion': inscripcion,
+            'asistencias': inscripcion.asistencias_count,
+            'porcentaje': porcentaje,
+            'cumple': porcentaje >= evento.porcentaje_asistencia_minimo
+        })
+
+    total_inscritos = len(participantes)
+
+    return {
+        'evento': evento,
+        'total_inscritos': total_inscritos,
+        'total_asistencias': total_asistencias,
+        'porcentaje_asistencia': (total_asistencias / total_inscritos * 100) if total_inscritos > 0 else 0,
+        'participantes': participantes,
+    }
+
+
+ENCABEZADOS_ASISTENCIA = [
+    'Nombre', 'Apellido', 'Documento', 'Correo',
+    'Sesiones asistidas', 'Total sesiones', 'Porcentaje', 'Cumple'
+]
+
+
+def filas_reporte_asistencia(evento):
+    """
+    Genera las filas del reporte de asistencia para exportación (HU-29)
+    Recorre la consulta con .iterator() sin materializar la lista
+    """
+    filas = participantes_asistencia(evento).values_list(
+        'nombre', 'apellido', 'documento', 'correo', 'asistencias_count'
+    )
+    for nombre, apellido, documento, correo, asistencias in filas.iterator(chunk_size=TAMANO_LOTE):
+        porcentaje = calcular_porcentaje(asistencias, evento)
+        yield [
+            nombre, apellido, documento, correo,
+            asistencias, evento.numero_sesiones, round(porcentaje, 1),
+            'Sí' if porcentaje >= evento.porcentaje_asistencia_minimo else 'No'
+        ]
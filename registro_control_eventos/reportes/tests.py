@@ -0,0 +1,245 @@
+"""
+Tests para la aplicación de Reportes
+HU-28: Generación de Reportes de Asistencia
+"""
+
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from datetime import timedelta
+from decimal import Decimal
+
+from eventos.models import Evento, TipoEvento
+from inscripciones.models import Inscripcion
+from asistencias.models import Asistencia
+from usuarios.models import Usuario
+from reportes.servicios import construir_reporte_asistencia
+
+
+class ReporteBaseTest(TestCase):
+    """Datos comunes: un evento de 4 sesiones y un administrador"""
+
+    def setUp(self):
+        self.client = Client()
+        self.tipo_evento = TipoEvento.objects.create(nombre='ACADEMICO')
+        self.admin = Usuario.objects.create_user(
+            username='admin_reportes',
+            email='admin_reportes@test.com',
+            password='testpass123',
+            rol='ADMINISTRADOR',
+            documento='5550001'
+        )
+        self.evento = Evento.objects.create(
+            nombre='Curso de Reportes',
+            descripcion='Curso',
+            tipo_evento=self.tipo_evento,
+            fecha_inicio=timezone.now() + timedelta(days=3),
+            fecha_fin=timezone.now() + timedelta(days=4),
+            lugar='Sala 1',
+            cupo_maximo=100,
+            costo=Decimal('0.00'),
+            estado='PUBLICADO',
+            numero_sesiones=4,
+            porcentaje_asistencia_minimo=75,
+            creado_por=self.admin
+        )
+        self.contador = 0
+
+    def _crear_participantes(self, cantidad, sesiones):
+        for _ in range(cantidad):
+            self.contador += 1
+            inscripcion = Inscripcion.objects.create(
+                evento=self.evento,
+                nombre='Participante',
+                apellido=f'{self.contador:04d}',
+                documento=f'{9000000 + self.contador}',
+                correo=f'p{self.contador}@test.com',
+                telefono='3001234567'
+            )
+            for sesion in range(1, sesiones + 1):
+                Asistencia.objects.create(inscripcion=inscripcion, sesion=sesion)
+
+
+class ReporteAsistenciaTest(ReporteBaseTest):
+    """
+    Tests para el reporte de asistencia (HU-28)
+    Verifica los cálculos y que el número de consultas no dependa de los participantes
+    """
+
+    def test_calculos_por_participante(self):
+        """Porcentajes y flag cumple por participante"""
+        self._crear_participantes(1, 3)
+        self._crear_participantes(1, 1)
+        self._crear_participantes(1, 0)
+
+        with self.assertNumQueries(1):
+            reporte = construir_reporte_asistencia(self.evento)
+
+        self.assertEqual(reporte['total_inscritos'], 3)
+        self.assertEqual(reporte['total_asistencias'], 2)
+        resultados = [(p['asistencias'], p['porcentaje'], p['cumple']) for p in reporte['participantes']]
+        self.assertEqual(resultados, [(3, 75.0, True), (1, 25.0, False), (0, 0, False)])
+
+    def test_consultas_constantes_en_vistas(self):
+        """Las vistas cuestan lo mismo con 2 o con 12 participantes"""
+        self.client.login(username='admin_reportes', password='testpass123')
+        urls = [
+            reverse('reportes:asistencia', args=[self.evento.pk]),
+            reverse('reportes:exportar_pdf', args=[self.evento.pk]),
+        ]
+
+        self._crear_participantes(2, 2)
+        consultas_iniciales = []
+        for url in urls:
+            with CaptureQueriesContext(connection) as consultas:
+                self.assertEqual(self.client.get(url).status_code, 200)
+            consultas_iniciales.append(len(consultas))
+
+        self._crear_participantes(10, 2)
+        for url, esperado in zip(urls, consultas_iniciales):
+            with CaptureQueriesContext(connection) as consultas:
+                response = self.client.get(url)
+            self.assertEqual(len(consultas), esperado, url)
+            self.assertEqual(response.context['total_inscritos'], 12)
+
+
+class ExportacionReportesTest(ReporteBaseTest):
+    """
+    Tests para la exportación en streaming (HU-29)
+    """
+
+    def test_exportar_csv_en_streaming(self):
+        """El CSV se envía como StreamingHttpResponse con una fila por participante"""
+        self._crear_participantes(3, 3)
+        self.client.login(username='admin_reportes', password='testpass123')
+
+        response = self.client.get(reverse('reportes:exportar_csv', args=[self.evento.pk]))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        contenido = b''.join(response.streaming_content).decode('utf-8-sig')
+        lineas = contenido.strip().splitlines()
+        self.assertEqual(len(lineas), 4)
+        self.assertIn('Sesiones asistidas', lineas[0])
+        self.assertTrue(lineas[1].endswith('75.0,Sí'))
+
+    def test_exportar_xlsx(self):
+        """El Excel es un XLSX válido con encabezados y filas"""
+        from io import BytesIO
+        from openpyxl import load_workbook
+
+        self._crear_participantes(2, 1)
+        self.client.login(username='admin_reportes', password='testpass123')
+
+        response = self.client.get(reverse('reportes:exportar_excel', args=[self.evento.pk]))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('attachment', response['Content-Disposition'])
+        libro = load_workbook(BytesIO(b''.join(response.streaming_content)), read_only=True)
+        filas = list(libro.active.iter_rows(values_only=True))
+        self.assertEqual(len(filas), 3)
+        self.assertEqual(filas[0][0], 'Nombre')
+
+    def test_exportar_inscripciones_respeta_filtros(self):
+        """La exportación de inscripciones usa los mismos filtros que la lista"""
+        self._crear_participantes(3, 0)
+        self.client.login(username='admin_reportes', password='testpass123')
+
+        response = self.client.get(
+            reverse('inscripciones:exportar', args=['csv']),
+            {'q': '0002'}
+        )
+
+        contenido = b''.join(response.streaming_content).decode('utf-8-sig')
+        self.assertEqual(len(contenido.strip().splitlines()), 2)
+
+    def test_formato_invalido(self):
+        """Un formato no soportado retorna 404"""
+        self.client.login(username='admin_reportes', password='testpass123')
+        response = self.client.get(reverse('pagos:exportar_reporte', args=[self.evento.pk, 'pdf']))
+        self.assertEqual(response.status_code, 404)
+
+
+class EstadisticaEventoTest(ReporteBaseTest):
+    """
+    Tests para la tabla materializada de estadísticas (HU-30)
+    """
+
+    def _estadistica(self):
+        from eventos.models import EstadisticaEvento
+        return EstadisticaEvento.objects.get(evento=self.evento)
+
+    def test_se_actualiza_con_asistencias_y_pagos(self):
+        """Asistencias y pagos ajustan la fila del evento de forma incremental"""
+        from pagos.models import Pago, MetodoPago
+
+        self._crear_participantes(2, 3)
+        estadistica = self._estadistica()
+        self.assertEqual((estadistica.asistentes, estadistica.sesiones_asistidas), (2, 6))
+
+        inscripcion = self.evento.inscripciones.order_by('pk').first()
+        inscripcion.asistencias.get(sesion=1).delete()
+        inscripcion.asistencias.get(sesion=2).delete()
+        self.assertEqual(self._estadistica().asistentes, 2)
+        inscripcion.asistencias.get(sesion=3).delete()
+        estadistica = self._estadistica()
+        self.assertEqual((estadistica.asistentes, estadistica.sesiones_asistidas), (1, 3))
+
+        metodo = MetodoPago.objects.create(codigo='EFECTIVO', nombre='Efectivo')
+        pago = Pago.objects.create(inscripcion=inscripcion, monto=Decimal('5000'), metodo_pago=metodo)
+        self.assertEqual(self._estadistica().total_recaudado, 0)
+        pago.confirmar()
+        self.assertEqual(self._estadistica().total_recaudado, Decimal('5000'))
+        pago.reembolsar()
+        self.assertEqual(self._estadistica().total_recaudado, 0)
+
+    def test_eliminar_inscripcion_descuenta_cascada(self):
+        """Borrar una inscripción descuenta sus asistencias en cascada"""
+        self._crear_participantes(2, 2)
+        self.evento.inscripciones.order_by('pk').first().delete()
+
+        estadistica = self._estadistica()
+        self.assertEqual((estadistica.asistentes, estadistica.sesiones_asistidas), (1, 2))
+
+    def test_recalcular_corrige_desviaciones(self):
+        """El comando recalcular_estadisticas reconstruye la fila"""
+        from django.core.management import call_command
+        from io import StringIO
+        from eventos.models import EstadisticaEvento
+
+        self._crear_participantes(3, 2)
+        EstadisticaEvento.objects.filter(evento=self.evento).update(asistentes=0, sesiones_asistidas=99)
+
+        call_command('recalcular_estadisticas', stdout=StringIO())
+
+        estadistica = self._estadistica()
+        self.assertEqual((estadistica.asistentes, estadistica.sesiones_asistidas), (3, 6))
+
+    def test_dashboards_en_consultas_constantes(self):
+        """Los dashboards no dependen del volumen de inscripciones ni de eventos finalizados"""
+        self.client.login(username='admin_reportes', password='testpass123')
+        self._crear_participantes(4, 1)
+        self._crear_participantes(4, 0)
+        Evento.objects.filter(pk=self.evento.pk).update(estado='FINALIZADO')
+        urls = [reverse('dashboard:index'), reverse('reportes:dashboard')]
+
+        consultas_iniciales = []
+        for url in urls:
+            with CaptureQueriesContext(connection) as consultas:
+                response = self.client.get(url)
+            consultas_iniciales.append(len(consultas))
+
+        self.assertEqual(response.context['total_inscripciones'], 8)
+        response = self.client.get(urls[0])
+        self.assertEqual(response.context['stats']['promedio_asistencia'], 50.0)
+
+        for _ in range(5):
+            otro = Evento.objects.get(pk=self.evento.pk).duplicar(self.admin)
+            otro.estado = 'FINALIZADO'
+            otro.save()
+        for url, esperado in zip(urls, consultas_iniciales):
+            with CaptureQueriesContext(connection) as consultas:
+                self.client.get(url)
+            self.assertEqual(len(consultas), esperado, url)
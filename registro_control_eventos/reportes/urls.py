@@ -12,5 +12,6 @@ urlpatterns = [
     path('asistencia/<int:evento_id>/', views.reporte_asistencia, name='asistencia'),
     path('asistencia/<int:evento_id>/pdf/', views.exportar_reporte_pdf, name='exportar_pdf'),
     path('asistencia/<int:evento_id>/excel/', views.exportar_reporte_excel, name='exportar_excel'),
+    path('asistencia/<int:evento_id>/csv/', views.exportar_reporte_csv, name='exportar_csv'),
 ]
 
@@ -1,7 +1,31 @@
+import atexit
+import logging
+
 from django.apps import AppConfig
+from django.core.signals import request_finished
+from django.db import DatabaseError
+
+logger = logging.getLogger(__name__)
+
+
+def _guardar_accesos_al_terminar():
+    """Último intento de guardar el buffer de accesos al cerrar el proceso (HU-04)"""
+    from .models import guardar_accesos_pendientes
+
+    try:
+        guardar_accesos_pendientes()
+    except DatabaseError:
+        logger.exception('No se pudieron guardar los últimos accesos pendientes')
 
 
 class UsuariosConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'usuarios'
     verbose_name = 'Gestión de Usuarios'
+
+    def ready(self):
+        from .models import guardar_accesos_vencidos
+
+        # El buffer de accesos no depende de que llegue otro inicio de sesión
+        request_finished.connect(guardar_accesos_vencidos, dispatch_uid='usuarios.guardar_accesos_vencidos')
+        atexit.register(_guardar_accesos_al_terminar)
@@ -0,0 +1,42 @@
+"""
+Backend de autenticación de la aplicación de Usuarios
+HU-04: Inicio de Sesión
+"""
+
+from django.contrib.auth.backends import ModelBackend
+from django.db.models import Q
+
+from .models import Usuario
+
+
+class UsuarioOCorreoBackend(ModelBackend):
+    """
+    Autentica con nombre de usuario o correo en una sola consulta (HU-04)
+
+    Si el identificador coincide con el usuario de una cuenta y el correo de
+    otra, gana el nombre de usuario. Una contraseña incorrecta suma un intento
+    fallido a la cuenta encontrada, sin volver a buscarla.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(Usuario.USERNAME_FIELD)
+        if not username or password is None:
+            return None
+
+        candidatos = list(Usuario.objects.filter(Q(username=username) | Q(email=username))[:2])
+        usuario = next((c for c in candidatos if c.username == username), None)
+        if usuario is None and candidatos:
+            usuario = candidatos[0]
+
+        if usuario is None:
+            # Mismo costo que una contraseña incorrecta (no revela si la cuenta existe)
+            Usuario().set_password(password)
+            return None
+
+        if not usuario.check_password(password):
+            usuario.incrementar_intentos_fallidos()
+            return None
+        if self.user_can_authenticate(usuario):
+            return usuario
+        return None
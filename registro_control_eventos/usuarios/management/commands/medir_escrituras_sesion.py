@@ -0,0 +1,88 @@
+"""
+Mide las escrituras a la tabla de sesiones por petición autenticada (HU-04)
+Compara la renovación por umbral (configuración actual) con la estrategia
+anterior, SESSION_SAVE_EVERY_REQUEST=True. El usuario de prueba y sus
+sesiones se descartan al terminar.
+"""
+
+import uuid
+from unittest import mock
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from usuarios.models import Usuario
+
+MIDDLEWARE_RENOVACION = 'usuarios.middleware.RenovacionSesionMiddleware'
+
+
+class _Descartar(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Mide las escrituras de sesión por petición autenticada'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--peticiones', type=int, default=200)
+        parser.add_argument('--url', default='/dashboard/')
+        parser.add_argument(
+            '--intervalo',
+            type=float,
+            default=5,
+            help='Segundos simulados entre peticiones (por defecto 5)'
+        )
+
+    def _medir(self, usuario, clave, opciones, **cambios):
+        """Retorna (escrituras, peticiones) sobre django_session"""
+        reloj = [1_000_000.0]
+
+        with override_settings(**cambios), mock.patch(
+            'usuarios.middleware.time.time', side_effect=lambda: reloj[0]
+        ):
+            cliente = Client()
+            cliente.post(reverse('usuarios:login'), {'username': usuario.username, 'password': clave})
+            with CaptureQueriesContext(connection) as consultas:
+                for _ in range(opciones['peticiones']):
+                    cliente.get(opciones['url'])
+                    reloj[0] += opciones['intervalo']
+
+        escrituras = sum(
+            1 for consulta in consultas.captured_queries
+            if 'django_session' in consulta['sql'] and
+            consulta['sql'].lstrip().upper().startswith(('INSERT', 'UPDATE', 'DELETE'))
+        )
+        return escrituras, opciones['peticiones']
+
+    def handle(self, *args, **options):
+        resultados = {}
+        sufijo = uuid.uuid4().hex[:12]
+        try:
+            with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']), transaction.atomic():
+                clave = uuid.uuid4().hex
+                usuario = Usuario.objects.create_user(
+                    username=f'medicion_{sufijo}',
+                    email=f'medicion_{sufijo}@prce.local',
+                    password=clave,
+                    documento=f'M{sufijo}'
+                )
+                resultados['Cada petición (anterior)'] = self._medir(
+                    usuario, clave, options,
+                    SESSION_SAVE_EVERY_REQUEST=True,
+                    MIDDLEWARE=[m for m in settings.MIDDLEWARE if m != MIDDLEWARE_RENOVACION]
+                )
+                resultados['Renovación por umbral'] = self._medir(usuario, clave, options)
+                raise _Descartar
+        except _Descartar:
+            pass
+
+        self.stdout.write(
+            f"{options['peticiones']} peticiones a {options['url']}, "
+            f"{options['intervalo']:g} s entre peticiones, "
+            f"umbral {settings.SEGUNDOS_RENOVACION_SESION} s, {settings.SESSION_ENGINE}"
+        )
+        for nombre, (escrituras, peticiones) in resultados.items():
+            self.stdout.write(f'  {nombre}: {escrituras} escrituras ({escrituras / peticiones:.3f} por petición)')
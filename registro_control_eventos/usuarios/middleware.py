@@ -0,0 +1,47 @@
+"""
+Middleware de la aplicación de Usuarios
+HU-04: Inicio de Sesión (la sesión expira tras 20 minutos de inactividad)
+"""
+
+import time
+
+from django.conf import settings
+
+# Marca (epoch en segundos) de la última vez que se guardó la sesión
+CLAVE_RENOVACION = '_renovada'
+
+
+class RenovacionSesionMiddleware:
+    """
+    Renueva la expiración por inactividad sin escribir la sesión en cada petición
+
+    Reemplaza SESSION_SAVE_EVERY_REQUEST: la sesión solo se marca como
+    modificada cuando pasaron SEGUNDOS_RENOVACION_SESION desde que se guardó,
+    y SessionMiddleware la guarda con una expiración nueva. La sesión nunca
+    dura más de SESSION_COOKIE_AGE sin actividad; a lo sumo vence
+    SEGUNDOS_RENOVACION_SESION antes.
+
+    La marca se agrega cada vez que la sesión se guarda por otro motivo (por
+    ejemplo al iniciar sesión); una sesión sin marca, creada fuera de una
+    petición, conserva la expiración con que se guardó.
+
+    Debe ir después de SessionMiddleware en MIDDLEWARE.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+
+        sesion = getattr(request, 'session', None)
+        if sesion is None or sesion.is_empty():
+            return response
+
+        ahora = int(time.time())
+        renovada = sesion.get(CLAVE_RENOVACION)
+        if sesion.modified or (
+            renovada is not None and ahora - renovada >= settings.SEGUNDOS_RENOVACION_SESION
+        ):
+            sesion[CLAVE_RENOVACION] = ahora
+        return response
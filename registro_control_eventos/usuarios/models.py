@@ -8,11 +8,56 @@ HU-13: Edición de Perfil
 HU-14: Desactivación de Usuario
 """
 
+import threading
+import time
+
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 from django.utils import timezone
 
 
+# Últimos accesos pendientes de guardar (HU-04). Se escriben en bloque con el
+# primer acceso registrado pasados SEGUNDOS_BUFFER_ACCESOS o al acumular
+# MAX_ACCESOS_EN_BUFFER, para que muchos inicios de sesión simultáneos no se
+# serialicen escribiendo cada fila de usuario. Sin nuevos inicios de sesión,
+# el buffer vencido se guarda al terminar cualquier petición del proceso
+# (guardar_accesos_vencidos) y lo que quede, al terminar el proceso (ver
+# UsuariosConfig.ready).
+SEGUNDOS_BUFFER_ACCESOS = 30
+MAX_ACCESOS_EN_BUFFER = 500
+_accesos_pendientes = {}
+_primer_acceso_pendiente = None
+_bloqueo_accesos = threading.Lock()
+
+
+def guardar_accesos_pendientes():
+    """Escribe los últimos accesos acumulados; retorna cuántos usuarios se actualizaron"""
+    global _primer_acceso_pendiente
+    with _bloqueo_accesos:
+        pendientes = dict(_accesos_pendientes)
+        _accesos_pendientes.clear()
+        _primer_acceso_pendiente = None
+    
+    if pendientes:
+        Usuario.objects.bulk_update(
+            [Usuario(pk=pk, ultimo_acceso=fecha) for pk, fecha in pendientes.items()],
+            ['ultimo_acceso'],
+            batch_size=500
+        )
+    return len(pendientes)
+
+
+def guardar_accesos_vencidos(**kwargs):
+    """
+    Guarda el buffer si su primer acceso tiene más de SEGUNDOS_BUFFER_ACCESOS
+    Receptor de request_finished: sin accesos pendientes no toma el bloqueo
+    """
+    primero = _primer_acceso_pendiente
+    if primero is None or time.monotonic() - primero < SEGUNDOS_BUFFER_ACCESOS:
+        return 0
+    return guardar_accesos_pendientes()
+
+
 class Usuario(AbstractUser):
     """
     Modelo de Usuario personalizado que extiende AbstractUser
@@ -95,6 +140,8 @@ class Usuario(AbstractUser):
             models.Index(fields=['email']),
             models.Index(fields=['documento']),
             models.Index(fields=['rol']),
+            # Paginación por cursor de la lista de usuarios
+            models.Index(fields=['-fecha_registro', '-id']),
         ]
     
     def __str__(self):
@@ -140,7 +187,7 @@ class Usuario(AbstractUser):
             from datetime import timedelta
             self.bloqueado_hasta = timezone.now() + timedelta(minutes=15)
         
-        self.save()
+        self.save(update_fields=['intentos_fallidos', 'bloqueado_hasta'])
     
     def resetear_intentos_fallidos(self):
         """Resetea el contador de intentos fallidos"""
@@ -159,9 +206,39 @@ class Usuario(AbstractUser):
         return self.activo and not self.esta_bloqueado()
     
     def registrar_acceso(self):
-        """Registra el último acceso del usuario (HU-04)"""
+        """
+        Registra el último acceso del usuario (HU-04)
+        Se acumula en el buffer de accesos y se guarda en bloque
+        """
+        global _primer_acceso_pendiente
+        self.ultimo_acceso = timezone.now()
+        ahora = time.monotonic()
+        with _bloqueo_accesos:
+            _accesos_pendientes[self.pk] = self.ultimo_acceso
+            if _primer_acceso_pendiente is None:
+                _primer_acceso_pendiente = ahora
+            vencido = (
+                len(_accesos_pendientes) >= MAX_ACCESOS_EN_BUFFER or
+                ahora - _primer_acceso_pendiente >= SEGUNDOS_BUFFER_ACCESOS
+            )
+        if vencido:
+            guardar_accesos_pendientes()
+    
+    def registrar_inicio_sesion(self):
+        """
+        Limpia los intentos fallidos y registra el acceso tras un login exitoso (HU-04)
+        Con intentos que limpiar es una sola escritura; si no, el acceso va al buffer
+        """
+        if not self.intentos_fallidos and not self.bloqueado_hasta:
+            self.registrar_acceso()
+            return
+        
+        self.intentos_fallidos = 0
+        self.bloqueado_hasta = None
         self.ultimo_acceso = timezone.now()
-        self.save(update_fields=['ultimo_acceso'])
+        with _bloqueo_accesos:
+            _accesos_pendientes.pop(self.pk, None)
+        self.save(update_fields=['intentos_fallidos', 'bloqueado_hasta', 'ultimo_acceso'])
     
     def es_administrador(self):
         """Verifica si el usuario es administrador"""
@@ -1,7 +1,24 @@
-from django.test import TestCase
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import authenticate
+from django.contrib.sessions.models import Session
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 from django.utils import timezone
+from . import models
 from .models import Usuario
 
+
+def vaciar_buffer_accesos():
+	"""Descarta los accesos pendientes para que no se guarden fuera del test"""
+	models._accesos_pendientes.clear()
+	models._primer_acceso_pendiente = None
+
+
 class UsuarioRolesTestCase(TestCase):
 	def setUp(self):
 		self.admin = Usuario.objects.create_user(
@@ -60,3 +77,108 @@ class UsuarioRolesTestCase(TestCase):
 		self.organizador.activar()
 		self.assertTrue(self.organizador.activo)
 		self.assertIsNone(self.organizador.fecha_desactivacion)
+
+
+class RenovacionSesionTestCase(TestCase):
+	"""La expiración por inactividad (HU-04) se guarda solo al superar el umbral"""
+
+	def setUp(self):
+		self.usuario = Usuario.objects.create_user(
+			username='sesion',
+			password='sesionpass',
+			email='sesion@example.com',
+			documento='1010'
+		)
+		self.addCleanup(vaciar_buffer_accesos)
+		with mock.patch('usuarios.middleware.time.time', return_value=1000):
+			self.client.post(reverse('usuarios:login'), {'username': 'sesion', 'password': 'sesionpass'})
+
+	def _escrituras(self, segundos, peticiones=1):
+		with mock.patch('usuarios.middleware.time.time', return_value=segundos), \
+				CaptureQueriesContext(connection) as consultas:
+			for _ in range(peticiones):
+				self.assertEqual(self.client.get(reverse('usuarios:perfil')).status_code, 200)
+		return sum(
+			1 for consulta in consultas.captured_queries
+			if 'django_session' in consulta['sql'] and
+			consulta['sql'].lstrip().upper().startswith(('INSERT', 'UPDATE'))
+		)
+
+	def test_renueva_solo_al_pasar_el_umbral(self):
+		self.assertEqual(self._escrituras(1030, peticiones=5), 0)
+		self.assertEqual(self._escrituras(1061), 1)
+
+		sesion = Session.objects.get()
+		self.assertGreater(sesion.expire_date, timezone.now() + timedelta(minutes=19))
+		self.assertLessEqual(sesion.expire_date, timezone.now() + timedelta(minutes=20))
+
+
+class AutenticacionTestCase(TestCase):
+	"""Inicio de sesión por usuario o correo y registro de accesos (HU-04)"""
+
+	def setUp(self):
+		vaciar_buffer_accesos()
+		self.addCleanup(vaciar_buffer_accesos)
+		self.usuario = Usuario.objects.create_user(
+			username='ingreso',
+			password='ingresopass',
+			email='ingreso@example.com',
+			documento='1020'
+		)
+
+	def _escrituras_usuario(self, datos):
+		with CaptureQueriesContext(connection) as consultas:
+			self.client.post(reverse('usuarios:login'), datos)
+		return sum(
+			1 for consulta in consultas.captured_queries
+			if consulta['sql'].startswith('UPDATE "usuarios_usuario"')
+		)
+
+	def test_usuario_o_correo_en_una_consulta(self):
+		for identificador in ('ingreso', 'ingreso@example.com'):
+			with self.assertNumQueries(1):
+				self.assertEqual(authenticate(None, username=identificador, password='ingresopass'), self.usuario)
+		with self.assertNumQueries(1):
+			self.assertIsNone(authenticate(None, username='nadie', password='ingresopass'))
+
+	def test_contrasena_incorrecta_suma_intento(self):
+		with self.assertNumQueries(2):
+			self.assertIsNone(authenticate(None, username='ingreso@example.com', password='mala'))
+		self.usuario.refresh_from_db()
+		self.assertEqual(self.usuario.intentos_fallidos, 1)
+
+	def test_login_exitoso_en_una_escritura(self):
+		"""Sin intentos que limpiar solo se guarda last_login; ultimo_acceso queda en el buffer"""
+		self.assertEqual(self._escrituras_usuario({'username': 'ingreso', 'password': 'ingresopass'}), 1)
+		self.usuario.refresh_from_db()
+		self.assertIsNone(self.usuario.ultimo_acceso)
+
+		from usuarios.models import guardar_accesos_pendientes
+		self.assertEqual(guardar_accesos_pendientes(), 1)
+		self.usuario.refresh_from_db()
+		self.assertIsNotNone(self.usuario.ultimo_acceso)
+
+		# Con intentos fallidos previos, limpiarlos y registrar el acceso es una sola escritura
+		self.client.logout()
+		self._escrituras_usuario({'username': 'ingreso', 'password': 'mala'})
+		self.assertEqual(self._escrituras_usuario({'username': 'ingreso', 'password': 'ingresopass'}), 2)
+		self.usuario.refresh_from_db()
+		self.assertEqual(self.usuario.intentos_fallidos, 0)
+
+	def test_buffer_inactivo_se_guarda_con_cualquier_peticion(self):
+		"""Sin más inicios de sesión, el buffer vencido se guarda al terminar otra petición"""
+		self.client.post(reverse('usuarios:login'), {'username': 'ingreso', 'password': 'ingresopass'})
+		self.usuario.refresh_from_db()
+		self.assertIsNone(self.usuario.ultimo_acceso)
+
+		# Antes de vencer, otras peticiones no escriben
+		self.client.get(reverse('usuarios:login'))
+		self.usuario.refresh_from_db()
+		self.assertIsNone(self.usuario.ultimo_acceso)
+
+		vencido = time.monotonic() + models.SEGUNDOS_BUFFER_ACCESOS
+		with mock.patch('usuarios.models.time.monotonic', return_value=vencido):
+			Client().get(reverse('usuarios:login'))
+		self.usuario.refresh_from_db()
+		self.assertIsNotNone(self.usuario.ultimo_acceso)
+		self.assertEqual(models._accesos_pendientes, {})
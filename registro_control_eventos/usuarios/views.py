@@ -33,17 +33,9 @@ def login_view(request):
             password = form.cleaned_data['password']
             remember_me = form.cleaned_data.get('remember_me', False)
             
-            # Intentar autenticar (puede ser username o email)
+            # Autenticar por nombre de usuario o correo (UsuarioOCorreoBackend)
             user = authenticate(request, username=username, password=password)
             
-            # Si no funciona con username, intentar con email
-            if user is None:
-                try:
-                    user_obj = Usuario.objects.get(email=username)
-                    user = authenticate(request, username=user_obj.username, password=password)
-                except Usuario.DoesNotExist:
-                    pass
-            
             if user is not None:
                 # Verificar si puede iniciar sesión (HU-04: cuenta activa y no bloqueada)
                 if not user.puede_iniciar_sesion():
@@ -72,8 +64,7 @@ def login_view(request):
                 else:
                     request.session.set_expiry(1200)  # 20 minutos
                 
-                user.resetear_intentos_fallidos()
-                user.registrar_acceso()
+                user.registrar_inicio_sesion()
                 
                 messages.success(request, f'Bienvenido, {user.get_full_name() or user.username}!')
                 
@@ -87,18 +78,8 @@ def login_view(request):
                     return redirect(next_url)
                 return redirect('dashboard:index')
             else:
-                # Credenciales inválidas
+                # Credenciales inválidas (el backend ya sumó el intento fallido)
                 logger.warning(f'Login fallido para: {username}')
-                # Intentar encontrar el usuario para incrementar intentos fallidos
-                try:
-                    user = Usuario.objects.get(username=username)
-                    user.incrementar_intentos_fallidos()
-                except Usuario.DoesNotExist:
-                    try:
-                        user = Usuario.objects.get(email=username)
-                        user.incrementar_intentos_fallidos()
-                    except Usuario.DoesNotExist:
-                        pass
                 
                 messages.error(request, 'Usuario o contraseña inválidos')
     else:
@@ -181,10 +162,19 @@ def lista_usuarios(request):
         messages.error(request, 'No tiene permisos para acceder a esta página')
         return redirect('dashboard')
     
-    usuarios = Usuario.objects.all().order_by('-fecha_registro')
+    from django.db.models import Count, Q
+    from registro_control_eventos.paginacion import paginar_por_cursor
+    
+    estadisticas = Usuario.objects.aggregate(
+        total=Count('pk'),
+        administradores=Count('pk', filter=Q(rol='ADMINISTRADOR')),
+        organizadores=Count('pk', filter=Q(rol='ORGANIZADOR')),
+        asistentes=Count('pk', filter=Q(rol='ASISTENTE')),
+    )
     
     return render(request, 'usuarios/lista.html', {
-        'usuarios': usuarios
+        'usuarios': paginar_por_cursor(request, Usuario.objects.all(), ['-fecha_registro']),
+        'estadisticas': estadisticas,
     })
 
 